@@ -37,7 +37,8 @@ if (window.trustedTypes && window.trustedTypes.createPolicy) {
 
     const CONFIG = {
         SERVER_URL: "http://localhost:3002",
-        SPA_TIMEOUT: 5000
+        SPA_TIMEOUT: 5000,
+        GZIP_MIN_CHARS: 64 * 1024
     };
 
     // ==========================================
@@ -309,15 +310,27 @@ if (window.trustedTypes && window.trustedTypes.createPolicy) {
             }
         }
 
-        sendData(payload) {
+        async encodeBody(json) {
+            // Large captures (megathreads, transcripts) upload gzip'd; the server decodes them
+            if (json.length < CONFIG.GZIP_MIN_CHARS || typeof CompressionStream === "undefined") {
+                return { data: json, headers: {} };
+            }
+            const stream = new Blob([json]).stream().pipeThrough(new CompressionStream("gzip"));
+            return { data: await new Response(stream).blob(), headers: { "Content-Encoding": "gzip" } };
+        }
+
+        async sendData(payload) {
+            const body = await this.encodeBody(JSON.stringify(payload));
             GM_xmlhttpRequest({
                 method: "POST",
                 url: CONFIG.SERVER_URL,
-                data: JSON.stringify(payload),
-                headers: { "Content-Type": "application/json" },
+                data: body.data,
+                headers: { "Content-Type": "application/json", ...body.headers },
                 onload: (res) => {
                     if (res.status === 200) {
                         showToast(`Archived: ${payload.title.substring(0, 30)}...`, false);
+                    } else if (res.status === 413) {
+                        showToast("Page too large to archive.", true);
                     } else {
                         showToast("Server error saving page.", true);
                     }
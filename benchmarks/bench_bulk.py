@@ -0,0 +1,73 @@
+"""
+Items/sec through POST /bulk, in-process over ASGI, for an NDJSON body of new
+and repeated articles.
+
+    python -m benchmarks.bench_bulk --items 100000 --batch-size 1000
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+from nomnom.config import settings
+from nomnom.db.connection import ConnectionPool, run_migrations
+from nomnom.main import create_app
+from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.services.ingestion_service import IngestionService
+
+
+def _body(items: int) -> bytes:
+    lines = []
+    for i in range(items):
+        # Every fourth line repeats an earlier URL to exercise the unchanged path
+        n = i // 2 if i % 4 == 3 else i
+        lines.append(json.dumps({
+            "url": f"https://example.com/bulk/{n}", "domain": "example.com",
+            "title": f"Title {n}", "content_markdown": "body " * 50,
+            "metadata": {"type": "generic_article"},
+        }))
+    return "\n".join(lines).encode()
+
+
+async def _run(db_path: str, body: bytes) -> tuple[float, Counter]:
+    app = create_app()
+    pool = ConnectionPool(db_path)
+    app.state.ingestion_service = IngestionService(SubmissionRepository(db_path, pool=pool))
+    statuses: Counter = Counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        async with client.stream("POST", "/bulk", content=body) as response:
+            async for line in response.aiter_lines():
+                statuses[json.loads(line)["status"]] += 1
+        elapsed = time.perf_counter() - started
+    pool.close()
+    return elapsed, statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    settings.BULK_BATCH_SIZE = args.batch_size
+
+    body = _body(args.items)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        run_migrations(db_path)
+        elapsed, statuses = asyncio.run(_run(db_path, body))
+
+    print(json.dumps({"items": args.items, "batch_size": args.batch_size,
+                      "body_bytes": len(body), "seconds": round(elapsed, 3),
+                      "items_per_sec": round(args.items / elapsed, 1),
+                      "statuses": dict(statuses)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Storage size and read/write latency of content_markdown stored plain, zstd
+compressed, and zstd compressed with per-content_type trained dictionaries.
+
+    python -m benchmarks.bench_compression --rows 5000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from nomnom.db.compression import ContentCodec
+from nomnom.db.connection import ConnectionPool, run_migrations
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import SubmissionRepository
+
+_WORDS = ("the sqlite database python async query index page cache write ahead log "
+          "commit transaction thread comment reply user upvote video transcript readme "
+          "install usage license example function class return value error").split()
+
+
+def _sentence(rng: random.Random, n: int = 12) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _document(rng: random.Random, content_type: str, i: int) -> str:
+    if content_type == "reddit_thread":
+        lines = [f"# {_sentence(rng, 6)}", ""]
+        for j in range(rng.randint(10, 60)):
+            depth = "  " * rng.randint(0, 3)
+            lines.append(f"{depth}- **u/user{rng.randint(1, 500)}** ({rng.randint(1, 900)} points)"
+                         f": {_sentence(rng)}")
+        return "\n".join(lines)
+    if content_type == "youtube_video":
+        return "\n".join(f"[{j // 60:02d}:{j % 60:02d}] {_sentence(rng, 9)}"
+                         for j in range(0, rng.randint(300, 1500), 5))
+    sections = ["Installation", "Usage", "Configuration", "Contributing", "License"]
+    return f"# project-{i}\n\n" + "\n\n".join(
+        f"## {s}\n\n{_sentence(rng)} {_sentence(rng)}\n\n```bash\npip install project-{i}\n```"
+        for s in sections
+    )
+
+
+def _workload(rows: int, seed: int) -> list[Submission]:
+    rng = random.Random(seed)
+    types = ("reddit_thread", "youtube_video", "github_repo")
+    items = []
+    for i in range(rows):
+        content_type = types[i % len(types)]
+        items.append(Submission(url=f"https://example.com/{seed}/{i}", domain="example.com",
+                                content_type=content_type, title=f"Item {i}",
+                                content_markdown=_document(rng, content_type, i)))
+    return items
+
+
+def _run(mode: str, rows: int, batch: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        run_migrations(db_path)
+        pool = ConnectionPool(db_path)
+        codec = None if mode == "plain" else ContentCodec()
+        repository = SubmissionRepository(db_path, pool=pool, codec=codec)
+        # Untimed warm-up rows double as dictionary training samples
+        repository.upsert_many(_workload(1500, seed=1))
+        if mode == "zstd_dictionary":
+            repository.train_compression_dictionaries(min_samples=100)
+
+        items = _workload(rows, seed=2)
+        started = time.perf_counter()
+        for i in range(0, rows, batch):
+            repository.upsert_many(items[i:i + batch])
+        write_seconds = time.perf_counter() - started
+
+        rng = random.Random(3)
+        latencies = []
+        for _ in range(min(rows, 2000)):
+            url = rng.choice(items).url
+            started = time.perf_counter()
+            repository.get_submission(url)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+
+        with pool.reader() as conn:
+            content_bytes = conn.execute(
+                "SELECT SUM(length(CAST(content_markdown AS BLOB))) FROM submissions"
+            ).fetchone()[0]
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        pool.close()
+        return {
+            "mode": mode,
+            "content_bytes": content_bytes,
+            "db_bytes": os.path.getsize(db_path),
+            "writes_per_sec": round(rows / write_seconds, 1),
+            "read_p50_ms": round(statistics.median(latencies) * 1000, 3),
+            "read_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    results = [_run(mode, args.rows, args.batch)
+               for mode in ("plain", "zstd", "zstd_dictionary")]
+    plain = results[0]["content_bytes"]
+    for result in results:
+        result["content_ratio"] = round(plain / result["content_bytes"], 2)
+    print(json.dumps({"rows": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Ingest throughput: per-call get_connection() versus the long-lived ConnectionPool.
+
+Simulates a burst of userscript POSTs by upserting N submissions from a thread pool
+(the same shape as BackgroundTasks writing via asyncio.to_thread).
+
+    python -m benchmarks.bench_connection_pool --items 5000 --threads 8
+"""
+import argparse
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from nomnom.db.connection import ConnectionPool, get_connection, run_migrations
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import SubmissionRepository
+
+
+def _submission(i: int) -> Submission:
+    return Submission(
+        url=f"https://www.reddit.com/r/bench/comments/{i}/thread/",
+        domain="www.reddit.com",
+        content_type="reddit_thread",
+        title=f"Thread {i}",
+        content_markdown="lorem ipsum dolor sit amet " * 40,
+        metadata={"type": "reddit_thread", "subreddit": "r/bench"},
+    )
+
+
+def _legacy_upsert(db_path: str, submission: Submission) -> None:
+    """The pre-pool code path: new connection + pragmas per call, never closed."""
+    with get_connection(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO submissions
+                (url, domain, title, content_markdown, content_type,
+                 metadata, enrichment_status, enrichment_error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                title = excluded.title, content_markdown = excluded.content_markdown,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (
+                submission.url, submission.domain, submission.title,
+                submission.content_markdown, submission.content_type,
+                json.dumps(submission.metadata), submission.enrichment_status, None,
+            ),
+        )
+        conn.commit()
+        conn.execute("SELECT changes()").fetchone()
+        conn.execute(
+            "SELECT (ingested_at = updated_at) FROM submissions WHERE url = ?",
+            (submission.url,),
+        ).fetchone()
+
+
+def _run(label: str, fn, items: int, threads: int) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(fn, (_submission(i) for i in range(items))))
+    elapsed = time.perf_counter() - start
+    return {"mode": label, "items": items, "seconds": round(elapsed, 3),
+            "items_per_sec": round(items / elapsed, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = str(Path(tmp) / "legacy.db")
+        run_migrations(legacy_db)
+        before = _run("get_connection", lambda s: _legacy_upsert(legacy_db, s),
+                      args.items, args.threads)
+
+        pooled_db = str(Path(tmp) / "pooled.db")
+        run_migrations(pooled_db)
+        pool = ConnectionPool(pooled_db)
+        repository = SubmissionRepository(pooled_db, pool=pool)
+        after = _run("pool", repository.upsert, args.items, args.threads)
+        pool.close()
+
+    print(json.dumps({"before": before, "after": after,
+                      "speedup": round(after["items_per_sec"] / before["items_per_sec"], 2)},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Peak RSS and throughput of a full export (gzip'd JSONL and Parquet) from a
+synthetic DB, each run in a fresh process so its peak RSS is its own. Pages
+read through mmap count toward RSS, so the default disables DB_MMAP_SIZE to
+measure the exporter itself.
+
+    python -m benchmarks.bench_export --rows 1000000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from nomnom.db.connection import ConnectionPool, run_migrations
+from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.services.export_service import export_stream
+
+
+def seed(pool: ConnectionPool, rows: int) -> None:
+    with pool.writer() as conn:
+        conn.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO submissions (url, domain, title, content_markdown, content_type, metadata)
+            SELECT 'https://example.com/seed/' || i, 'example.com', 'Seed ' || i,
+                   'seed body ' || i || ' ' || printf('%.2000c', 'x'), 'generic_article',
+                   '{"type": "generic_article"}'
+            FROM n
+            """,
+            (rows,),
+        )
+
+
+def _export(db_path: str, fmt: str, args, out: str, results) -> None:
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pool = ConnectionPool(db_path, mmap_size=args.mmap_size)
+    repository = SubmissionRepository(db_path, pool=pool)
+    started = time.perf_counter()
+    with open(out, "wb") as sink:
+        for data in export_stream(repository, fmt, chunk_size=args.chunk_size):
+            sink.write(data)
+    seconds = time.perf_counter() - started
+    pool.close()
+    results.put({
+        "format": fmt,
+        "seconds": round(seconds, 2),
+        "output_bytes": os.path.getsize(out),
+        "baseline_rss_kib": baseline,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--formats", default="jsonl,parquet")
+    parser.add_argument("--mmap-size", type=int, default=0)
+    args = parser.parse_args()
+
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        run_migrations(db_path)
+        pool = ConnectionPool(db_path)
+        seed(pool, args.rows)
+        pool.close()
+        context = multiprocessing.get_context("spawn")
+        for fmt in args.formats.split(","):
+            results = context.Queue()
+            process = context.Process(
+                target=_export,
+                args=(db_path, fmt, args, str(Path(tmp) / f"out.{fmt}"), results),
+            )
+            process.start()
+            reports.append({"rows": args.rows, **results.get()})
+            process.join()
+        db_bytes = os.path.getsize(db_path)
+
+    print(json.dumps({"db_bytes": db_bytes, "exports": reports}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
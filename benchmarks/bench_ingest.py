@@ -0,0 +1,230 @@
+"""
+Load test for POST / as the userscript drives it: throughput, p50/p99 latency and
+database growth against databases seeded with 10k/100k/1M rows, in-process over
+ASGI and over a local uvicorn server. Fetchers are stubbed, so no network is used.
+
+    python -m benchmarks.bench_ingest --sizes 10000,100000,1000000 --requests 5000
+    python -m benchmarks.bench_ingest --transport uvicorn --output results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from benchmarks.payloads import parse_mix, payloads, seed_database
+from benchmarks.stubs import stub_fetchers
+from nomnom.config import settings
+from nomnom.db.connection import ConnectionPool, run_migrations
+from nomnom.main import create_app
+
+
+def _db_bytes(db_path: str) -> dict:
+    sizes = {}
+    for name, path in (("db", db_path), ("wal", f"{db_path}-wal")):
+        sizes[name] = os.path.getsize(path) if os.path.exists(path) else 0
+    return sizes
+
+
+def _checkpoint(db_path: str) -> int:
+    """Fold the WAL into the main file so its size is comparable; returns the row count."""
+    with contextlib.closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _drive(client: httpx.AsyncClient, bodies: list[bytes], concurrency: int) -> dict:
+    """POST every body with `concurrency` requests in flight; per-request latencies."""
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    pending = iter(bodies)
+
+    async def worker() -> None:
+        for body in pending:
+            started = time.perf_counter()
+            response = await client.post(
+                "/", content=body, headers={"Content-Type": "application/json"}
+            )
+            latencies.append(time.perf_counter() - started)
+            result = response.json().get("status") if response.status_code == 200 else None
+            statuses[result or f"http_{response.status_code}"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "statuses": dict(statuses),
+    }
+
+
+async def _drain(app, timeout: float) -> float | None:
+    """
+    Seconds until the write and enrichment queues are empty after the last
+    response, or None if they did not drain in time.
+    """
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        counts = await asyncio.to_thread(app.state.repository.count_enrichment_jobs)
+        idle = not app.state.write_queue.depth
+        if idle and not counts.get("pending") and not counts.get("running"):
+            return round(time.perf_counter() - started, 3)
+        await asyncio.sleep(0.05)
+    return None
+
+
+@contextlib.asynccontextmanager
+async def _asgi_client(app, concurrency: int):
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+@contextlib.asynccontextmanager
+async def _uvicorn_client(app, concurrency: int):
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    # A thread of its own, so server and load generator run separate event loops
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await asyncio.to_thread(thread.join)
+
+
+_TRANSPORTS = {"asgi": _asgi_client, "uvicorn": _uvicorn_client}
+
+
+async def _run(transport: str, bodies: list[bytes], args) -> dict:
+    app = create_app()
+    async with _TRANSPORTS[transport](app, args.concurrency) as client:
+        result = await _drive(client, bodies, args.concurrency)
+        result["drain_seconds"] = await _drain(app, args.drain_timeout)
+    return result
+
+
+def _bench_size(rows: int, transport: str, bodies: list[bytes], args, tmp: str) -> dict:
+    db_path = str(Path(tmp) / f"bench_{rows}_{transport}.db")
+    run_migrations(db_path)
+    pool = ConnectionPool(db_path)
+    started = time.perf_counter()
+    seed_database(pool, rows)
+    pool.close()
+    seed_seconds = round(time.perf_counter() - started, 1)
+    _checkpoint(db_path)
+
+    before = _db_bytes(db_path)
+    settings.DB_PATH = db_path
+    with stub_fetchers(args.fetch_latency_ms):
+        result = asyncio.run(_run(transport, bodies, args))
+    after = _db_bytes(db_path)
+    final_rows = _checkpoint(db_path)
+    checkpointed = _db_bytes(db_path)
+
+    growth = checkpointed["db"] - before["db"]
+    return {
+        "seed_rows": rows,
+        "transport": transport,
+        "seed_seconds": seed_seconds,
+        **result,
+        "rows_after": final_rows,
+        "db_bytes_before": before["db"],
+        "db_bytes_after": checkpointed["db"],
+        "wal_bytes_peak": after["wal"],
+        "db_growth_bytes": growth,
+        "db_growth_bytes_per_row": round(growth / max(1, final_rows - rows), 1),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="comma-separated seed row counts")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--transport", choices=("asgi", "uvicorn", "both"), default="both")
+    parser.add_argument("--mix", default="reddit=4,article=4,youtube=1,github=1",
+                        help="relative weights of payload kinds")
+    parser.add_argument("--repeat-ratio", type=float, default=0.2,
+                        help="share of requests re-sending an earlier payload")
+    parser.add_argument("--fetch-latency-ms", type=float, default=0,
+                        help="simulated latency of the stubbed README/transcript fetches")
+    parser.add_argument("--drain-timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    settings.LOG_LEVEL = "WARNING"  # per-request INFO logging would dominate the profile
+    bodies = [
+        json.dumps(payload).encode()
+        for payload in payloads(args.requests, parse_mix(args.mix), args.repeat_ratio, args.seed)
+    ]
+    transports = ["asgi", "uvicorn"] if args.transport == "both" else [args.transport]
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(size) for size in args.sizes.split(",")):
+            for transport in transports:
+                runs.append(_bench_size(rows, transport, bodies, args, tmp))
+
+    report = {
+        "benchmark": "ingest",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "config": {key: getattr(args, key) for key in (
+            "requests", "concurrency", "mix", "repeat_ratio", "fetch_latency_ms", "seed",
+        )},
+        "runs": runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
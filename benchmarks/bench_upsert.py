@@ -0,0 +1,111 @@
+"""
+Upserts/sec on a large submissions table: legacy three-statement upsert versus
+the single INSERT ... ON CONFLICT ... RETURNING round-trip.
+
+    python -m benchmarks.bench_upsert --rows 1000000 --ops 20000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from nomnom.db.connection import ConnectionPool, run_migrations
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import SubmissionRepository
+
+_LEGACY_UPSERT_SQL = """
+    INSERT INTO submissions
+        (url, domain, title, content_markdown, content_type,
+         metadata, enrichment_status, enrichment_error)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(url) DO UPDATE SET
+        domain = excluded.domain, title = excluded.title,
+        content_markdown = excluded.content_markdown, content_type = excluded.content_type,
+        metadata = excluded.metadata, enrichment_status = excluded.enrichment_status,
+        enrichment_error = excluded.enrichment_error,
+        ingested_at = submissions.ingested_at, updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def seed(pool: ConnectionPool, rows: int) -> None:
+    """Bulk-load `rows` synthetic submissions with a recursive CTE."""
+    with pool.writer() as conn:
+        conn.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO submissions (url, domain, title, content_markdown, content_type, metadata)
+            SELECT 'https://example.com/seed/' || i, 'example.com', 'Seed ' || i,
+                   'seed body ' || i, 'generic_article', '{"type": "generic_article"}'
+            FROM n
+            """,
+            (rows,),
+        )
+
+
+def _workload(rows: int, ops: int, prefix: str) -> list[Submission]:
+    rng = random.Random(42)
+    items = []
+    for i in range(ops):
+        if i % 2:
+            url = f"https://example.com/seed/{rng.randint(1, rows)}"
+        else:
+            url = f"https://example.com/{prefix}/{i}"
+        items.append(Submission(url=url, domain="example.com", content_type="generic_article",
+                                title=f"Title {i}", content_markdown="body " * 50,
+                                metadata={"type": "generic_article"}))
+    return items
+
+
+def _legacy_upsert(pool: ConnectionPool, submission: Submission) -> bool:
+    with pool.writer() as conn:
+        conn.execute(_LEGACY_UPSERT_SQL, (
+            submission.url, submission.domain, submission.title, submission.content_markdown,
+            submission.content_type, json.dumps(submission.metadata),
+            submission.enrichment_status, submission.enrichment_error,
+        ))
+        conn.execute("SELECT changes()").fetchone()
+        row = conn.execute(
+            "SELECT (ingested_at = updated_at) AS is_new FROM submissions WHERE url = ?",
+            (submission.url,),
+        ).fetchone()
+        return bool(row["is_new"])
+
+
+def _time(label: str, fn, items: list[Submission]) -> dict:
+    start = time.perf_counter()
+    for submission in items:
+        fn(submission)
+    elapsed = time.perf_counter() - start
+    return {"mode": label, "ops": len(items), "seconds": round(elapsed, 3),
+            "upserts_per_sec": round(len(items) / elapsed, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        run_migrations(db_path)
+        pool = ConnectionPool(db_path)
+        started = time.perf_counter()
+        seed(pool, args.rows)
+        seed_seconds = round(time.perf_counter() - started, 1)
+        repository = SubmissionRepository(db_path, pool=pool)
+
+        legacy = _time("three_statements", lambda s: _legacy_upsert(pool, s),
+                       _workload(args.rows, args.ops, "legacy"))
+        returning = _time("returning", repository.upsert,
+                          _workload(args.rows, args.ops, "returning"))
+        pool.close()
+
+    print(json.dumps({"rows": args.rows, "seed_seconds": seed_seconds,
+                      "before": legacy, "after": returning}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
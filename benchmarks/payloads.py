@@ -0,0 +1,174 @@
+"""
+Synthetic userscript payloads and database seeding shared by the benchmarks.
+
+Payloads mirror what the userscript's adapters send for each site (see the
+.user.js at the repo root) and validate against IngestRequest.
+"""
+import random
+import string
+from collections.abc import Iterator
+
+from nomnom.db.connection import ConnectionPool
+
+CONTENT_KINDS = ("reddit", "article", "youtube", "github")
+
+_WORDS = (
+    "sqlite index latency python async queue schema worker cache batch cursor "
+    "transcript readme thread comment article feed export vacuum journal page"
+).split()
+
+_SUBREDDITS = ("python", "programming", "sqlite", "selfhosted", "homelab", "datahoarder")
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "\n\n".join(
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 120))) for _ in range(count)
+    )
+
+
+def _video_id(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_letters + string.digits + "-_", k=11))
+
+
+def reddit_payload(i: int, rng: random.Random) -> dict:
+    subreddit = rng.choice(_SUBREDDITS)
+    post_id = format(i, "x")
+    comments = [
+        {"author": f"user{rng.randint(1, 5000)}", "score": str(rng.randint(-5, 900)),
+         "body": _paragraphs(rng, 1), "depth": rng.randint(0, 4)}
+        for _ in range(rng.randint(0, 12))
+    ]
+    return {
+        "url": f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/post_{i}/",
+        "domain": "www.reddit.com",
+        "title": f"Reddit post {i}",
+        "content_markdown": _paragraphs(rng, rng.randint(1, 4)),
+        "metadata": {
+            "type": "reddit_thread",
+            "subreddit": f"r/{subreddit}",
+            "author": f"user{rng.randint(1, 5000)}",
+            "upvote_ratio": f"{rng.uniform(0.5, 1):.2f}",
+            "comment_count": len(comments),
+            "comments": comments,
+        },
+    }
+
+
+def article_payload(i: int, rng: random.Random) -> dict:
+    host = f"blog{i % 500}.example.com"
+    return {
+        "url": f"https://{host}/posts/{i}",
+        "domain": host,
+        "title": f"Article {i}",
+        "content_markdown": f"# Article {i}\n\n" + _paragraphs(rng, rng.randint(3, 15)),
+        "metadata": {"type": "generic_article"},
+    }
+
+
+def youtube_payload(i: int, rng: random.Random) -> dict:
+    video_id = _video_id(rng)
+    return {
+        "url": f"https://www.youtube.com/watch?v={video_id}&t={i}s",
+        "domain": "www.youtube.com",
+        "title": f"Video {i}",
+        "content_markdown": "Processing on server...",
+        "metadata": {
+            "type": "youtube_video",
+            "video_id": video_id,
+            "note": "Server-side processing requested",
+        },
+    }
+
+
+def github_payload(i: int, rng: random.Random) -> dict:
+    owner, repo = f"owner{i % 1000}", f"repo{i}"
+    return {
+        "url": f"https://github.com/{owner}/{repo}",
+        "domain": "github.com",
+        "title": f"GitHub - {owner}/{repo}",
+        "content_markdown": _paragraphs(rng, rng.randint(1, 5)),
+        "metadata": {"type": "github", "repo": f"/{owner}/{repo}"},
+    }
+
+
+_GENERATORS = {
+    "reddit": reddit_payload,
+    "article": article_payload,
+    "youtube": youtube_payload,
+    "github": github_payload,
+}
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """Parse "reddit=4,article=4,youtube=1,github=1" into normalised weights."""
+    weights = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in _GENERATORS:
+            raise ValueError(f"unknown payload kind {kind!r}; expected one of {CONTENT_KINDS}")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    return {kind: weight / total for kind, weight in weights.items()}
+
+
+def payloads(
+    count: int, mix: dict[str, float], repeat_ratio: float = 0.0, seed: int = 42
+) -> Iterator[dict]:
+    """
+    `count` payloads drawn from `mix`. A `repeat_ratio` share re-sends an earlier
+    payload unchanged, like revisiting a page, to exercise the unchanged path.
+    """
+    rng = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    sent: list[dict] = []
+    for i in range(count):
+        if sent and rng.random() < repeat_ratio:
+            yield rng.choice(sent)
+            continue
+        payload = _GENERATORS[rng.choices(kinds, weights)[0]](i, rng)
+        sent.append(payload)
+        yield payload
+
+
+def seed_database(pool: ConnectionPool, rows: int, chunk: int = 100_000) -> None:
+    """
+    Bulk-load `rows` submissions with a recursive CTE, cycling through the four
+    content types with metadata shaped like real payloads. Loaded in chunks so
+    no single transaction grows the WAL by the whole seed.
+    """
+    for start in range(0, rows, chunk):
+        with pool.writer() as conn:
+            conn.execute(
+                """
+                WITH RECURSIVE n(i) AS (SELECT ? UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                INSERT INTO submissions
+                    (url, domain, title, content_markdown, content_type, metadata,
+                     enrichment_status)
+                SELECT
+                    CASE i % 4
+                        WHEN 0 THEN 'https://www.reddit.com/r/seed/comments/' || i || '/post/'
+                        WHEN 1 THEN 'https://seed.example.com/posts/' || i
+                        WHEN 2 THEN 'https://www.youtube.com/watch?v=seed' || i
+                        ELSE 'https://github.com/seed/repo' || i
+                    END,
+                    CASE i % 4
+                        WHEN 0 THEN 'www.reddit.com' WHEN 1 THEN 'seed.example.com'
+                        WHEN 2 THEN 'www.youtube.com' ELSE 'github.com'
+                    END,
+                    'Seed ' || i,
+                    'seed body ' || i || ' ' || printf('%.1500c', 'x'),
+                    CASE i % 4
+                        WHEN 0 THEN 'reddit_thread' WHEN 1 THEN 'generic_article'
+                        WHEN 2 THEN 'youtube_video' ELSE 'github_repo'
+                    END,
+                    CASE i % 4
+                        WHEN 0 THEN json_object('type', 'reddit_thread', 'subreddit', 'r/seed')
+                        WHEN 1 THEN json_object('type', 'generic_article')
+                        WHEN 2 THEN json_object('type', 'youtube_video', 'video_id', 'seed' || i)
+                        ELSE json_object('owner', 'seed', 'repo', 'repo' || i)
+                    END,
+                    CASE WHEN i % 4 IN (2, 3) THEN 'complete' ELSE 'none' END
+                FROM n
+                """,
+                (start + 1, min(start + chunk, rows)),
+            )
@@ -0,0 +1,51 @@
+"""
+Offline stand-ins for the YouTube transcript and GitHub README fetchers, so the
+benchmarks exercise the enrichment pipeline without touching the network.
+"""
+import asyncio
+import contextlib
+import time
+from collections.abc import Iterator
+from unittest import mock
+
+import httpx
+
+from nomnom.services.youtube_service import TranscriptSegment
+
+_README = "# Stub README\n\n" + "Lorem ipsum dolor sit amet. " * 200
+# About an hour of four-second captions
+_TRANSCRIPT = [TranscriptSegment(i * 4.0, 4.0, "stub transcript words " * 4) for i in range(900)]
+
+
+def _github_handler(latency: float):
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        if request.headers.get("If-None-Match") == '"stub"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=_README, headers={"ETag": '"stub"'})
+
+    return handle
+
+
+@contextlib.contextmanager
+def stub_fetchers(latency_ms: float = 0) -> Iterator[None]:
+    """
+    Patch the app's shared HTTP client to answer README fetches locally and the
+    transcript fetcher to return canned captions, each after `latency_ms`.
+    """
+    latency = latency_ms / 1000
+
+    def create_client(settings) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(_github_handler(latency)))
+
+    def fetch_transcript(video_id: str) -> tuple[list[TranscriptSegment], str]:
+        if latency:
+            time.sleep(latency)  # the real fetcher is synchronous and runs in a thread
+        return _TRANSCRIPT, "en"
+
+    with (
+        mock.patch("nomnom.main.create_http_client", create_client),
+        mock.patch("nomnom.services.youtube_service.fetch_transcript", fetch_transcript),
+    ):
+        yield
@@ -0,0 +1,3 @@
+from nomnom.cli import main
+
+main()
@@ -0,0 +1,32 @@
+import base64
+import json
+import math
+
+
+def encode_cursor(*values) -> str:
+    """Opaque keyset cursor for the last row of a page."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, *types: type) -> tuple:
+    """
+    Inverse of encode_cursor for a cursor whose values have `types`, e.g.
+    (str, int) for (ingested_at, id); an int is accepted where a float is expected.
+    Raises ValueError for malformed or foreign cursors.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("invalid cursor")
+    for value, expected in zip(values, types, strict=True):
+        accepted = (int, float) if expected is float else expected
+        # bool is an int subclass; NaN and infinities never come from a real row
+        if isinstance(value, bool) or not isinstance(value, accepted):
+            raise ValueError("invalid cursor")
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError("invalid cursor")
+    return tuple(values)
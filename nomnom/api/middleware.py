@@ -0,0 +1,205 @@
+import time
+import zlib
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+from nomnom.db.compression import zstandard
+from nomnom.metrics import HTTP_REQUEST_SECONDS
+
+# Status label strings built once instead of formatting one per request
+_STATUS_LABELS = {status: str(status) for status in range(100, 600)}
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request by method, matched route
+    template and response status. Streaming responses are timed to their last byte.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route on the shared scope
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                _STATUS_LABELS.get(status) or str(status),
+            ).observe(time.perf_counter() - started)
+
+
+# Decoded bytes handed downstream per receive() call, with or without a cap
+_READ_SIZE = 65536
+
+
+class _GzipDecoder:
+    def __init__(self) -> None:
+        self._obj = zlib.decompressobj(wbits=31)
+        self._input = b""
+
+    @property
+    def finished(self) -> bool:
+        return self._obj.eof
+
+    def feed(self, data: bytes) -> None:
+        """Queue encoded input; only called once read() has drained the last."""
+        self._input = data
+
+    def read(self, size: int) -> bytes:
+        """Up to `size` decoded bytes; b"" once the fed input is used up."""
+        if self._obj.eof and self._obj.unused_data:
+            # Concatenated gzip members decode as one stream
+            self._input = self._obj.unused_data + self._input
+            self._obj = zlib.decompressobj(wbits=31)
+        if not self._input:
+            return b""
+        # zlib stops at max_length and keeps the rest, so a bomb inflates a piece
+        # at a time
+        output = self._obj.decompress(self._input, size)
+        self._input = self._obj.unconsumed_tail
+        return output
+
+
+class _ZstdDecoder:
+    # A few bytes of zstd can expand to a 128 KiB block; feeding the input in small
+    # slices bounds what one read can allocate (size plus the blocks of one slice)
+    _SLICE = 64
+
+    def __init__(self) -> None:
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+        self._input = memoryview(b"")
+
+    @property
+    def finished(self) -> bool:
+        return self._obj.eof
+
+    def feed(self, data: bytes) -> None:
+        """Queue encoded input; only called once read() has drained the last."""
+        self._input = memoryview(data)
+
+    def read(self, size: int) -> bytes:
+        """Up to about `size` decoded bytes; b"" once the fed input is used up."""
+        parts, total = [], 0
+        while total < size and self._input and not self._obj.eof:
+            part = self._obj.decompress(self._input[:self._SLICE])
+            self._input = self._input[self._SLICE:]
+            parts.append(part)
+            total += len(part)
+        return b"".join(parts)
+
+
+_DECODERS = {"gzip": _GzipDecoder}
+_ZSTD_ERRORS: tuple = ()
+if zstandard is not None:  # optional dependency, as for content compression
+    _DECODERS["zstd"] = _ZstdDecoder
+    _ZSTD_ERRORS = (zstandard.ZstdError,)
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail="Request body too large")
+
+
+class RequestBodyMiddleware:
+    """
+    Pure ASGI middleware capping request bodies at `max_bytes` (per-path
+    overrides in `path_limits`; 0 means no cap) and decoding gzip or zstd
+    `Content-Encoding` as the body streams in.
+
+    A declared Content-Length over the cap is rejected with 413 before any of the
+    body is read. Otherwise bytes are counted (after decoding) as the endpoint
+    consumes them, and the read that crosses the cap raises a 413 instead, so
+    neither a lying client nor a decompression bomb gets more than the cap into
+    memory. Decoding is bounded per read even without a cap.
+    """
+
+    def __init__(self, app, max_bytes: int, path_limits: dict[str, int] | None = None) -> None:
+        self.app = app
+        self._max_bytes = max_bytes
+        self._path_limits = path_limits or {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self._path_limits.get(scope["path"], self._max_bytes) or None
+        headers = Headers(scope=scope)
+        encoding = headers.get("content-encoding", "identity").strip().lower()
+        if encoding != "identity" and encoding not in _DECODERS:
+            response = JSONResponse(
+                {"detail": f"Unsupported Content-Encoding: {encoding}"}, status_code=415
+            )
+            await response(scope, receive, send)
+            return
+        length = headers.get("content-length")
+        if limit is not None and length is not None and length.isdigit() and int(length) > limit:
+            response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+        decoder = _DECODERS[encoding]() if encoding != "identity" else None
+        if limit is None and decoder is None:
+            await self.app(scope, receive, send)
+            return
+        if decoder is not None:
+            # Downstream sees the decoded body, so drop the headers describing the
+            # encoded one. In place: outer middleware reads the route off this scope
+            scope["headers"] = [
+                (name, value) for name, value in scope["headers"]
+                if name not in (b"content-encoding", b"content-length")
+            ]
+        received = 0
+        upstream_done = body_done = False
+
+        def count(body: bytes) -> None:
+            nonlocal received
+            received += len(body)
+            if limit is not None and received > limit:
+                raise _too_large()
+
+        async def limited_receive():
+            nonlocal upstream_done, body_done
+            if decoder is None or body_done:
+                message = await receive()
+                if decoder is None and message["type"] == "http.request":
+                    count(message.get("body", b""))
+                return message
+            # Decoded output is handed over _READ_SIZE at a time, pulling more of
+            # the encoded body only once the last piece is drained, so memory stays
+            # bounded whether or not the path has a cap
+            while True:
+                try:
+                    body = decoder.read(_READ_SIZE)
+                except (zlib.error, *_ZSTD_ERRORS) as exc:
+                    raise HTTPException(400, f"Malformed {encoding} body: {exc}") from exc
+                if body:
+                    count(body)
+                    return {"type": "http.request", "body": body, "more_body": True}
+                if upstream_done:
+                    if not decoder.finished:
+                        raise HTTPException(400, f"Truncated {encoding} body")
+                    body_done = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                message = await receive()
+                if message["type"] != "http.request":
+                    return message
+                decoder.feed(message.get("body", b""))
+                upstream_done = not message.get("more_body", False)
+
+        await self.app(scope, limited_receive, send)
@@ -1,38 +1,78 @@
 import asyncio
+import json
 import logging
+import time
+from collections.abc import AsyncIterator, Iterator
+from datetime import UTC, datetime
+from typing import Literal
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from nomnom.api.cursors import decode_cursor, encode_cursor
+from nomnom.config import settings
+from nomnom.metrics import REGISTRY, VALIDATION_SECONDS
+from nomnom.repositories.submission_repository import DEFAULT_LIST_FIELDS
+from nomnom.schemas.changes import Change, ChangesResponse
 from nomnom.schemas.ingest import IngestRequest, IngestResponse
-from nomnom.services.ingestion_service import SubmissionSkipped
-from nomnom.services.youtube_service import enrich_youtube_submission
+from nomnom.schemas.search import SearchHit, SearchResponse
+from nomnom.schemas.submission import SubmissionPage
+from nomnom.schemas.transcript import TranscriptPage
+from nomnom.services.cpu_pool import InvalidPayload
+from nomnom.services.export_service import (
+    EXPORT_EXTENSIONS,
+    EXPORT_MEDIA_TYPES,
+    ExportUnavailable,
+    export_stream,
+)
+from nomnom.services.ingestion_service import BodyReadError, SubmissionSkipped
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-async def _process_submission(
-    payload: IngestRequest, ingestion_service, repository
-) -> None:
-    """Background task: write submission to DB, then optionally enrich YouTube content."""
+async def _process_submission(payload: IngestRequest, ingestion_service) -> None:
+    """Background task: write submission to DB; the service queues any enrichment."""
     try:
         await ingestion_service.ingest(payload)
     except Exception:
         logger.exception("[ingest] background write failed | url=%s", payload.url)
-        return
 
-    content_type = payload.metadata.get("type")
-    if content_type == "youtube_video":
-        video_id = payload.metadata.get("video_id")
-        if video_id:
-            try:
-                await asyncio.to_thread(repository.create_enrichment_job, payload.url)
-            except Exception:
-                logger.exception(
-                    "[ingest] enrichment job creation failed | url=%s", payload.url
-                )
-            await enrich_youtube_submission(payload.url, video_id, repository)
+
+class _RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator reads the request body. The stock class
+    may listen for disconnects on `receive` concurrently (ASGI < 2.4), which would
+    swallow request body messages; here the generator is the only reader.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+def _sqlite_timestamp(value: datetime | None) -> str | None:
+    """Format like CURRENT_TIMESTAMP (UTC, second precision) for comparisons."""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _submission_json(submission: dict, chunks: Iterator[str]) -> Iterator[bytes]:
+    """Render a submission as JSON with content_markdown streamed in last."""
+    content = submission.pop("content_markdown")
+    head = json.dumps(submission, ensure_ascii=False)[:-1]
+    if content is None:
+        yield f'{head}, "content_markdown": null}}'.encode()
+        return
+    yield f'{head}, "content_markdown": "'.encode()
+    for chunk in chunks:
+        yield json.dumps(chunk, ensure_ascii=False)[1:-1].encode()
+    yield b'"}'
 
 
 @router.get("/health")
@@ -40,14 +80,52 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
-@router.post("/", response_model=IngestResponse)
-async def ingest(
-    payload: IngestRequest,
-    request: Request,
-    background_tasks: BackgroundTasks,
-) -> IngestResponse:
+@router.get("/enrichment/stats")
+async def enrichment_stats(request: Request) -> dict:
+    return await asyncio.to_thread(request.app.state.enrichment_workers.stats)
+
+
+@router.get("/dedupe/stats")
+async def dedupe_stats(request: Request) -> dict:
+    return request.app.state.recent_submissions.stats()
+
+
+@router.get("/maintenance/stats")
+async def maintenance_stats(request: Request) -> dict:
+    return await asyncio.to_thread(request.app.state.maintenance.stats)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    # Rendering calls gauge callbacks, some of which query the database
+    body = await asyncio.to_thread(REGISTRY.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@router.post(
+    "/",
+    response_model=IngestResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": IngestRequest.model_json_schema()}},
+        }
+    },
+)
+async def ingest(request: Request, background_tasks: BackgroundTasks) -> IngestResponse:
+    # Validated here rather than by a body parameter so the stage can be timed and
+    # large bodies can be parsed in a worker process
     ingestion_service = request.app.state.ingestion_service
-    repository = request.app.state.repository
+    body = await request.body()
+    started = time.perf_counter()
+    try:
+        payload = await ingestion_service.validate(body)
+    except InvalidPayload as exc:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors]
+        ) from exc
+    finally:
+        VALIDATION_SECONDS.observe(time.perf_counter() - started)
 
     try:
         ingestion_service.check_submission(payload)
@@ -56,7 +134,204 @@ async def ingest(
         return IngestResponse(status="skipped", message="Filtered: Reddit non-post URL")
 
     if payload.domain == "github.com":
+        # Placeholder insert only; the README is fetched by an enrichment job
         return await ingestion_service.ingest(payload)
 
-    background_tasks.add_task(_process_submission, payload, ingestion_service, repository)
+    background_tasks.add_task(_process_submission, payload, ingestion_service)
     return IngestResponse(status="queued", message="Queued")
+
+
+async def _body_chunks(request: Request) -> AsyncIterator[bytes]:
+    """
+    The request body stream. The 200 is already sent by the time a size cap or
+    decoding error surfaces here, so it is reraised for the body to report.
+    """
+    try:
+        async for chunk in request.stream():
+            yield chunk
+    except StarletteHTTPException as exc:  # raised by RequestBodyMiddleware
+        raise BodyReadError(exc.detail) from exc
+
+
+@router.post("/bulk")
+async def bulk_ingest(request: Request) -> StreamingResponse:
+    """Ingest an NDJSON body of IngestRequest objects; streams one NDJSON result per line."""
+    ingestion_service = request.app.state.ingestion_service
+    return _RequestStreamingResponse(
+        ingestion_service.ingest_ndjson(
+            _body_chunks(request),
+            settings.BULK_BATCH_SIZE,
+            max_line_bytes=settings.MAX_REQUEST_BODY_BYTES or None,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/submissions", response_model=SubmissionPage)
+async def list_submissions(
+    request: Request,
+    fields: str | None = Query(None, description="Comma-separated fields to return"),
+    domain: str | None = None,
+    content_type: str | None = Query(None, alias="type"),
+    enrichment_status: str | None = None,
+    subreddit: str | None = Query(None, description='e.g. "python" or "r/python"'),
+    channel: str | None = Query(None, description="YouTube channel"),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    order: Literal["desc", "asc"] = "desc",
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+) -> SubmissionPage:
+    repository = request.app.state.repository
+    selected = (
+        tuple(f.strip() for f in fields.split(",") if f.strip()) if fields
+        else DEFAULT_LIST_FIELDS
+    )
+    try:
+        after = decode_cursor(cursor, str, int) if cursor else None
+        rows = await asyncio.to_thread(
+            repository.list_submissions,
+            selected,
+            domain=domain,
+            content_type=content_type,
+            enrichment_status=enrichment_status,
+            subreddit=subreddit,
+            channel=channel,
+            since=_sqlite_timestamp(since),
+            until=_sqlite_timestamp(until),
+            limit=limit + 1,
+            after=after,
+            descending=order == "desc",
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["ingested_at"], rows[-1]["id"])
+    return SubmissionPage(results=rows, next_cursor=next_cursor)
+
+
+@router.get("/submissions/{submission_id}")
+async def get_submission(submission_id: int, request: Request) -> StreamingResponse:
+    """One submission with its full content, streamed so large bodies stay out of memory."""
+    chunks = request.app.state.repository.iter_submission(submission_id)
+    submission = await asyncio.to_thread(next, chunks, None)
+    if submission is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    return StreamingResponse(
+        _submission_json(submission, chunks), media_type="application/json"
+    )
+
+
+@router.get("/submissions/{submission_id}/transcript", response_model=TranscriptPage)
+async def transcript_segments(
+    submission_id: int,
+    request: Request,
+    start: float | None = Query(None, ge=0, description="Seconds; segments ending after this"),
+    end: float | None = Query(None, ge=0, description="Seconds; segments starting before this"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+) -> TranscriptPage:
+    """A page of a YouTube submission's timed transcript segments, optionally a time range."""
+    repository = request.app.state.repository
+    try:
+        after = decode_cursor(cursor, float, int) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    rows = await asyncio.to_thread(
+        repository.transcript_segments, submission_id, start, end, limit + 1, after
+    )
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["start"], rows[-1]["id"])
+    return TranscriptPage(segments=rows, next_cursor=next_cursor)
+
+
+@router.get("/changes", response_model=ChangesResponse)
+async def changes(
+    request: Request,
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=60, description="Long-poll up to this many seconds"),
+) -> ChangesResponse:
+    rows = await request.app.state.change_feed.changes(after, limit, wait)
+    return ChangesResponse(
+        changes=[Change(**row) for row in rows],
+        next_after=rows[-1]["seq"] if rows else after,
+    )
+
+
+@router.get("/changes/stream")
+async def changes_stream(
+    request: Request,
+    after: int | None = Query(None, ge=0),
+    last_event_id: int | None = Header(None),
+) -> StreamingResponse:
+    """Server-sent events; reconnecting EventSource clients resume via Last-Event-ID."""
+    start = after if after is not None else last_event_id or 0
+    return StreamingResponse(
+        request.app.state.change_feed.stream(start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.get("/export")
+async def export(
+    request: Request,
+    format: Literal["jsonl", "parquet"] = "jsonl",
+    domain: str | None = None,
+    content_type: str | None = Query(None, alias="type"),
+    enrichment_status: str | None = None,
+    since: datetime | None = Query(None, description="Only rows updated at or after this"),
+) -> StreamingResponse:
+    """Download matching submissions as gzip'd JSONL or Parquet, streamed chunk by chunk."""
+    try:
+        body = export_stream(
+            request.app.state.repository,
+            format,
+            domain=domain,
+            content_type=content_type,
+            enrichment_status=enrichment_status,
+            updated_since=_sqlite_timestamp(since),
+            chunk_size=settings.EXPORT_CHUNK_SIZE,
+        )
+    except ExportUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    filename = f"nomnom-export.{EXPORT_EXTENSIONS[format]}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    content_type: str | None = Query(None, alias="type"),
+    domain: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+) -> SearchResponse:
+    repository = request.app.state.repository
+    try:
+        after = decode_cursor(cursor, float, int) if cursor else None
+        rows = await asyncio.to_thread(
+            repository.search, q, content_type, domain, limit + 1, after
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["id"])
+    return SearchResponse(results=[SearchHit(**row) for row in rows], next_cursor=next_cursor)
@@ -0,0 +1,160 @@
+"""
+Maintenance commands, run against the database configured by DB_PATH:
+
+    python -m nomnom compress [--train] [--batch-size N]
+    python -m nomnom dedupe [--batch-size N] [--pause-ms MS]
+    python -m nomnom export [--format jsonl|parquet] [--output PATH] [--since TIME] ...
+"""
+import argparse
+import logging
+import sys
+import time
+from datetime import UTC, datetime
+
+from nomnom.config import settings
+from nomnom.db.compression import ContentCodec
+from nomnom.db.connection import ConnectionPool, run_migrations
+from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.services.export_service import EXPORT_EXTENSIONS, EXPORT_FORMATS, export_stream
+from nomnom.services.url_canonicalizer import UrlCanonicalizer
+
+logger = logging.getLogger(__name__)
+
+
+def _compress(args: argparse.Namespace) -> None:
+    codec = ContentCodec(settings.CONTENT_COMPRESSION_LEVEL, settings.CONTENT_COMPRESSION_MIN_BYTES)
+    pool = ConnectionPool.from_settings(settings)
+    repository = SubmissionRepository(settings.DB_PATH, pool=pool, codec=codec)
+    try:
+        if args.train:
+            trained = repository.train_compression_dictionaries(
+                dict_size=args.dict_size, max_samples=args.samples
+            )
+            for content_type, dict_id in trained.items():
+                logger.info("[compress] trained dictionary %d for %s", dict_id, content_type)
+        after_id, rows, before, after = 0, 0, 0, 0
+        started = time.perf_counter()
+        while (result := repository.compress_batch(after_id, args.batch_size)) is not None:
+            after_id, compressed, batch_before, batch_after = result
+            rows += compressed
+            before += batch_before
+            after += batch_after
+            logger.info("[compress] up to id=%d | rows=%d", after_id, rows)
+            if args.pause_ms:
+                # Leave the writer free for the running receiver between batches
+                time.sleep(args.pause_ms / 1000)
+        logger.info(
+            "[compress] done | rows=%d | %d -> %d bytes (%.1fx) | took=%.1fs",
+            rows, before, after, before / after if after else 1.0,
+            time.perf_counter() - started,
+        )
+    finally:
+        pool.close()
+
+
+def _dedupe(args: argparse.Namespace) -> None:
+    canonicalizer = UrlCanonicalizer.from_settings(settings)
+    pool = ConnectionPool.from_settings(settings)
+    repository = SubmissionRepository(settings.DB_PATH, pool=pool)
+    try:
+        after_id, renamed, merged = 0, 0, 0
+        started = time.perf_counter()
+        while (
+            result := repository.merge_duplicate_urls(
+                after_id, args.batch_size, canonicalizer.canonicalize
+            )
+        ) is not None:
+            after_id, batch_renamed, batch_merged = result
+            renamed += batch_renamed
+            merged += batch_merged
+            logger.info("[dedupe] up to id=%d | renamed=%d | merged=%d", after_id, renamed, merged)
+            if args.pause_ms:
+                time.sleep(args.pause_ms / 1000)
+        logger.info(
+            "[dedupe] done | renamed=%d | merged=%d | took=%.1fs",
+            renamed, merged, time.perf_counter() - started,
+        )
+    finally:
+        pool.close()
+
+
+def _since(value: str) -> str:
+    """Accept an ISO date/time and format it like CURRENT_TIMESTAMP (UTC)."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(UTC)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _export(args: argparse.Namespace) -> None:
+    # Rows updated while the export runs may or may not be included; starting the
+    # next run from here (the start time) picks them up either way
+    started_at = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%S")
+    pool = ConnectionPool.from_settings(settings)
+    repository = SubmissionRepository(settings.DB_PATH, pool=pool)
+    output = args.output or f"nomnom-export.{EXPORT_EXTENSIONS[args.format]}"
+    written = 0
+    try:
+        body = export_stream(
+            repository,
+            args.format,
+            domain=args.domain,
+            content_type=args.type,
+            enrichment_status=args.enrichment_status,
+            updated_since=args.since,
+            chunk_size=args.chunk_size,
+        )
+        with (sys.stdout.buffer if output == "-" else open(output, "wb")) as sink:
+            for data in body:
+                sink.write(data)
+                written += len(data)
+    finally:
+        pool.close()
+    logger.info(
+        "[export] wrote %d bytes to %s | next incremental run: --since %s",
+        written, output, started_at,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m nomnom")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compress = commands.add_parser(
+        "compress", help="zstd-compress stored content_markdown in batches"
+    )
+    compress.add_argument(
+        "--train", action="store_true", help="train new per-content_type dictionaries first"
+    )
+    compress.add_argument("--batch-size", type=int, default=500)
+    compress.add_argument("--pause-ms", type=int, default=0)
+    compress.add_argument("--dict-size", type=int, default=112_640)
+    compress.add_argument("--samples", type=int, default=2000)
+    compress.set_defaults(handler=_compress)
+
+    dedupe = commands.add_parser(
+        "dedupe", help="rewrite stored URLs to canonical form, merging duplicates, in batches"
+    )
+    dedupe.add_argument("--batch-size", type=int, default=500)
+    dedupe.add_argument("--pause-ms", type=int, default=0)
+    dedupe.set_defaults(handler=_dedupe)
+
+    export = commands.add_parser("export", help="stream submissions to gzip'd JSONL or Parquet")
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    export.add_argument("--output", help="file to write, '-' for stdout")
+    export.add_argument("--domain")
+    export.add_argument("--type", help="content_type")
+    export.add_argument("--enrichment-status")
+    export.add_argument(
+        "--since", type=_since, help="only rows updated at or after this ISO date/time"
+    )
+    export.add_argument("--chunk-size", type=int, default=settings.EXPORT_CHUNK_SIZE)
+    export.set_defaults(handler=_export)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=settings.LOG_LEVEL.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    run_migrations(settings.DB_PATH)
+    args.handler(args)
@@ -7,6 +7,73 @@ class Settings(BaseSettings):
     PORT: int = 3002
     DB_PATH: str = "./nomnom.db"
     LOG_LEVEL: str = "info"
+    # Decoded request body caps (0 = none); /bulk streams, so its cap is larger.
+    # Each /bulk line is held to MAX_REQUEST_BODY_BYTES.
+    MAX_REQUEST_BODY_BYTES: int = 33554432
+    MAX_BULK_BODY_BYTES: int = 1073741824
+
+    # SQLite connection pool: one writer plus up to DB_POOL_SIZE readers
+    DB_POOL_SIZE: int = 4
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_CACHE_SIZE: int = -16000  # negative = KiB, positive = pages
+    DB_MMAP_SIZE: int = 268435456
+    DB_BUSY_TIMEOUT_MS: int = 10000
+    DB_POOL_TIMEOUT_MS: int = 5000  # wait for a free reader before answering 503; 0 = forever
+
+    # Group commit: flush queued upserts after this many items or milliseconds
+    WRITE_BATCH_MAX_ITEMS: int = 100
+    WRITE_BATCH_MAX_DELAY_MS: int = 20
+    BULK_BATCH_SIZE: int = 1000  # items per transaction for POST /bulk
+    EXPORT_CHUNK_SIZE: int = 1000  # rows per read (and Parquet row group) for exports
+    # Payloads this large are parsed, hashed and compressed in worker processes
+    CPU_POOL_WORKERS: int = 2  # 0 keeps everything in the receiver process
+    CPU_POOL_THRESHOLD_BYTES: int = 1048576
+    URL_CANONICAL_CACHE_SIZE: int = 4096  # canonicalized URLs memoized per process
+    # Re-posts of a URL with unchanged content within the TTL skip the database
+    RECENT_URL_CACHE_SIZE: int = 10000
+    RECENT_URL_TTL_SECONDS: float = 300
+    # Bloom filter of stored URLs (0 disables); about 1.2 MB per million at 1%
+    URL_BLOOM_CAPACITY: int = 1000000
+    URL_BLOOM_ERROR_RATE: float = 0.01
+
+    # zstd compression of content_markdown (needs the optional 'zstandard' package)
+    CONTENT_COMPRESSION: bool = False
+    CONTENT_COMPRESSION_LEVEL: int = 3
+    CONTENT_COMPRESSION_MIN_BYTES: int = 512
+
+    # Background SQLite maintenance: WAL checkpoints, planner statistics and
+    # incremental vacuum of free pages while no writes are arriving
+    MAINTENANCE_ENABLED: bool = True
+    MAINTENANCE_INTERVAL_SECONDS: float = 30
+    WAL_CHECKPOINT_THRESHOLD_BYTES: int = 67108864
+    OPTIMIZE_INTERVAL_SECONDS: float = 3600
+    INCREMENTAL_VACUUM_PAGES: int = 256  # pages freed per writer-lock hold
+    MAINTENANCE_IDLE_SECONDS: float = 10  # quiet period before vacuuming
+
+    # Enrichment job runner (YouTube transcripts)
+    ENRICHMENT_WORKERS: int = 2
+    ENRICHMENT_MAX_ATTEMPTS: int = 5
+    ENRICHMENT_BACKOFF_BASE_SECONDS: float = 30
+    ENRICHMENT_BACKOFF_MAX_SECONDS: float = 3600
+    ENRICHMENT_LEASE_SECONDS: int = 600
+    ENRICHMENT_POLL_INTERVAL_SECONDS: float = 5
+    # Finished jobs are deleted this long after completion, in batches
+    ENRICHMENT_JOB_RETENTION_SECONDS: int = 604800
+    ENRICHMENT_JOB_PRUNE_BATCH_SIZE: int = 1000
+    # Fetched transcripts are reused for this long; "no transcript" results for less
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = 2592000
+    TRANSCRIPT_NEGATIVE_CACHE_TTL_SECONDS: int = 86400
+
+    # Shared outbound HTTP client (GitHub README fetches)
+    HTTP_TIMEOUT_SECONDS: float = 10
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30
+    HTTP_PER_HOST_CONCURRENCY: int = 4
+    HTTP2: bool = False  # needs the optional 'h2' package
+    GITHUB_RAW_BASE_URL: str = "https://raw.githubusercontent.com"
+    # Minimum age before a re-visited repo's README is revalidated (ETag/Last-Modified)
+    GITHUB_REVALIDATE_INTERVAL_SECONDS: int = 86400
 
 
 settings = Settings()
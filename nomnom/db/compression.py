@@ -0,0 +1,222 @@
+import itertools
+import logging
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, only needed once compression is used
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# content_encoding marker stored next to submissions.content_markdown. NULL means
+# plain TEXT; "zstd" means a zstd frame whose header carries the id of the
+# compression_dictionaries row it was compressed with (0 = no dictionary).
+ZSTD_ENCODING = "zstd"
+
+DECOMPRESS_FUNCTION = "nomnom_decompress"
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise RuntimeError("content compression requires the 'zstandard' package")
+
+
+class ContentCodec:
+    """
+    Compresses content_markdown with zstd, using the newest trained dictionary for
+    the submission's content_type when one exists. Values shorter than `min_bytes`
+    are stored as plain text: the frame overhead would outweigh the savings.
+    """
+
+    def __init__(self, level: int = 3, min_bytes: int = 512) -> None:
+        _require_zstandard()
+        self._level = level
+        self._min_bytes = min_bytes
+        self._dictionaries: dict[str, zstandard.ZstdCompressionDict] = {}
+        self._generation = 0
+        # ZstdCompressor instances are not safe for concurrent use: one set per thread
+        self._local = threading.local()
+
+    @classmethod
+    def from_settings(cls, settings) -> "ContentCodec | None":
+        if not settings.CONTENT_COMPRESSION:
+            return None
+        if zstandard is None:
+            logger.warning(
+                "CONTENT_COMPRESSION enabled but the 'zstandard' package is not installed; "
+                "storing content uncompressed"
+            )
+            return None
+        return cls(settings.CONTENT_COMPRESSION_LEVEL, settings.CONTENT_COMPRESSION_MIN_BYTES)
+
+    def __getstate__(self) -> dict:
+        # Picklable, so worker processes can compress with the same dictionaries
+        return {
+            "level": self._level,
+            "min_bytes": self._min_bytes,
+            "dictionaries": {k: d.as_bytes() for k, d in self._dictionaries.items()},
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["level"], state["min_bytes"])
+        for content_type, dictionary in state["dictionaries"].items():
+            self.add_dictionary(content_type, dictionary)
+
+    def add_dictionary(self, content_type: str, dictionary: bytes) -> None:
+        """Compress `content_type` with this dictionary from now on."""
+        self._dictionaries[content_type] = zstandard.ZstdCompressionDict(dictionary)
+        self._generation += 1
+
+    def _compressor(self, content_type: str):
+        cache = getattr(self._local, "compressors", None)
+        if cache is None or self._local.generation != self._generation:
+            cache = self._local.compressors = {}
+            self._local.generation = self._generation
+        compressor = cache.get(content_type)
+        if compressor is None:
+            compressor = cache[content_type] = zstandard.ZstdCompressor(
+                level=self._level, dict_data=self._dictionaries.get(content_type)
+            )
+        return compressor
+
+    def encode(self, content_type: str, text: str | None) -> tuple[str | bytes | None, str | None]:
+        """Return the value to store in content_markdown and its content_encoding."""
+        if text is None:
+            return None, None
+        raw = text.encode("utf-8")
+        if len(raw) < self._min_bytes:
+            return text, None
+        return self._compressor(content_type).compress(raw), ZSTD_ENCODING
+
+    @staticmethod
+    def train(samples: list[bytes], dict_id: int, dict_size: int) -> bytes:
+        """Train a dictionary from sample documents. Raises ValueError if they are too few."""
+        _require_zstandard()
+        try:
+            trained = zstandard.train_dictionary(dict_size, samples, dict_id=dict_id)
+        except zstandard.ZstdError as exc:
+            raise ValueError(f"cannot train dictionary: {exc}") from exc
+        return trained.as_bytes()
+
+
+def _fts_schema(content: str) -> list[str]:
+    """The FTS source view and sync triggers, reading content through `content`."""
+    new, old = content.format(row="new"), content.format(row="old")
+    return [
+        "DROP TRIGGER IF EXISTS submissions_fts_ai",
+        "DROP TRIGGER IF EXISTS submissions_fts_ad",
+        "DROP TRIGGER IF EXISTS submissions_fts_au",
+        "DROP VIEW IF EXISTS submissions_fts_source",
+        f"""CREATE VIEW submissions_fts_source AS
+            SELECT id, title, {content.format(row="submissions")} AS content_markdown
+            FROM submissions""",
+        f"""CREATE TRIGGER submissions_fts_ai AFTER INSERT ON submissions BEGIN
+            INSERT INTO submissions_fts (rowid, title, content_markdown)
+            VALUES (new.id, new.title, {new});
+        END""",
+        f"""CREATE TRIGGER submissions_fts_ad AFTER DELETE ON submissions BEGIN
+            INSERT INTO submissions_fts (submissions_fts, rowid, title, content_markdown)
+            VALUES ('delete', old.id, old.title, {old});
+        END""",
+        f"""CREATE TRIGGER submissions_fts_au
+        AFTER UPDATE OF title, content_markdown ON submissions
+        WHEN old.title IS NOT new.title OR old.content_hash IS NOT new.content_hash BEGIN
+            INSERT INTO submissions_fts (submissions_fts, rowid, title, content_markdown)
+            VALUES ('delete', old.id, old.title, {old});
+            INSERT INTO submissions_fts (rowid, title, content_markdown)
+            VALUES (new.id, new.title, {new});
+        END""",
+    ]
+
+
+def install_fts_triggers(conn: sqlite3.Connection, compression: bool) -> bool:
+    """
+    Make the FTS view and triggers decompress content only while they must: with
+    compression enabled or compressed rows stored. Otherwise they read the column
+    directly, so clients without nomnom_decompress() can write submissions and
+    read the view. Call inside a write transaction. Returns whether they decompress.
+    """
+    decompress = compression or conn.execute(
+        "SELECT EXISTS (SELECT 1 FROM submissions WHERE content_encoding IS NOT NULL)"
+    ).fetchone()[0]
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'submissions_fts_ai'"
+    ).fetchone()
+    installed = row is not None and DECOMPRESS_FUNCTION in row[0]
+    if bool(decompress) != installed:
+        content = (
+            f"{DECOMPRESS_FUNCTION}({{row}}.content_markdown, {{row}}.content_encoding)"
+            if decompress else "{row}.content_markdown"
+        )
+        for statement in _fts_schema(content):
+            conn.execute(statement)
+        logger.info("[compression] FTS triggers %s", "decompress" if decompress else "plain")
+    return bool(decompress)
+
+
+def read_dictionary(conn: sqlite3.Connection, dict_id: int) -> bytes:
+    """A stored zstd dictionary by id. Raises ValueError if it is missing."""
+    row = conn.execute(
+        "SELECT dictionary FROM compression_dictionaries WHERE id = ?", (dict_id,)
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"missing compression dictionary {dict_id}")
+    return row[0]
+
+
+def _decompressor(dictionary: bytes | None):
+    dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+    return zstandard.ZstdDecompressor(dict_data=dict_data)
+
+
+def _load_decompressor(conn: sqlite3.Connection, dict_id: int):
+    return _decompressor(read_dictionary(conn, dict_id) if dict_id else None)
+
+
+def _check_encoding(encoding: str) -> None:
+    if encoding != ZSTD_ENCODING:
+        raise ValueError(f"unknown content_encoding: {encoding!r}")
+    _require_zstandard()
+
+
+def make_decompress_function(conn: sqlite3.Connection):
+    """
+    Build the nomnom_decompress(content_markdown, content_encoding) SQL function for
+    one connection. Dictionaries are immutable once stored, so each is read from
+    the connection at most once.
+    """
+    decompressors: dict = {}
+
+    def decompress(value, encoding: str | None) -> str | None:
+        if encoding is None or value is None:
+            return value
+        _check_encoding(encoding)
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            decompressor = decompressors[dict_id] = _load_decompressor(conn, dict_id)
+        return decompressor.decompress(value).decode("utf-8")
+
+    return decompress
+
+
+def iter_decompressed(
+    chunks: Iterator[bytes], encoding: str, load_dictionary: Callable[[int], bytes]
+) -> Iterator[bytes]:
+    """
+    Decompress a stored frame read in pieces, without holding it all in memory.
+    `load_dictionary` returns the stored dictionary for a non-zero dictionary id.
+    """
+    _check_encoding(encoding)
+    first = next(chunks, b"")
+    if not first:
+        return
+    dict_id = zstandard.get_frame_parameters(first).dict_id
+    decompressor = _decompressor(load_dictionary(dict_id) if dict_id else None).decompressobj()
+    for chunk in itertools.chain((first,), chunks):
+        output = decompressor.decompress(chunk)
+        if output:
+            yield output
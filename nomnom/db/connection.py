@@ -1,11 +1,21 @@
 import logging
+import queue
 import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
+from nomnom.db.functions import register_functions
+from nomnom.metrics import SQLITE_LOCK_WAIT_SECONDS
+
 logger = logging.getLogger(__name__)
 
 _MIGRATIONS_DIR = Path(__file__).parent / "migrations"
 
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
 
 def get_connection(db_path: str) -> sqlite3.Connection:
     """Open a SQLite connection with WAL mode and row factory enabled."""
@@ -14,9 +24,181 @@ def get_connection(db_path: str) -> sqlite3.Connection:
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
+    register_functions(conn)
     return conn
 
 
+class PoolTimeout(Exception):
+    """No reader connection became free within the pool's acquire timeout."""
+
+
+class ConnectionPool:
+    """
+    Long-lived SQLite connections: one writer plus a bounded pool of readers.
+
+    SQLite allows a single writer at a time, so writes are serialised on one
+    connection behind a lock instead of contending on the file lock. Readers are
+    opened lazily up to `size` and reused; WAL lets them run alongside the writer.
+    Pragmas are applied once per connection rather than once per query.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 4,
+        synchronous: str = "NORMAL",
+        cache_size: int = -16000,
+        mmap_size: int = 268435456,
+        busy_timeout_ms: int = 10000,
+        acquire_timeout_ms: int = 5000,
+    ) -> None:
+        synchronous = synchronous.upper()
+        if synchronous not in _SYNCHRONOUS_MODES:
+            raise ValueError(f"invalid synchronous mode: {synchronous!r}")
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self._db_path = db_path
+        self._size = size
+        self._pragmas = (
+            f"PRAGMA busy_timeout={int(busy_timeout_ms)}",
+            f"PRAGMA synchronous={synchronous}",
+            f"PRAGMA cache_size={int(cache_size)}",
+            f"PRAGMA mmap_size={int(mmap_size)}",
+            "PRAGMA foreign_keys=ON",
+        )
+        self._busy_timeout = busy_timeout_ms / 1000
+        # None waits for a free reader indefinitely
+        self._acquire_timeout = acquire_timeout_ms / 1000 if acquire_timeout_ms > 0 else None
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer_lock = threading.Lock()
+        self._commit_listeners: list[Callable[[], None]] = []
+
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened = 0
+        self._open_lock = threading.Lock()
+        self._readers: list[sqlite3.Connection] = []
+        self._closed = False
+
+    @classmethod
+    def from_settings(cls, settings) -> "ConnectionPool":
+        return cls(
+            settings.DB_PATH,
+            size=settings.DB_POOL_SIZE,
+            synchronous=settings.DB_SYNCHRONOUS,
+            cache_size=settings.DB_CACHE_SIZE,
+            mmap_size=settings.DB_MMAP_SIZE,
+            busy_timeout_ms=settings.DB_BUSY_TIMEOUT_MS,
+            acquire_timeout_ms=settings.DB_POOL_TIMEOUT_MS,
+        )
+
+    @property
+    def db_path(self) -> str:
+        return self._db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=self._busy_timeout,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self._pragmas:
+            conn.execute(pragma)
+        register_functions(conn)
+        return conn
+
+    def add_commit_listener(self, callback: Callable[[], None]) -> None:
+        """Call `callback` (on the committing thread) after every writer commit."""
+        self._commit_listeners.append(callback)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Hold the writer connection inside one transaction; commits on success."""
+        started = time.perf_counter()
+        with self._writer_lock:
+            if self._closed:
+                raise RuntimeError("connection pool is closed")
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            # Waiting for the in-process lock plus SQLite's own write lock
+            SQLITE_LOCK_WAIT_SECONDS.observe(time.perf_counter() - started)
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                # Also reached when COMMIT itself fails (SQLITE_BUSY, I/O error): the
+                # shared connection must not be left inside the transaction. SQLite
+                # may already have rolled back on its own.
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        for callback in self._commit_listeners:
+            callback()
+
+    @contextmanager
+    def maintenance(self) -> Iterator[sqlite3.Connection]:
+        """
+        Hold the writer connection outside any transaction, for statements that
+        cannot run inside one (checkpoints, incremental vacuum, optimize).
+        """
+        with self._writer_lock:
+            if self._closed:
+                raise RuntimeError("connection pool is closed")
+            yield self._writer
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a read-only connection, opening a new one if the pool is not full.
+
+        Raises PoolTimeout if every reader stays busy for the acquire timeout.
+        """
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._idle.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            if self._opened < self._size:
+                conn = self._connect()
+                conn.execute("PRAGMA query_only=ON")
+                self._opened += 1
+                self._readers.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self._acquire_timeout)
+        except queue.Empty:
+            raise PoolTimeout(
+                f"no reader connection free after {self._acquire_timeout}s"
+            ) from None
+
+    def close(self) -> None:
+        """Close every connection owned by the pool. Idempotent."""
+        if self._closed:
+            return
+        self._closed = True
+        with self._writer_lock:
+            self._writer.close()
+        for conn in self._readers:
+            conn.close()
+        self._readers.clear()
+        logger.info("Connection pool closed | db=%s", self._db_path)
+
+
 def run_migrations(db_path: str) -> None:
     """Apply any unapplied SQL migration files from the migrations directory."""
     conn = get_connection(db_path)
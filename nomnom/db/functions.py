@@ -0,0 +1,28 @@
+import hashlib
+import sqlite3
+
+from nomnom.db.compression import DECOMPRESS_FUNCTION, make_decompress_function
+
+# Application-defined SQL functions registered on every connection, so migrations
+# and SQL statements compute exactly what the repository computes in Python.
+
+CONTENT_HASH_FUNCTION = "nomnom_content_hash"
+
+
+def content_hash(title: str | None, content_markdown: str | None, metadata_json: str | None) -> str:
+    """blake2b digest of the fields a re-ingest can change. None and "" hash differently."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (title, content_markdown, metadata_json):
+        if part is None:
+            digest.update(b"\x00")
+            continue
+        encoded = part.encode("utf-8")
+        digest.update(b"\x01" + len(encoded).to_bytes(8, "big") + encoded)
+    return digest.hexdigest()
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    conn.create_function(CONTENT_HASH_FUNCTION, 3, content_hash, deterministic=True)
+    conn.create_function(
+        DECOMPRESS_FUNCTION, 2, make_decompress_function(conn), deterministic=True
+    )
@@ -0,0 +1,65 @@
+import os
+
+from nomnom.db.connection import ConnectionPool
+
+# Housekeeping statements run on the writer connection outside a transaction.
+# Each call holds the writer lock only for its own statement(s).
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def wal_bytes(pool: ConnectionPool) -> int:
+    return _file_size(f"{pool.db_path}-wal")
+
+
+def wal_checkpoint(pool: ConnectionPool) -> tuple[bool, int]:
+    """
+    Copy the WAL into the database and truncate it. Returns (busy, reclaimed
+    bytes); busy means a reader kept it from completing and the WAL was kept.
+    """
+    before = wal_bytes(pool)
+    with pool.maintenance() as conn:
+        busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return bool(busy), max(0, before - wal_bytes(pool))
+
+
+def optimize(pool: ConnectionPool, analysis_limit: int = 1000) -> None:
+    """
+    Refresh query planner statistics. The first run ANALYZEs everything (there are
+    no statistics yet); later runs use PRAGMA optimize, which only re-analyzes
+    tables whose statistics have drifted. `analysis_limit` samples large indexes
+    instead of scanning them.
+    """
+    with pool.maintenance() as conn:
+        conn.execute(f"PRAGMA analysis_limit={int(analysis_limit)}")
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        conn.execute("PRAGMA optimize" if has_stats else "ANALYZE").fetchall()
+
+
+def free_pages(pool: ConnectionPool) -> tuple[int, int, bool]:
+    """(freelist pages, page size, whether incremental vacuum is enabled)."""
+    with pool.reader() as conn:
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    return freelist, page_size, mode == AUTO_VACUUM_INCREMENTAL
+
+
+def incremental_vacuum(pool: ConnectionPool, pages: int) -> int:
+    """Return up to `pages` free pages to the filesystem; returns how many were freed."""
+    with pool.maintenance() as conn:
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not before:
+            return 0
+        # The pragma frees one page per result row stepped through
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
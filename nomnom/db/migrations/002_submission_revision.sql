@@ -0,0 +1,3 @@
+-- Per-row write counter. The upsert's DO UPDATE branch bumps it, so
+-- `RETURNING revision` tells inserts (0) from updates (>0) in one statement.
+ALTER TABLE submissions ADD COLUMN revision INTEGER NOT NULL DEFAULT 0;
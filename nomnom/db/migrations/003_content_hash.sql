@@ -0,0 +1,8 @@
+-- content_hash: blake2b of title + content_markdown + metadata (see nomnom/db/functions.py).
+-- A re-ingest with an unchanged hash only touches last_seen_at.
+ALTER TABLE submissions ADD COLUMN content_hash TEXT;
+ALTER TABLE submissions ADD COLUMN last_seen_at DATETIME;
+
+UPDATE submissions
+SET content_hash = nomnom_content_hash(title, content_markdown, metadata),
+    last_seen_at = updated_at;
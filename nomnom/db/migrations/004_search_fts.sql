@@ -0,0 +1,29 @@
+-- Full-text index over submissions. External-content FTS5: the index stores only
+-- tokens, rows are read back from `submissions` for snippets. Kept in sync by triggers.
+CREATE VIRTUAL TABLE IF NOT EXISTS submissions_fts USING fts5(
+    title,
+    content_markdown,
+    content = 'submissions',
+    content_rowid = 'id',
+    tokenize = 'porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS submissions_fts_ai AFTER INSERT ON submissions BEGIN
+    INSERT INTO submissions_fts (rowid, title, content_markdown)
+    VALUES (new.id, new.title, new.content_markdown);
+END;
+
+CREATE TRIGGER IF NOT EXISTS submissions_fts_ad AFTER DELETE ON submissions BEGIN
+    INSERT INTO submissions_fts (submissions_fts, rowid, title, content_markdown)
+    VALUES ('delete', old.id, old.title, old.content_markdown);
+END;
+
+CREATE TRIGGER IF NOT EXISTS submissions_fts_au
+AFTER UPDATE OF title, content_markdown ON submissions BEGIN
+    INSERT INTO submissions_fts (submissions_fts, rowid, title, content_markdown)
+    VALUES ('delete', old.id, old.title, old.content_markdown);
+    INSERT INTO submissions_fts (rowid, title, content_markdown)
+    VALUES (new.id, new.title, new.content_markdown);
+END;
+
+INSERT INTO submissions_fts (submissions_fts) VALUES ('rebuild');
@@ -0,0 +1,6 @@
+-- Durable job runner: workers claim a job by moving it to 'running' and stamping
+-- claimed_at (the lease). Transient failures go back to 'pending' with a backoff
+-- deadline in next_attempt_at.
+ALTER TABLE enrichment_jobs ADD COLUMN claimed_at DATETIME;
+ALTER TABLE enrichment_jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE enrichment_jobs ADD COLUMN next_attempt_at DATETIME;
@@ -0,0 +1,59 @@
+-- Optional zstd compression of content_markdown. content_encoding is NULL for
+-- plain TEXT and 'zstd' for a compressed BLOB; nomnom_decompress() (registered
+-- on every application connection) turns either back into text.
+ALTER TABLE submissions ADD COLUMN content_encoding TEXT;
+
+-- Trained per content_type. The row id is the zstd dictionary id written into
+-- every frame compressed with it, so rows are never updated or deleted.
+CREATE TABLE IF NOT EXISTS compression_dictionaries (
+    id           INTEGER  PRIMARY KEY,
+    content_type TEXT     NOT NULL,
+    dictionary   BLOB     NOT NULL,
+    created_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_compression_dictionaries_content_type
+    ON compression_dictionaries(content_type, id);
+
+-- The FTS index reads decompressed text through a view instead of the raw column.
+CREATE VIEW IF NOT EXISTS submissions_fts_source AS
+SELECT id, title, nomnom_decompress(content_markdown, content_encoding) AS content_markdown
+FROM submissions;
+
+DROP TRIGGER IF EXISTS submissions_fts_ai;
+DROP TRIGGER IF EXISTS submissions_fts_ad;
+DROP TRIGGER IF EXISTS submissions_fts_au;
+DROP TABLE IF EXISTS submissions_fts;
+
+CREATE VIRTUAL TABLE submissions_fts USING fts5(
+    title,
+    content_markdown,
+    content = 'submissions_fts_source',
+    content_rowid = 'id',
+    tokenize = 'porter unicode61'
+);
+
+CREATE TRIGGER submissions_fts_ai AFTER INSERT ON submissions BEGIN
+    INSERT INTO submissions_fts (rowid, title, content_markdown)
+    VALUES (new.id, new.title, nomnom_decompress(new.content_markdown, new.content_encoding));
+END;
+
+CREATE TRIGGER submissions_fts_ad AFTER DELETE ON submissions BEGIN
+    INSERT INTO submissions_fts (submissions_fts, rowid, title, content_markdown)
+    VALUES ('delete', old.id, old.title,
+            nomnom_decompress(old.content_markdown, old.content_encoding));
+END;
+
+-- Every content write also rewrites content_hash; compressing a row in place does
+-- not, so it skips the re-index.
+CREATE TRIGGER submissions_fts_au
+AFTER UPDATE OF title, content_markdown ON submissions
+WHEN old.title IS NOT new.title OR old.content_hash IS NOT new.content_hash BEGIN
+    INSERT INTO submissions_fts (submissions_fts, rowid, title, content_markdown)
+    VALUES ('delete', old.id, old.title,
+            nomnom_decompress(old.content_markdown, old.content_encoding));
+    INSERT INTO submissions_fts (rowid, title, content_markdown)
+    VALUES (new.id, new.title, nomnom_decompress(new.content_markdown, new.content_encoding));
+END;
+
+INSERT INTO submissions_fts (submissions_fts) VALUES ('rebuild');
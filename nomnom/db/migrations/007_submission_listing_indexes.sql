@@ -0,0 +1,13 @@
+-- Indexes for GET /submissions: newest-first keyset pagination on (ingested_at, id),
+-- optionally filtered by one equality column. The rowid (id) is implicitly the
+-- last key of every index, so each one is ordered by (..., ingested_at, id).
+CREATE INDEX IF NOT EXISTS idx_submissions_ingested_at ON submissions(ingested_at);
+CREATE INDEX IF NOT EXISTS idx_submissions_domain_ingested_at
+    ON submissions(domain, ingested_at);
+CREATE INDEX IF NOT EXISTS idx_submissions_enrichment_status_ingested_at
+    ON submissions(enrichment_status, ingested_at);
+
+-- Supersedes the single-column content_type index
+CREATE INDEX IF NOT EXISTS idx_submissions_content_type_ingested_at
+    ON submissions(content_type, ingested_at);
+DROP INDEX IF EXISTS idx_submissions_content_type;
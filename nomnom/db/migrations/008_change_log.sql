@@ -0,0 +1,33 @@
+-- Append-only change log for downstream sync: GET /changes?after=<seq>.
+-- AUTOINCREMENT keeps seq strictly increasing (never reused) and, with a single
+-- writer, commit order matches seq order, so a consumer never misses a change
+-- by resuming after the last seq it saw.
+CREATE TABLE IF NOT EXISTS submission_changes (
+    seq           INTEGER  PRIMARY KEY AUTOINCREMENT,
+    submission_id INTEGER  NOT NULL,
+    url           TEXT     NOT NULL,
+    op            TEXT     NOT NULL,  -- 'insert', 'update' or 'delete'
+    changed_at    DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS submission_changes_ai AFTER INSERT ON submissions BEGIN
+    INSERT INTO submission_changes (submission_id, url, op) VALUES (new.id, new.url, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS submission_changes_ad AFTER DELETE ON submissions BEGIN
+    INSERT INTO submission_changes (submission_id, url, op) VALUES (old.id, old.url, 'delete');
+END;
+
+-- Content writes bump revision; enrichment failures only change the status.
+-- last_seen_at touches and in-place compression are not changes.
+CREATE TRIGGER IF NOT EXISTS submission_changes_au AFTER UPDATE ON submissions
+WHEN old.revision IS NOT new.revision
+  OR old.enrichment_status IS NOT new.enrichment_status
+  OR old.enrichment_error IS NOT new.enrichment_error
+  OR old.url IS NOT new.url BEGIN
+    INSERT INTO submission_changes (submission_id, url, op) VALUES (new.id, new.url, 'update');
+END;
+
+-- Existing rows enter the log as inserts, so syncing from after=0 sees everything
+INSERT INTO submission_changes (submission_id, url, op)
+SELECT id, url, 'insert' FROM submissions ORDER BY id;
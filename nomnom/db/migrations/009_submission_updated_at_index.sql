@@ -0,0 +1,2 @@
+-- Incremental exports select rows changed since a timestamp
+CREATE INDEX IF NOT EXISTS idx_submissions_updated_at ON submissions(updated_at);
@@ -0,0 +1,6 @@
+-- Let the maintenance task return free pages to the filesystem a few at a time
+-- with PRAGMA incremental_vacuum. Switching an existing database out of
+-- auto_vacuum=NONE only takes effect after a VACUUM, which rewrites the whole
+-- file once; on a large database this migration takes correspondingly long.
+PRAGMA auto_vacuum = INCREMENTAL;
+VACUUM;
@@ -0,0 +1,38 @@
+-- Commonly queried metadata keys as VIRTUAL generated columns: computed from the
+-- metadata JSON on read (no extra storage) but indexable, so lookups and filters
+-- on them no longer run json_extract over every row. Each is NULL outside its
+-- content_type, and the partial indexes below leave those rows out.
+ALTER TABLE submissions ADD COLUMN video_id TEXT GENERATED ALWAYS AS (
+    CASE WHEN content_type = 'youtube_video' AND json_valid(metadata)
+         THEN json_extract(metadata, '$.video_id') END
+) VIRTUAL;
+
+ALTER TABLE submissions ADD COLUMN channel TEXT GENERATED ALWAYS AS (
+    CASE WHEN content_type = 'youtube_video' AND json_valid(metadata)
+         THEN json_extract(metadata, '$.channel') END
+) VIRTUAL;
+
+-- "owner/repo", lowercased: GitHub names are case-insensitive
+ALTER TABLE submissions ADD COLUMN github_repo TEXT GENERATED ALWAYS AS (
+    CASE WHEN content_type = 'github_repo' AND json_valid(metadata)
+         THEN lower(json_extract(metadata, '$.owner') || '/' || json_extract(metadata, '$.repo'))
+    END
+) VIRTUAL;
+
+-- The userscript sends "r/Name"; stored bare and lowercased ('/' cannot occur in a name)
+ALTER TABLE submissions ADD COLUMN subreddit TEXT GENERATED ALWAYS AS (
+    CASE WHEN content_type = 'reddit_thread' AND json_valid(metadata)
+         THEN lower(replace(json_extract(metadata, '$.subreddit'), 'r/', '')) END
+) VIRTUAL;
+
+-- Point lookups by canonical id
+CREATE INDEX IF NOT EXISTS idx_submissions_video_id
+    ON submissions(video_id) WHERE video_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_submissions_github_repo
+    ON submissions(github_repo) WHERE github_repo IS NOT NULL;
+
+-- GET /submissions filters, ordered like the other (x, ingested_at) listing indexes
+CREATE INDEX IF NOT EXISTS idx_submissions_subreddit_ingested_at
+    ON submissions(subreddit, ingested_at) WHERE subreddit IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_submissions_channel_ingested_at
+    ON submissions(channel, ingested_at) WHERE channel IS NOT NULL;
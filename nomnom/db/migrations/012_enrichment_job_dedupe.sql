@@ -0,0 +1,24 @@
+-- At most one active (pending or running) job per submission URL, so revisiting
+-- a page coalesces onto the queued job instead of adding another. Keep the oldest
+-- of any duplicates that piled up before this constraint existed.
+DELETE FROM enrichment_jobs
+WHERE status IN ('pending', 'running')
+  AND id NOT IN (
+      SELECT MIN(id) FROM enrichment_jobs
+      WHERE status IN ('pending', 'running')
+      GROUP BY submission_url
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_enrichment_jobs_active_url
+    ON enrichment_jobs(submission_url) WHERE status IN ('pending', 'running');
+
+-- Lookups by URL in any status, and the foreign key check when a submission row
+-- is deleted or its url changes
+CREATE INDEX IF NOT EXISTS idx_enrichment_jobs_url_status
+    ON enrichment_jobs(submission_url, status);
+
+-- Supersedes the single-column status index; also serves retention pruning of
+-- finished jobs by completed_at
+CREATE INDEX IF NOT EXISTS idx_enrichment_jobs_status_completed_at
+    ON enrichment_jobs(status, completed_at);
+DROP INDEX IF EXISTS idx_enrichment_jobs_status;
@@ -0,0 +1,24 @@
+-- Fetched YouTube transcripts keyed by video, so revisits and re-ingests reuse
+-- them instead of calling the transcript API again. A row with a NULL transcript
+-- caches a permanent failure ("no transcript available"); language is '' there.
+-- Freshness is judged against fetched_at at lookup time, so changing the TTL
+-- settings applies to rows already cached.
+CREATE TABLE IF NOT EXISTS transcript_cache (
+    video_id   TEXT     NOT NULL,
+    language   TEXT     NOT NULL DEFAULT '',
+    transcript TEXT,
+    error      TEXT,
+    fetched_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (video_id, language)
+) WITHOUT ROWID;
+
+-- Seed from videos already enriched, stripping the rendered "## Transcript" heading
+INSERT OR IGNORE INTO transcript_cache (video_id, transcript, fetched_at)
+SELECT video_id, substr(content, length('## Transcript') + 3), updated_at
+FROM (
+    SELECT video_id, updated_at,
+           nomnom_decompress(content_markdown, content_encoding) AS content
+    FROM submissions
+    WHERE video_id IS NOT NULL AND enrichment_status = 'complete'
+)
+WHERE content LIKE '## Transcript%';
@@ -0,0 +1,72 @@
+-- Transcripts as timed segments instead of one joined string. Each row is a run
+-- of consecutive captions (start and duration in seconds); a video's segments are
+-- written together, in order, when its transcript is fetched. Enriched YouTube
+-- submissions then keep content_markdown NULL and their "## Transcript" markdown
+-- is rendered from the segments when read.
+CREATE TABLE IF NOT EXISTS transcript_segments (
+    id       INTEGER PRIMARY KEY,
+    video_id TEXT    NOT NULL,
+    start    REAL    NOT NULL,
+    duration REAL    NOT NULL,
+    text     TEXT    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_transcript_segments_video_start
+    ON transcript_segments(video_id, start);
+
+-- Segment-level full-text index, so a search hit can point at a timestamp
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_segments_fts USING fts5(
+    text,
+    content = 'transcript_segments',
+    content_rowid = 'id',
+    tokenize = 'porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_ai
+AFTER INSERT ON transcript_segments BEGIN
+    INSERT INTO transcript_segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_ad
+AFTER DELETE ON transcript_segments BEGIN
+    INSERT INTO transcript_segments_fts (transcript_segments_fts, rowid, text)
+    VALUES ('delete', old.id, old.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transcript_segments_fts_au
+AFTER UPDATE OF text ON transcript_segments BEGIN
+    INSERT INTO transcript_segments_fts (transcript_segments_fts, rowid, text)
+    VALUES ('delete', old.id, old.text);
+    INSERT INTO transcript_segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+
+-- Transcripts cached before this migration carry no timing: each becomes a single
+-- segment at 0s, taken from the most recent fetch. Their submissions keep the
+-- content_markdown they were rendered into.
+INSERT INTO transcript_segments (video_id, start, duration, text)
+SELECT video_id, 0, 0, transcript
+FROM (
+    SELECT video_id, transcript, MAX(fetched_at)
+    FROM transcript_cache
+    WHERE transcript IS NOT NULL
+    GROUP BY video_id
+);
+
+-- The cache no longer holds the text, only when a video was fetched and whether
+-- that failed: a row with an error caches a permanent failure.
+CREATE TABLE transcript_cache_new (
+    video_id   TEXT     NOT NULL,
+    language   TEXT     NOT NULL DEFAULT '',
+    error      TEXT,
+    fetched_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (video_id, language)
+) WITHOUT ROWID;
+
+INSERT INTO transcript_cache_new (video_id, language, error, fetched_at)
+SELECT video_id, language,
+       CASE WHEN transcript IS NULL THEN COALESCE(error, 'no transcript available') END,
+       fetched_at
+FROM transcript_cache;
+
+DROP TABLE transcript_cache;
+ALTER TABLE transcript_cache_new RENAME TO transcript_cache;
@@ -0,0 +1,35 @@
+-- The FTS view and sync triggers from 006 call nomnom_decompress(), which only
+-- exists on application connections, so any other SQLite client failed to write
+-- submissions or read the view. They are recreated here without it; the
+-- repository swaps in the decompressing variant (nomnom.db.compression.
+-- install_fts_triggers) only while compression is enabled or compressed rows
+-- exist, which the partial index below answers without a scan.
+CREATE INDEX IF NOT EXISTS idx_submissions_compressed
+    ON submissions(id) WHERE content_encoding IS NOT NULL;
+
+DROP TRIGGER IF EXISTS submissions_fts_ai;
+DROP TRIGGER IF EXISTS submissions_fts_ad;
+DROP TRIGGER IF EXISTS submissions_fts_au;
+DROP VIEW IF EXISTS submissions_fts_source;
+
+CREATE VIEW submissions_fts_source AS
+SELECT id, title, content_markdown FROM submissions;
+
+CREATE TRIGGER submissions_fts_ai AFTER INSERT ON submissions BEGIN
+    INSERT INTO submissions_fts (rowid, title, content_markdown)
+    VALUES (new.id, new.title, new.content_markdown);
+END;
+
+CREATE TRIGGER submissions_fts_ad AFTER DELETE ON submissions BEGIN
+    INSERT INTO submissions_fts (submissions_fts, rowid, title, content_markdown)
+    VALUES ('delete', old.id, old.title, old.content_markdown);
+END;
+
+CREATE TRIGGER submissions_fts_au
+AFTER UPDATE OF title, content_markdown ON submissions
+WHEN old.title IS NOT new.title OR old.content_hash IS NOT new.content_hash BEGIN
+    INSERT INTO submissions_fts (submissions_fts, rowid, title, content_markdown)
+    VALUES ('delete', old.id, old.title, old.content_markdown);
+    INSERT INTO submissions_fts (rowid, title, content_markdown)
+    VALUES (new.id, new.title, new.content_markdown);
+END;
@@ -1,16 +1,32 @@
 import logging
+import os
 from contextlib import asynccontextmanager
+from functools import partial
 
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from nomnom.api.middleware import MetricsMiddleware, RequestBodyMiddleware
 from nomnom.api.routes import router
 from nomnom.config import settings
-from nomnom.db.connection import run_migrations
+from nomnom.db.compression import ContentCodec
+from nomnom.db.connection import ConnectionPool, PoolTimeout, run_migrations
+from nomnom.db.maintenance import free_pages
+from nomnom.metrics import DB_FILE_BYTES, DB_FREE_BYTES, QUEUE_DEPTH
 from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.services.change_feed import ChangeFeed
+from nomnom.services.cpu_pool import CpuPool
+from nomnom.services.enrichment_worker import EnrichmentWorkerPool
+from nomnom.services.github_service import GithubService
+from nomnom.services.http_client import create_http_client
 from nomnom.services.ingestion_service import IngestionService
+from nomnom.services.maintenance import MaintenanceScheduler
+from nomnom.services.recent_submissions import RecentSubmissions
+from nomnom.services.url_canonicalizer import UrlCanonicalizer
+from nomnom.services.write_queue import WriteQueue
+from nomnom.services.youtube_service import enrich_youtube_job
 
 
 def _configure_logging() -> None:
@@ -20,21 +36,95 @@ def _configure_logging() -> None:
     )
 
 
+def _register_gauges(app: FastAPI) -> None:
+    """Point the scrape-time gauges at this app's queues and database files."""
+    QUEUE_DEPTH.set_function(lambda: app.state.write_queue.depth, "write")
+    QUEUE_DEPTH.set_function(
+        lambda: app.state.repository.count_enrichment_jobs().get("pending", 0),
+        "enrichment_pending",
+    )
+    QUEUE_DEPTH.set_function(lambda: app.state.enrichment_workers.in_flight, "enrichment_running")
+    DB_FILE_BYTES.set_function(lambda: os.path.getsize(settings.DB_PATH), "db")
+    DB_FILE_BYTES.set_function(lambda: os.path.getsize(f"{settings.DB_PATH}-wal"), "wal")
+    DB_FREE_BYTES.set_function(lambda: _free_bytes(app.state.db_pool))
+
+
+def _free_bytes(pool: ConnectionPool) -> int:
+    freelist, page_size, _ = free_pages(pool)
+    return freelist * page_size
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     _configure_logging()
     logger = logging.getLogger(__name__)
     logger.info("NomNom receiver starting | db=%s | port=%s", settings.DB_PATH, settings.PORT)
     run_migrations(settings.DB_PATH)
-    app.state.repository = SubmissionRepository(settings.DB_PATH)
-    app.state.ingestion_service = IngestionService(app.state.repository)
+    app.state.db_pool = ConnectionPool.from_settings(settings)
+    codec = ContentCodec.from_settings(settings)
+    app.state.repository = SubmissionRepository(
+        settings.DB_PATH, pool=app.state.db_pool, codec=codec
+    )
+    # After the repository, which loads the codec's trained dictionaries
+    app.state.cpu_pool = CpuPool.from_settings(settings, codec=codec)
+    app.state.change_feed = ChangeFeed(app.state.repository, app.state.db_pool)
+    app.state.write_queue = WriteQueue(
+        app.state.repository,
+        max_batch=settings.WRITE_BATCH_MAX_ITEMS,
+        max_delay_ms=settings.WRITE_BATCH_MAX_DELAY_MS,
+    )
+    app.state.write_queue.start()
+    app.state.http_client = create_http_client(settings)
+    github = GithubService(app.state.http_client, raw_base_url=settings.GITHUB_RAW_BASE_URL)
+    app.state.enrichment_workers = EnrichmentWorkerPool.from_settings(
+        app.state.repository, settings
+    )
+    app.state.enrichment_workers.register("youtube_video", partial(
+        enrich_youtube_job,
+        cache_ttl_seconds=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+        negative_cache_ttl_seconds=settings.TRANSCRIPT_NEGATIVE_CACHE_TTL_SECONDS,
+    ))
+    app.state.enrichment_workers.register("github_repo", github.enrich_job)
+    app.state.recent_submissions = RecentSubmissions.from_settings(settings)
+    app.state.recent_submissions.start(app.state.repository)
+    app.state.ingestion_service = IngestionService(
+        app.state.repository,
+        write_queue=app.state.write_queue,
+        github=github,
+        enrichment_workers=app.state.enrichment_workers,
+        github_revalidate_seconds=settings.GITHUB_REVALIDATE_INTERVAL_SECONDS,
+        transcript_cache_ttl_seconds=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+        transcript_negative_cache_ttl_seconds=settings.TRANSCRIPT_NEGATIVE_CACHE_TTL_SECONDS,
+        canonicalizer=UrlCanonicalizer.from_settings(settings),
+        recent=app.state.recent_submissions,
+        cpu_pool=app.state.cpu_pool,
+    )
+    await app.state.enrichment_workers.start()
+    app.state.maintenance = MaintenanceScheduler.from_settings(
+        app.state.db_pool, settings, repository=app.state.repository
+    )
+    if settings.MAINTENANCE_ENABLED:
+        app.state.maintenance.start()
+    _register_gauges(app)
     yield
     logger.info("NomNom receiver shutting down")
+    await app.state.maintenance.stop()
+    await app.state.recent_submissions.stop()
+    await app.state.enrichment_workers.stop()
+    await app.state.write_queue.stop()
+    app.state.cpu_pool.shutdown()
+    await app.state.http_client.aclose()
+    app.state.db_pool.close()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="NomNom Receiver", version="1.0.0", lifespan=lifespan)
 
+    app.add_middleware(
+        RequestBodyMiddleware,
+        max_bytes=settings.MAX_REQUEST_BODY_BYTES,
+        path_limits={"/bulk": settings.MAX_BULK_BODY_BYTES},
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -42,8 +132,20 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Added last so it is outermost and times the whole middleware stack
+    app.add_middleware(MetricsMiddleware)
+
     app.include_router(router)
 
+    @app.exception_handler(PoolTimeout)
+    async def pool_timeout_handler(request: Request, exc: PoolTimeout) -> JSONResponse:
+        logging.getLogger(__name__).warning("Read pool exhausted | path=%s", request.url.path)
+        return JSONResponse(
+            status_code=503,
+            content={"status": "error", "message": "Database busy, retry shortly"},
+            headers={"Retry-After": "1"},
+        )
+
     @app.exception_handler(Exception)
     async def generic_exception_handler(request: Request, exc: Exception) -> JSONResponse:
         logging.getLogger(__name__).exception("Unhandled exception")
@@ -0,0 +1,230 @@
+"""
+Minimal in-process metrics rendered in the Prometheus text exposition format.
+
+Metric children are created once per label set and cached, and observing only
+bumps preallocated counters, so instrumenting a hot path allocates nothing per
+call beyond the label lookup. Gauges backed by a callback are evaluated at
+scrape time only.
+"""
+import bisect
+import math
+import threading
+from collections.abc import Callable, Iterable
+
+# Seconds; covers sub-millisecond SQLite calls up to slow upstream fetches
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(text: str, quote: bool = True) -> str:
+    """Escape backslash and newline (and, in label values, double quote) per the format."""
+    text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quote else text
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """The child for one label set, created on first use and cached."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.help, quote=False)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(
+            f"{self.name}{suffix}{labels} {_format_value(value)}"
+            for suffix, labels, value in self._samples()
+        )
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield "", _format_labels(self.labelnames, values), child.value
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield "_bucket", _format_labels(self.labelnames, values, le), cumulative
+            labels = _format_labels(self.labelnames, values)
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class Gauge(_Metric):
+    """A value read from a callback at scrape time, e.g. a queue depth or file size."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set_function(self, function: Callable[[], float], *values: str) -> None:
+        self._functions[values] = function
+
+    def _samples(self):
+        for values, function in list(self._functions.items()):
+            try:
+                value = function()
+            except Exception:
+                continue  # a failing source drops its sample rather than the scrape
+            yield "", _format_labels(self.labelnames, values), value
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "nomnom_http_request_duration_seconds", "HTTP request latency by route and status.",
+    ("method", "route", "status"),
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "nomnom_stage_duration_seconds", "Time spent per processing stage.", ("stage",),
+))
+ENRICHMENT_OUTCOMES = REGISTRY.register(Counter(
+    "nomnom_enrichment_outcomes_total", "Finished enrichment attempts by outcome and reason.",
+    ("content_type", "outcome", "reason"),
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "nomnom_queue_depth", "Items waiting in background queues.", ("queue",),
+))
+DB_FILE_BYTES = REGISTRY.register(Gauge(
+    "nomnom_db_file_bytes", "Size of the SQLite database and WAL files.", ("file",),
+))
+DB_FREE_BYTES = REGISTRY.register(Gauge(
+    "nomnom_db_free_bytes", "Bytes in free database pages not yet returned to the filesystem.",
+))
+MAINTENANCE_SECONDS = REGISTRY.register(Histogram(
+    "nomnom_maintenance_duration_seconds", "Time spent per database maintenance task.",
+    ("task",),
+))
+MAINTENANCE_RECLAIMED_BYTES = REGISTRY.register(Counter(
+    "nomnom_maintenance_reclaimed_bytes_total", "Disk space reclaimed by maintenance tasks.",
+    ("task",),
+))
+DEDUPE_LOOKUPS = REGISTRY.register(Counter(
+    "nomnom_dedupe_lookups_total", "In-memory duplicate checks before a database write.",
+    ("cache", "result"),
+))
+
+# Resolved once so instrumented call sites skip the label lookup
+VALIDATION_SECONDS = STAGE_SECONDS.labels("validation")
+CHECK_SUBMISSION_SECONDS = STAGE_SECONDS.labels("check_submission")
+UPSERT_SECONDS = STAGE_SECONDS.labels("upsert")
+SQLITE_LOCK_WAIT_SECONDS = STAGE_SECONDS.labels("sqlite_lock_wait")
+README_FETCH_SECONDS = STAGE_SECONDS.labels("readme_fetch")
+TRANSCRIPT_FETCH_SECONDS = STAGE_SECONDS.labels("transcript_fetch")
+RECENT_HITS = DEDUPE_LOOKUPS.labels("recent", "hit")
+RECENT_MISSES = DEDUPE_LOOKUPS.labels("recent", "miss")
+BLOOM_ABSENT = DEDUPE_LOOKUPS.labels("bloom", "absent")
+BLOOM_MAYBE = DEDUPE_LOOKUPS.labels("bloom", "maybe")
@@ -1,5 +1,13 @@
 from dataclasses import dataclass, field
 from datetime import datetime
+from enum import StrEnum
+from typing import Any
+
+
+class UpsertOutcome(StrEnum):
+    INSERTED = "inserted"
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
 
 
 @dataclass
@@ -14,6 +22,9 @@ class Submission:
     enrichment_error: str | None = None
     ingested_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
+    # Upsert parameters (hash, compressed content) computed ahead of the write,
+    # e.g. in a worker process for large content; None means compute at write time
+    prepared: Any = field(default=None, repr=False, compare=False)
 
 
 @dataclass
@@ -1,30 +1,137 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 
-from nomnom.models.submission import Submission
+from nomnom.models.submission import Submission, UpsertOutcome
 
 
 class AbstractSubmissionRepository(ABC):
     @abstractmethod
-    def upsert(self, submission: Submission) -> bool:
-        """Insert or update a submission. Returns True if inserted (new), False if updated."""
+    def upsert(self, submission: Submission) -> UpsertOutcome:
+        """Insert or update a submission. Unchanged content only refreshes last_seen_at."""
 
     @abstractmethod
-    def create_enrichment_job(self, url: str) -> None:
-        """Create a pending enrichment job for the given submission URL."""
+    def upsert_many(
+        self, submissions: list[Submission]
+    ) -> list[UpsertOutcome | Exception]:
+        """
+        Upsert a batch in one transaction. Returns an outcome per submission, or the
+        exception that submission raised; a failed item does not fail the batch.
+        """
 
     @abstractmethod
-    def update_enrichment_job_status(
-        self, url: str, status: str, failure_reason: str | None = None
+    def create_enrichment_job(self, url: str) -> bool:
+        """
+        Create a pending enrichment job for the given submission URL, unless one is
+        already pending or running. Returns whether a job was created.
+        """
+
+    @abstractmethod
+    def create_enrichment_jobs(self, urls: list[str]) -> None:
+        """create_enrichment_job for many URLs in one transaction."""
+
+    @abstractmethod
+    def claim_enrichment_job(self, lease_seconds: int) -> dict | None:
+        """Atomically claim the next runnable enrichment job, or return None."""
+
+    @abstractmethod
+    def finish_enrichment_job(
+        self, job_id: int, status: str, failure_reason: str | None = None
     ) -> None:
-        """Update the status of an enrichment job."""
+        """Move a claimed job to a terminal status."""
+
+    @abstractmethod
+    def retry_enrichment_job(self, job_id: int, delay_seconds: float, error: str) -> None:
+        """Release a claimed job back to pending after a backoff delay."""
+
+    @abstractmethod
+    def requeue_running_enrichment_jobs(self) -> int:
+        """Return orphaned running jobs to pending. Returns how many were requeued."""
+
+    @abstractmethod
+    def prune_enrichment_jobs(self, older_than_seconds: int, batch_size: int = 1000) -> int:
+        """Delete one batch of long-finished jobs. Returns the number deleted."""
+
+    @abstractmethod
+    def count_enrichment_jobs(self) -> dict[str, int]:
+        """Return job counts keyed by status."""
+
+    @abstractmethod
+    def mark_enrichment_failed(self, url: str, error: str) -> None:
+        """Mark a submission's enrichment as failed, keeping its content."""
+
+    @abstractmethod
+    def insert_github_placeholder(self, url: str, owner: str, repo: str) -> bool:
+        """Insert a pending GitHub row plus its README job. False if the URL exists."""
+
+    @abstractmethod
+    def github_revalidation_due(self, url: str, min_age_seconds: int) -> bool | None:
+        """None if absent, else whether the row is older than min_age_seconds."""
+
+    @abstractmethod
+    def enqueue_revalidation(self, url: str) -> bool:
+        """Queue an enrichment job unless one is already active. True if queued."""
+
+    @abstractmethod
+    def update_github_readme(
+        self, url: str, readme: str, etag: str | None, last_modified: str | None
+    ) -> None:
+        """Store a fetched README together with its ETag/Last-Modified validators."""
+
+    @abstractmethod
+    def get_submission(self, url: str) -> dict | None:
+        """Fetch one submission with content_markdown as plain text, or None."""
 
     @abstractmethod
-    def exists_by_url(self, url: str) -> bool:
-        """Return True if a submission with the given URL exists."""
+    def find_by_video_id(self, video_id: str) -> dict | None:
+        """`{"id", "url"}` of the submission for a YouTube video id, or None."""
 
     @abstractmethod
-    def insert_github_repo(self, url: str, owner: str, repo: str, readme: str) -> None:
-        """Insert a GitHub repository submission."""
+    def find_by_github_repo(self, owner: str, repo: str) -> dict | None:
+        """`{"id", "url"}` of the submission for GitHub owner/repo (case-insensitive)."""
+
+    @abstractmethod
+    def list_submissions(
+        self,
+        fields: tuple[str, ...],
+        domain: str | None = None,
+        content_type: str | None = None,
+        enrichment_status: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 50,
+        after: tuple[str, int] | None = None,
+        descending: bool = True,
+        subreddit: str | None = None,
+        channel: str | None = None,
+    ) -> list[dict]:
+        """Keyset-paginated page of submissions ordered by (ingested_at, id)."""
+
+    @abstractmethod
+    def iter_submission(self, submission_id: int, chunk_size: int = 65536) -> Iterator:
+        """Yield a submission's fields, then its content_markdown in chunks."""
+
+    @abstractmethod
+    def iter_submissions(
+        self,
+        domain: str | None = None,
+        content_type: str | None = None,
+        enrichment_status: str | None = None,
+        updated_since: str | None = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[list[dict]]:
+        """Every matching submission with content, in id order, one chunk at a time."""
+
+    @abstractmethod
+    def iter_urls(self, chunk_size: int = 10000) -> Iterator[list[str]]:
+        """Every stored URL, one chunk at a time."""
+
+    @abstractmethod
+    def list_changes(self, after: int = 0, limit: int = 100) -> list[dict]:
+        """Change log entries (insert/update/delete) with seq > after, oldest first."""
+
+    @abstractmethod
+    def touch_submission(self, url: str) -> None:
+        """Bump last_seen_at without rewriting content."""
 
     @abstractmethod
     def update_submission_content(
@@ -35,3 +142,41 @@ class AbstractSubmissionRepository(ABC):
         enrichment_error: str | None = None,
     ) -> None:
         """Update a submission's content after server-side enrichment. Title is preserved."""
+
+    @abstractmethod
+    def cached_transcripts(
+        self, video_ids: list[str], max_age_seconds: int, negative_max_age_seconds: int
+    ) -> dict[str, dict]:
+        """Fresh transcript cache entries (or cached failures) keyed by video_id."""
+
+    @abstractmethod
+    def store_transcript(
+        self,
+        video_id: str,
+        segments: list[tuple[float, float, str]] | None,
+        language: str = "",
+        error: str | None = None,
+    ) -> None:
+        """Store (start, duration, text) segments, or a permanent failure when None."""
+
+    @abstractmethod
+    def transcript_segments(
+        self,
+        submission_id: int,
+        start: float | None = None,
+        end: float | None = None,
+        limit: int = 100,
+        after: tuple[float, int] | None = None,
+    ) -> list[dict] | None:
+        """Keyset-paginated transcript segments ordered by (start, id); None if absent."""
+
+    @abstractmethod
+    def search(
+        self,
+        query: str,
+        content_type: str | None = None,
+        domain: str | None = None,
+        limit: int = 20,
+        after: tuple[float, int] | None = None,
+    ) -> list[dict]:
+        """Full-text search ordered by (score, id), resuming after the given keyset."""
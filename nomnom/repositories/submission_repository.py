@@ -1,107 +1,732 @@
+import codecs
 import json
 import logging
+import sqlite3
+import time
+from collections.abc import Callable, Iterator
+from typing import NamedTuple
 
-from nomnom.db.connection import get_connection
-from nomnom.models.submission import Submission
+from nomnom.db.compression import (
+    DECOMPRESS_FUNCTION,
+    ContentCodec,
+    install_fts_triggers,
+    iter_decompressed,
+    read_dictionary,
+)
+from nomnom.db.connection import ConnectionPool
+from nomnom.db.functions import CONTENT_HASH_FUNCTION, content_hash
+from nomnom.metrics import UPSERT_SECONDS
+from nomnom.models.submission import Submission, UpsertOutcome
 from nomnom.repositories.base import AbstractSubmissionRepository
 
 logger = logging.getLogger(__name__)
 
+# The DO UPDATE branch only fires when the content hash differs, so an unchanged
+# re-ingest returns no row and is downgraded to a last_seen_at touch.
+_UPSERT_SQL = """
+    INSERT INTO submissions
+        (url, domain, title, content_markdown, content_type,
+         metadata, enrichment_status, enrichment_error, content_hash, content_encoding,
+         last_seen_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(url) DO UPDATE SET
+        domain            = excluded.domain,
+        title             = excluded.title,
+        content_markdown  = excluded.content_markdown,
+        content_encoding  = excluded.content_encoding,
+        content_type      = excluded.content_type,
+        metadata          = excluded.metadata,
+        enrichment_status = excluded.enrichment_status,
+        enrichment_error  = excluded.enrichment_error,
+        content_hash      = excluded.content_hash,
+        ingested_at       = submissions.ingested_at,
+        updated_at        = CURRENT_TIMESTAMP,
+        last_seen_at      = CURRENT_TIMESTAMP,
+        revision          = submissions.revision + 1
+    WHERE submissions.content_hash IS NOT excluded.content_hash
+    RETURNING revision
+"""
+
+# bm25 column weights for (title, content_markdown): title matches rank higher
+_SEARCH_WEIGHTS = "10.0, 1.0"
+
+# Coalesces onto an existing pending/running job via the partial unique index
+# idx_enrichment_jobs_active_url (migration 012)
+_ENQUEUE_JOB_SQL = "INSERT INTO enrichment_jobs (submission_url) VALUES (?) ON CONFLICT DO NOTHING"
+
+_TOUCH_SQL = "UPDATE submissions SET last_seen_at = CURRENT_TIMESTAMP WHERE url = ?"
+
+# Markdown of a transcript stored as segments (migration 014), rendered on read.
+# The (video_id, start) index hands the segments to group_concat in order.
+_TRANSCRIPT_MARKDOWN = """(
+    SELECT '## Transcript' || char(10, 10) || group_concat(text, ' ')
+    FROM transcript_segments WHERE transcript_segments.video_id = submissions.video_id
+)"""
+
+# Segments per read when a transcript is streamed
+_TRANSCRIPT_PAGE_SIZE = 500
+
+# Select expression wherever content_markdown is read back as text
+_CONTENT_COLUMN = (
+    f"COALESCE({DECOMPRESS_FUNCTION}(content_markdown, content_encoding), "
+    f"{_TRANSCRIPT_MARKDOWN}) AS content_markdown"
+)
+
+# Fields GET /submissions can project, mapped to their SELECT expressions
+SUBMISSION_FIELDS = {
+    "id": "id",
+    "url": "url",
+    "domain": "domain",
+    "title": "title",
+    "content_type": "content_type",
+    "metadata": "metadata",
+    "enrichment_status": "enrichment_status",
+    "enrichment_error": "enrichment_error",
+    "ingested_at": "ingested_at",
+    "updated_at": "updated_at",
+    "last_seen_at": "last_seen_at",
+    "content_markdown": _CONTENT_COLUMN,
+}
+# List views leave the (possibly multi-megabyte) content out unless asked for
+DEFAULT_LIST_FIELDS = tuple(f for f in SUBMISSION_FIELDS if f != "content_markdown")
+
+# Equality filters accepted by list_submissions; each has an (x, ingested_at) index.
+# subreddit and channel are generated columns over metadata (migration 011).
+_LIST_FILTERS = ("domain", "content_type", "enrichment_status", "subreddit", "channel")
+
+_GET_SUBMISSION_SQL = f"""
+    SELECT id, url, domain, title, {_CONTENT_COLUMN}, content_type, metadata,
+           enrichment_status, enrichment_error, ingested_at, updated_at
+    FROM submissions
+"""
+
+
+def _subreddit_key(name: str) -> str:
+    """Match the subreddit generated column: "r/Python" and "python" are the same."""
+    return name.strip("/").lower().removeprefix("r/")
+
+
+class ContentChanged(RuntimeError):
+    """A submission's content was rewritten while iter_submission streamed it."""
+
+
+class UpsertParams(NamedTuple):
+    """Bound parameters of _UPSERT_SQL, in order."""
+
+    url: str
+    domain: str
+    title: str | None
+    content_markdown: str | bytes | None
+    content_type: str
+    metadata: str
+    enrichment_status: str
+    enrichment_error: str | None
+    content_hash: str
+    content_encoding: str | None
+
+
+def upsert_params(submission: Submission, codec: ContentCodec | None) -> UpsertParams:
+    """
+    Serialize, hash and compress a submission for _UPSERT_SQL. Pure CPU work, so
+    callers may run it ahead of the write and store it in `submission.prepared`.
+    """
+    metadata_json = json.dumps(submission.metadata)
+    # The hash is always over the plain text, so compression never changes outcomes
+    stored, encoding = _encode(codec, submission.content_type, submission.content_markdown)
+    return UpsertParams(
+        submission.url,
+        submission.domain,
+        submission.title,
+        stored,
+        submission.content_type,
+        metadata_json,
+        submission.enrichment_status,
+        submission.enrichment_error,
+        content_hash(submission.title, submission.content_markdown, metadata_json),
+        encoding,
+    )
+
+
+def _encode(
+    codec: ContentCodec | None, content_type: str, text: str | None
+) -> tuple[str | bytes | None, str | None]:
+    return codec.encode(content_type, text) if codec else (text, None)
+
+
+def _fts_query(text: str) -> str:
+    """Quote each whitespace-separated term so user input is never parsed as FTS5 syntax."""
+    terms = [f'"{term.replace(chr(34), chr(34) * 2)}"' for term in text.split()]
+    if not terms:
+        raise ValueError("empty search query")
+    return " ".join(terms)
+
+
+def _upsert(conn, params: tuple) -> UpsertOutcome:
+    row = conn.execute(_UPSERT_SQL, params).fetchone()
+    if row is None:
+        conn.execute(_TOUCH_SQL, (params[0],))
+        return UpsertOutcome.UNCHANGED
+    return UpsertOutcome.INSERTED if row["revision"] == 0 else UpsertOutcome.UPDATED
+
 
 class SubmissionRepository(AbstractSubmissionRepository):
-    def __init__(self, db_path: str) -> None:
+    def __init__(
+        self,
+        db_path: str,
+        pool: ConnectionPool | None = None,
+        codec: ContentCodec | None = None,
+    ) -> None:
         self._db_path = db_path
+        self._owns_pool = pool is None
+        self._pool = pool or ConnectionPool(db_path)
+        self._codec = codec
+        with self._pool.writer() as conn:
+            install_fts_triggers(conn, compression=codec is not None)
+        if codec is not None:
+            self._load_dictionaries()
 
-    def upsert(self, submission: Submission) -> bool:
+    def _load_dictionaries(self) -> None:
+        """Hand the newest dictionary of each content_type to the codec."""
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                """
+                SELECT content_type, dictionary FROM compression_dictionaries
+                WHERE id IN (SELECT MAX(id) FROM compression_dictionaries GROUP BY content_type)
+                """
+            ).fetchall()
+        for row in rows:
+            self._codec.add_dictionary(row["content_type"], row["dictionary"])
+
+    def close(self) -> None:
+        """Close the connection pool if this repository created it."""
+        if self._owns_pool:
+            self._pool.close()
+
+    def upsert(self, submission: Submission) -> UpsertOutcome:
         """
-        Insert or update a submission keyed by URL.
-        Preserves ingested_at on update. Returns True if inserted, False if updated.
+        Insert or update a submission keyed by URL in a single statement.
+        Preserves ingested_at on update. A re-ingest whose content hash matches the
+        stored row only bumps last_seen_at and reports UNCHANGED.
         """
-        metadata_json = json.dumps(submission.metadata)
-        with get_connection(self._db_path) as conn:
-            cursor = conn.execute(
+        started = time.perf_counter()
+        params = submission.prepared or upsert_params(submission, self._codec)
+        with self._pool.writer() as conn:
+            outcome = _upsert(conn, params)
+        UPSERT_SECONDS.observe(time.perf_counter() - started)
+        return outcome
+
+    def upsert_many(
+        self, submissions: list[Submission]
+    ) -> list[UpsertOutcome | Exception]:
+        """
+        Upsert a batch of submissions in a single transaction.
+        Returns one outcome per input, in order. Each item runs in its own savepoint:
+        an item that fails is rolled back alone and its exception takes its place in
+        the result, while the rest of the batch commits.
+        """
+        if not submissions:
+            return []
+        started = time.perf_counter()
+        # Hash and compress before taking the writer lock
+        params: list[UpsertParams | Exception] = []
+        for submission in submissions:
+            try:
+                params.append(submission.prepared or upsert_params(submission, self._codec))
+            except Exception as exc:
+                params.append(exc)
+        outcomes: list[UpsertOutcome | Exception] = []
+        with self._pool.writer() as conn:
+            # executemany() discards RETURNING rows, so run the statement per item;
+            # the cost that matters (one commit for the batch) is unchanged.
+            for item in params:
+                if isinstance(item, Exception):
+                    outcomes.append(item)
+                    continue
+                conn.execute("SAVEPOINT upsert_item")
+                try:
+                    outcomes.append(_upsert(conn, item))
+                except Exception as exc:
+                    if not conn.in_transaction:
+                        raise  # SQLite abandoned the whole transaction (I/O error, full disk)
+                    conn.execute("ROLLBACK TO upsert_item")
+                    outcomes.append(exc)
+                conn.execute("RELEASE upsert_item")
+        UPSERT_SECONDS.observe(time.perf_counter() - started)
+        return outcomes
+
+    def create_enrichment_job(self, url: str) -> bool:
+        """Returns False if the URL already had an active job, which is kept instead."""
+        with self._pool.writer() as conn:
+            return conn.execute(_ENQUEUE_JOB_SQL, (url,)).rowcount == 1
+
+    def create_enrichment_jobs(self, urls: list[str]) -> None:
+        with self._pool.writer() as conn:
+            conn.executemany(_ENQUEUE_JOB_SQL, [(u,) for u in urls])
+
+    def claim_enrichment_job(self, lease_seconds: int) -> dict | None:
+        """
+        Atomically claim the oldest runnable job: a pending job whose backoff has
+        elapsed, or a running job whose lease expired. Returns the job joined with
+        its submission's content_type and metadata, or None if nothing is runnable.
+        """
+        with self._pool.writer() as conn:
+            job = conn.execute(
                 """
-                INSERT INTO submissions
-                    (url, domain, title, content_markdown, content_type,
-                     metadata, enrichment_status, enrichment_error)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(url) DO UPDATE SET
-                    domain            = excluded.domain,
-                    title             = excluded.title,
-                    content_markdown  = excluded.content_markdown,
-                    content_type      = excluded.content_type,
-                    metadata          = excluded.metadata,
-                    enrichment_status = excluded.enrichment_status,
-                    enrichment_error  = excluded.enrichment_error,
-                    ingested_at       = submissions.ingested_at,
-                    updated_at        = CURRENT_TIMESTAMP
+                UPDATE enrichment_jobs
+                SET status = 'running', claimed_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM enrichment_jobs
+                    WHERE (status = 'pending'
+                           AND (next_attempt_at IS NULL OR next_attempt_at <= CURRENT_TIMESTAMP))
+                       OR (status = 'running' AND claimed_at <= datetime('now', ?))
+                    ORDER BY id
+                    LIMIT 1
+                )
+                RETURNING id, submission_url, attempts, created_at
                 """,
-                (
-                    submission.url,
-                    submission.domain,
-                    submission.title,
-                    submission.content_markdown,
-                    submission.content_type,
-                    metadata_json,
-                    submission.enrichment_status,
-                    submission.enrichment_error,
-                ),
-            )
-            conn.commit()
-            # lastrowid is set on INSERT; on UPDATE it equals the existing rowid
-            # changes() == 1 for both, so we use rowid change behaviour:
-            # SQLite sets last_insert_rowid to 0 on UPDATE with ON CONFLICT
-            is_insert = cursor.lastrowid != 0 and conn.execute(
-                "SELECT changes()"
-            ).fetchone()[0] == 1
-            # Simpler: check if updated_at == ingested_at (new row) via direct query
-            row = conn.execute(
-                "SELECT (ingested_at = updated_at) as is_new FROM submissions WHERE url = ?",
-                (submission.url,),
+                (f"-{int(lease_seconds)} seconds",),
+            ).fetchone()
+            if job is None:
+                return None
+            submission = conn.execute(
+                "SELECT content_type, metadata FROM submissions WHERE url = ?",
+                (job["submission_url"],),
             ).fetchone()
-            return bool(row["is_new"]) if row else True
+        return {
+            **dict(job),
+            "content_type": submission["content_type"] if submission else None,
+            "metadata": json.loads(submission["metadata"] or "{}") if submission else {},
+        }
 
-    def create_enrichment_job(self, url: str) -> None:
-        with get_connection(self._db_path) as conn:
+    def finish_enrichment_job(
+        self, job_id: int, status: str, failure_reason: str | None = None
+    ) -> None:
+        """Move a claimed job to a terminal status (complete or failed)."""
+        with self._pool.writer() as conn:
             conn.execute(
-                "INSERT INTO enrichment_jobs (submission_url) VALUES (?)", (url,)
+                """
+                UPDATE enrichment_jobs
+                SET status = ?, failure_reason = ?, completed_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                (status, failure_reason, job_id),
             )
-            conn.commit()
 
-    def update_enrichment_job_status(
-        self, url: str, status: str, failure_reason: str | None = None
-    ) -> None:
-        with get_connection(self._db_path) as conn:
+    def retry_enrichment_job(self, job_id: int, delay_seconds: float, error: str) -> None:
+        """Release a claimed job back to pending, runnable again after the delay."""
+        with self._pool.writer() as conn:
             conn.execute(
                 """
                 UPDATE enrichment_jobs
-                SET status = ?, failure_reason = ?, completed_at = CURRENT_TIMESTAMP
-                WHERE submission_url = ? AND status = 'pending'
+                SET status = 'pending', claimed_at = NULL, failure_reason = ?,
+                    next_attempt_at = datetime('now', ?)
+                WHERE id = ?
                 """,
-                (status, failure_reason, url),
+                (error, f"+{int(delay_seconds)} seconds", job_id),
             )
-            conn.commit()
 
-    def exists_by_url(self, url: str) -> bool:
-        with get_connection(self._db_path) as conn:
-            row = conn.execute(
-                "SELECT 1 FROM submissions WHERE url = ? LIMIT 1", (url,)
-            ).fetchone()
-            return row is not None
+    def requeue_running_enrichment_jobs(self) -> int:
+        """Return jobs left running by a previous process to pending. Returns the count."""
+        with self._pool.writer() as conn:
+            cursor = conn.execute(
+                "UPDATE enrichment_jobs SET status = 'pending', claimed_at = NULL "
+                "WHERE status = 'running'"
+            )
+            return cursor.rowcount
 
-    def insert_github_repo(self, url: str, owner: str, repo: str, readme: str) -> None:
-        metadata_json = json.dumps({"owner": owner, "repo": repo})
-        with get_connection(self._db_path) as conn:
+    def prune_enrichment_jobs(self, older_than_seconds: int, batch_size: int = 1000) -> int:
+        """
+        Delete up to `batch_size` complete or failed jobs that finished more than
+        `older_than_seconds` ago, oldest first. Returns how many were deleted; call
+        again until it returns less than `batch_size`.
+        """
+        with self._pool.writer() as conn:
+            return conn.execute(
+                """
+                DELETE FROM enrichment_jobs WHERE id IN (
+                    SELECT id FROM enrichment_jobs
+                    WHERE status IN ('complete', 'failed') AND completed_at < datetime('now', ?)
+                    ORDER BY completed_at
+                    LIMIT ?
+                )
+                """,
+                (f"-{int(older_than_seconds)} seconds", batch_size),
+            ).rowcount
+
+    def count_enrichment_jobs(self) -> dict[str, int]:
+        with self._pool.reader() as conn:
+            return {
+                row["status"]: row["n"]
+                for row in conn.execute(
+                    "SELECT status, COUNT(*) AS n FROM enrichment_jobs GROUP BY status"
+                )
+            }
+
+    def mark_enrichment_failed(self, url: str, error: str) -> None:
+        """Record a terminal enrichment failure without touching the stored content."""
+        with self._pool.writer() as conn:
             conn.execute(
+                """
+                UPDATE submissions
+                SET enrichment_status = 'failed', enrichment_error = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE url = ?
+                """,
+                (error, url),
+            )
+
+    def insert_github_placeholder(self, url: str, owner: str, repo: str) -> bool:
+        """
+        Insert a GitHub repository row with an empty README and enrichment_status
+        'pending', plus its enrichment job, in one transaction. Returns False without
+        writing anything if the URL already exists.
+        """
+        metadata_json = json.dumps({"owner": owner, "repo": repo})
+        title = f"{owner}/{repo}"
+        with self._pool.writer() as conn:
+            row = conn.execute(
                 """
                 INSERT INTO submissions
                     (url, domain, title, content_markdown, content_type,
-                     metadata, enrichment_status)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                     metadata, enrichment_status, content_hash, last_seen_at)
+                VALUES (?, 'github.com', ?, '', 'github_repo', ?, 'pending', ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(url) DO NOTHING
+                RETURNING id
+                """,
+                (url, title, metadata_json, content_hash(title, "", metadata_json)),
+            ).fetchone()
+            if row is None:
+                return False
+            conn.execute(_ENQUEUE_JOB_SQL, (url,))
+        return True
+
+    def github_revalidation_due(self, url: str, min_age_seconds: int) -> bool | None:
+        """
+        None if the repository is not stored, else whether its README was last
+        confirmed (last_seen_at) at least `min_age_seconds` ago.
+        """
+        with self._pool.reader() as conn:
+            row = conn.execute(
+                """
+                SELECT last_seen_at IS NULL OR last_seen_at <= datetime('now', ?) AS due
+                FROM submissions WHERE url = ?
+                """,
+                (f"-{int(min_age_seconds)} seconds", url),
+            ).fetchone()
+        return None if row is None else bool(row["due"])
+
+    def enqueue_revalidation(self, url: str) -> bool:
+        """Create an enrichment job for `url` unless one is already pending or running."""
+        return self.create_enrichment_job(url)
+
+    def update_github_readme(
+        self, url: str, readme: str, etag: str | None, last_modified: str | None
+    ) -> None:
+        """Store a freshly fetched README with the validators to revalidate it later."""
+        stored, encoding = _encode(self._codec, "github_repo", readme)
+        with self._pool.writer() as conn:
+            row = conn.execute(
+                "SELECT title, metadata FROM submissions WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return
+            metadata = json.loads(row["metadata"] or "{}")
+            metadata["readme_etag"] = etag
+            metadata["readme_last_modified"] = last_modified
+            metadata_json = json.dumps(metadata)
+            conn.execute(
+                """
+                UPDATE submissions
+                SET content_markdown = ?, content_encoding = ?, metadata = ?, content_hash = ?,
+                    enrichment_status = 'complete', enrichment_error = NULL,
+                    updated_at = CURRENT_TIMESTAMP, last_seen_at = CURRENT_TIMESTAMP,
+                    revision = revision + 1
+                WHERE url = ?
                 """,
-                (url, "github.com", f"{owner}/{repo}", readme, "github_repo", metadata_json, "none"),
+                (
+                    stored, encoding, metadata_json,
+                    content_hash(row["title"], readme, metadata_json), url,
+                ),
             )
-            conn.commit()
+
+    def _get_one(self, where: str, value: str) -> dict | None:
+        with self._pool.reader() as conn:
+            row = conn.execute(f"{_GET_SUBMISSION_SQL} WHERE {where} LIMIT 1", (value,)).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "metadata": json.loads(row["metadata"] or "{}")}
+
+    def get_submission(self, url: str) -> dict | None:
+        """Fetch one submission by URL with content_markdown decompressed."""
+        return self._get_one("url = ?", url)
+
+    def _find_id(self, where: str, value: str) -> dict | None:
+        with self._pool.reader() as conn:
+            row = conn.execute(
+                f"SELECT id, url FROM submissions WHERE {where} LIMIT 1", (value,)
+            ).fetchone()
+        return None if row is None else dict(row)
+
+    def find_by_video_id(self, video_id: str) -> dict | None:
+        """
+        The id and URL of the YouTube submission for `video_id`, whatever URL form
+        it was saved under. Reads only the idx_submissions_video_id entry and its row.
+        """
+        return self._find_id("video_id = ?", video_id)
+
+    def find_by_github_repo(self, owner: str, repo: str) -> dict | None:
+        """The id and URL of the GitHub submission for owner/repo, case-insensitively."""
+        return self._find_id("github_repo = ?", f"{owner}/{repo}".lower())
+
+    def list_submissions(
+        self,
+        fields: tuple[str, ...] = DEFAULT_LIST_FIELDS,
+        domain: str | None = None,
+        content_type: str | None = None,
+        enrichment_status: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 50,
+        after: tuple[str, int] | None = None,
+        descending: bool = True,
+        subreddit: str | None = None,
+        channel: str | None = None,
+    ) -> list[dict]:
+        """
+        One page of submissions ordered by (ingested_at, id), newest first unless
+        `descending` is False. `since` is inclusive and `until` exclusive. Pass the
+        last row's (ingested_at, id) as `after` for the next page. Only `fields` are
+        returned, plus the keyset columns. Raises ValueError for an unknown field.
+        """
+        unknown = set(fields) - SUBMISSION_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"unknown field(s): {', '.join(sorted(unknown))}")
+        selected = dict.fromkeys(("id", "ingested_at", *fields))
+        columns = ", ".join(SUBMISSION_FIELDS[f] for f in selected)
+
+        # Built from fixed fragments so the planner sees plain equality and range
+        # terms it can match to the composite indexes.
+        where, params = [], []
+        if subreddit is not None:
+            subreddit = _subreddit_key(subreddit)
+        values = (domain, content_type, enrichment_status, subreddit, channel)
+        for name, value in zip(_LIST_FILTERS, values, strict=True):
+            if value is not None:
+                where.append(f"{name} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("ingested_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ingested_at < ?")
+            params.append(until)
+        if after is not None:
+            where.append(f"(ingested_at, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(after)
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT {columns} FROM submissions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY ingested_at {direction}, id {direction} LIMIT ?"
+        params.append(limit)
+
+        with self._pool.reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        results = [dict(row) for row in rows]
+        if "metadata" in selected:
+            for row in results:
+                row["metadata"] = json.loads(row["metadata"] or "{}")
+        return results
+
+    def iter_submission(self, submission_id: int, chunk_size: int = 65536) -> Iterator:
+        """
+        Stream one submission: first yields its fields as a dict (content_markdown
+        is None when unset and "" otherwise), then the content as str chunks,
+        decompressed on the fly. A transcript stored as segments is rendered from
+        them as it streams. Yields nothing if the id does not exist.
+
+        Each chunk is read in its own short transaction, so a slow client holds
+        neither a pooled reader nor a WAL snapshot between chunks. If the content
+        is rewritten mid-stream, ContentChanged is raised rather than mixing the
+        old and new versions.
+        """
+        columns = ", ".join(f for f in SUBMISSION_FIELDS if f != "content_markdown")
+        with self._pool.reader() as conn:
+            row = conn.execute(
+                f"""
+                SELECT {columns}, revision, content_encoding, video_id,
+                       content_markdown IS NULL AS content_null,
+                       content_markdown IS NULL AND EXISTS (
+                           SELECT 1 FROM transcript_segments AS t
+                           WHERE t.video_id = submissions.video_id
+                       ) AS segmented
+                FROM submissions WHERE id = ?
+                """,
+                (submission_id,),
+            ).fetchone()
+        if row is None:
+            return
+        submission = dict(row)
+        revision = submission.pop("revision")
+        encoding = submission.pop("content_encoding")
+        video_id = submission.pop("video_id")
+        content_null = submission.pop("content_null")
+        segmented = submission.pop("segmented")
+        submission["metadata"] = json.loads(submission["metadata"] or "{}")
+        submission["content_markdown"] = None if content_null and not segmented else ""
+        yield submission
+        if segmented:
+            yield from self._iter_transcript_markdown(video_id, chunk_size)
+            return
+        if content_null:
+            return
+        chunks = self._iter_content_bytes(submission_id, revision, encoding, chunk_size)
+        if encoding is not None:
+            chunks = iter_decompressed(chunks, encoding, self._read_dictionary)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for chunk in chunks:
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def _iter_content_bytes(
+        self, submission_id: int, revision: int, encoding: str | None, chunk_size: int
+    ) -> Iterator[bytes]:
+        """A row's stored content_markdown bytes, one short read per chunk."""
+        offset = 0
+        while True:
+            with self._pool.reader() as conn:
+                # The revision check and the blob read share one snapshot
+                conn.execute("BEGIN")
+                row = conn.execute(
+                    "SELECT revision, content_encoding FROM submissions WHERE id = ?",
+                    (submission_id,),
+                ).fetchone()
+                # Compressing a row in place changes its encoding but not its revision
+                if row is None or tuple(row) != (revision, encoding):
+                    raise ContentChanged(f"submission {submission_id} changed while streaming")
+                with conn.blobopen(
+                    "submissions", "content_markdown", submission_id, readonly=True
+                ) as blob:
+                    blob.seek(offset)
+                    chunk = blob.read(chunk_size)
+            if not chunk:
+                return
+            offset += len(chunk)
+            yield chunk
+
+    def _iter_transcript_markdown(self, video_id: str, chunk_size: int) -> Iterator[str]:
+        """
+        The same markdown as _TRANSCRIPT_MARKDOWN, in chunks of about `chunk_size`,
+        paging through the segments by (start, id) with one short read per page.
+        """
+        parts, size, separator = ["## Transcript\n\n"], 0, ""
+        after, first_id = (-1.0, 0), None
+        while True:
+            with self._pool.reader() as conn:
+                conn.execute("BEGIN")
+                # A refetch replaces every segment with new, higher ids
+                current = conn.execute(
+                    "SELECT MIN(id) FROM transcript_segments WHERE video_id = ?", (video_id,)
+                ).fetchone()[0]
+                rows = conn.execute(
+                    """
+                    SELECT id, start, text FROM transcript_segments
+                    WHERE video_id = ? AND (start, id) > (?, ?)
+                    ORDER BY start, id LIMIT ?
+                    """,
+                    (video_id, *after, _TRANSCRIPT_PAGE_SIZE),
+                ).fetchall()
+            if first_id is None:
+                first_id = current
+            elif current != first_id:
+                raise ContentChanged(f"transcript of {video_id} changed while streaming")
+            for row in rows:
+                parts.append(separator)
+                parts.append(row["text"])
+                separator = " "
+                size += len(row["text"]) + 1
+                if size >= chunk_size:
+                    yield "".join(parts)
+                    parts, size = [], 0
+            if len(rows) < _TRANSCRIPT_PAGE_SIZE:
+                break
+            after = (rows[-1]["start"], rows[-1]["id"])
+        if parts:
+            yield "".join(parts)
+
+    def _read_dictionary(self, dict_id: int) -> bytes:
+        with self._pool.reader() as conn:
+            return read_dictionary(conn, dict_id)
+
+    def iter_submissions(
+        self,
+        domain: str | None = None,
+        content_type: str | None = None,
+        enrichment_status: str | None = None,
+        updated_since: str | None = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[list[dict]]:
+        """
+        Every matching submission, all fields with content decompressed, in id
+        order and `chunk_size` rows at a time. Each chunk is its own short read
+        keyed on the last id, so a long export neither holds a pooled reader nor
+        pins a WAL snapshot between chunks.
+        """
+        where, params = ["id > ?"], [0]
+        for name, value in zip(_LIST_FILTERS, (domain, content_type, enrichment_status)):
+            if value is not None:
+                where.append(f"{name} = ?")
+                params.append(value)
+        if updated_since is not None:
+            where.append("updated_at >= ?")
+            params.append(updated_since)
+        sql = (
+            f"SELECT {', '.join(SUBMISSION_FIELDS.values())} FROM submissions "
+            f"WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        )
+        params.append(chunk_size)
+        while True:
+            with self._pool.reader() as conn:
+                rows = [dict(row) for row in conn.execute(sql, params)]
+            if not rows:
+                return
+            yield rows
+            params[0] = rows[-1]["id"]
+
+    def iter_urls(self, chunk_size: int = 10000) -> Iterator[list[str]]:
+        """Every stored URL in id order, one short keyed read per chunk."""
+        after_id = 0
+        while True:
+            with self._pool.reader() as conn:
+                rows = conn.execute(
+                    "SELECT id, url FROM submissions WHERE id > ? ORDER BY id LIMIT ?",
+                    (after_id, chunk_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield [row["url"] for row in rows]
+            after_id = rows[-1]["id"]
+
+    def list_changes(self, after: int = 0, limit: int = 100) -> list[dict]:
+        """Change log entries with seq > after, oldest first."""
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                """
+                SELECT seq, op, submission_id, url, changed_at FROM submission_changes
+                WHERE seq > ? ORDER BY seq LIMIT ?
+                """,
+                (after, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def touch_submission(self, url: str) -> None:
+        """Bump last_seen_at only, e.g. after a 304 Not Modified revalidation."""
+        with self._pool.writer() as conn:
+            conn.execute(_TOUCH_SQL, (url,))
 
     def update_submission_content(
         self,
@@ -111,14 +736,383 @@ class SubmissionRepository(AbstractSubmissionRepository):
         enrichment_error: str | None = None,
     ) -> None:
         """Update a submission's content after server-side enrichment. Title is preserved."""
-        with get_connection(self._db_path) as conn:
+        stored, encoding = content_markdown, None
+        if self._codec is not None:
+            with self._pool.reader() as conn:
+                row = conn.execute(
+                    "SELECT content_type FROM submissions WHERE url = ?", (url,)
+                ).fetchone()
+            if row is not None:
+                stored, encoding = self._codec.encode(row["content_type"], content_markdown)
+        with self._pool.writer() as conn:
             conn.execute(
-                """
+                f"""
                 UPDATE submissions
-                SET content_markdown = ?, enrichment_status = ?, enrichment_error = ?,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE url = ?
+                SET content_markdown = ?5, content_encoding = ?6,
+                    enrichment_status = ?2, enrichment_error = ?3,
+                    content_hash = {CONTENT_HASH_FUNCTION}(title, ?1, metadata),
+                    updated_at = CURRENT_TIMESTAMP,
+                    revision = revision + 1
+                WHERE url = ?4
                 """,
-                (content_markdown, enrichment_status, enrichment_error, url),
+                (content_markdown, enrichment_status, enrichment_error, url, stored, encoding),
             )
-            conn.commit()
+
+    def cached_transcripts(
+        self, video_ids: list[str], max_age_seconds: int, negative_max_age_seconds: int
+    ) -> dict[str, dict]:
+        """
+        Fresh transcript cache entries by video_id: a stored transcript fetched less
+        than `max_age_seconds` ago, else a cached failure younger than
+        `negative_max_age_seconds`. Each value has language, error (None unless the
+        entry is a failure) and fetched_at.
+        """
+        if not video_ids:
+            return {}
+        placeholders = ", ".join("?" * len(video_ids))
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT video_id, language, error, fetched_at
+                FROM transcript_cache
+                WHERE video_id IN ({placeholders})
+                  AND fetched_at > datetime('now', CASE WHEN error IS NOT NULL
+                                                        THEN ? ELSE ? END)
+                ORDER BY error IS NOT NULL DESC, fetched_at
+                """,
+                (
+                    *video_ids,
+                    f"-{int(negative_max_age_seconds)} seconds",
+                    f"-{int(max_age_seconds)} seconds",
+                ),
+            ).fetchall()
+        # Later rows win: transcripts over failures, then the most recent fetch
+        return {row["video_id"]: dict(row) for row in rows}
+
+    def store_transcript(
+        self,
+        video_id: str,
+        segments: list[tuple[float, float, str]] | None,
+        language: str = "",
+        error: str | None = None,
+    ) -> None:
+        """
+        Store a fetched transcript as (start, duration, text) segments in transcript
+        order, replacing the video's previous segments and any cached failure, or
+        with segments=None cache a permanent failure. One transaction either way.
+        """
+        with self._pool.writer() as conn:
+            if segments is not None:
+                conn.execute("DELETE FROM transcript_segments WHERE video_id = ?", (video_id,))
+                conn.executemany(
+                    "INSERT INTO transcript_segments (video_id, start, duration, text) "
+                    "VALUES (?, ?, ?, ?)",
+                    ((video_id, start, duration, text) for start, duration, text in segments),
+                )
+                conn.execute(
+                    "DELETE FROM transcript_cache WHERE video_id = ? AND error IS NOT NULL",
+                    (video_id,),
+                )
+                error = None
+            conn.execute(
+                """
+                INSERT INTO transcript_cache (video_id, language, error)
+                VALUES (?, ?, ?)
+                ON CONFLICT (video_id, language) DO UPDATE SET
+                    error = excluded.error, fetched_at = CURRENT_TIMESTAMP
+                """,
+                (video_id, language if segments is not None else "", error),
+            )
+
+    def transcript_segments(
+        self,
+        submission_id: int,
+        start: float | None = None,
+        end: float | None = None,
+        limit: int = 100,
+        after: tuple[float, int] | None = None,
+    ) -> list[dict] | None:
+        """
+        One page of a submission's transcript segments ordered by (start, id), or
+        None if the submission does not exist. `start` and `end` keep the segments
+        overlapping that time range, in seconds. Pass the last row's (start, id) as
+        `after` for the next page.
+        """
+        with self._pool.reader() as conn:
+            row = conn.execute(
+                "SELECT video_id FROM submissions WHERE id = ?", (submission_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            rows = conn.execute(
+                """
+                SELECT id, start, duration, text FROM transcript_segments
+                WHERE video_id = :video_id
+                  AND (:end IS NULL OR start < :end)
+                  AND (:start IS NULL OR start + duration > :start)
+                  AND (:after_start IS NULL OR (start, id) > (:after_start, :after_id))
+                ORDER BY start, id
+                LIMIT :limit
+                """,
+                {
+                    "video_id": row["video_id"],
+                    "start": start,
+                    "end": end,
+                    "after_start": after[0] if after else None,
+                    "after_id": after[1] if after else None,
+                    "limit": limit,
+                },
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def search(
+        self,
+        query: str,
+        content_type: str | None = None,
+        domain: str | None = None,
+        limit: int = 20,
+        after: tuple[float, int] | None = None,
+    ) -> list[dict]:
+        """
+        Ranked full-text search over title, content_markdown and transcript segments.
+        Each submission is scored by its best match; when that is a transcript
+        segment, `timestamp` is the segment's start in seconds (else None).
+        Results are ordered by (bm25 score, id); pass the last row's pair as `after`
+        for the next page.
+        """
+        match = _fts_query(query)
+        after_score, after_id = after if after else (None, None)
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                f"""
+                WITH hits AS (
+                    SELECT rowid AS id, bm25(submissions_fts, {_SEARCH_WEIGHTS}) AS score,
+                           NULL AS segment_id
+                    FROM submissions_fts
+                    WHERE submissions_fts MATCH :match
+                    UNION ALL
+                    SELECT s.id, bm25(transcript_segments_fts), t.id
+                    FROM transcript_segments_fts
+                    JOIN transcript_segments AS t ON t.id = transcript_segments_fts.rowid
+                    JOIN submissions AS s ON s.video_id = t.video_id
+                    WHERE transcript_segments_fts MATCH :match
+                ),
+                -- segment_id comes from the row holding the minimum score
+                best AS (
+                    SELECT id, MIN(score) AS score, segment_id FROM hits GROUP BY id
+                )
+                SELECT s.id, s.url, s.title, s.domain, s.content_type, s.ingested_at,
+                       best.score, best.segment_id, t.start AS timestamp
+                FROM best
+                JOIN submissions AS s ON s.id = best.id
+                LEFT JOIN transcript_segments AS t ON t.id = best.segment_id
+                WHERE (:content_type IS NULL OR s.content_type = :content_type)
+                  AND (:domain IS NULL OR s.domain = :domain)
+                  AND (:after_score IS NULL OR best.score > :after_score
+                       OR (best.score = :after_score AND s.id > :after_id))
+                ORDER BY best.score, s.id
+                LIMIT :limit
+                """,
+                {
+                    "match": match,
+                    "content_type": content_type,
+                    "domain": domain,
+                    "after_score": after_score,
+                    "after_id": after_id,
+                    "limit": limit,
+                },
+            ).fetchall()
+            if not rows:
+                return []
+            # Snippets only for the page, not for every match that was ranked
+            ids = [row["id"] for row in rows if row["segment_id"] is None]
+            segment_ids = [row["segment_id"] for row in rows if row["segment_id"] is not None]
+            snippets = dict(
+                conn.execute(
+                    f"""
+                    SELECT rowid, snippet(submissions_fts, -1, '**', '**', '…', 24)
+                    FROM submissions_fts
+                    WHERE submissions_fts MATCH ? AND rowid IN ({",".join("?" * len(ids))})
+                    """,
+                    (match, *ids),
+                ).fetchall()
+            )
+            segment_snippets = dict(
+                conn.execute(
+                    f"""
+                    SELECT rowid, snippet(transcript_segments_fts, 0, '**', '**', '…', 24)
+                    FROM transcript_segments_fts
+                    WHERE transcript_segments_fts MATCH ?
+                      AND rowid IN ({",".join("?" * len(segment_ids))})
+                    """,
+                    (match, *segment_ids),
+                ).fetchall()
+            )
+        results = []
+        for row in rows:
+            hit = dict(row)
+            segment_id = hit.pop("segment_id")
+            hit["snippet"] = (
+                snippets.get(hit["id"]) if segment_id is None else segment_snippets.get(segment_id)
+            )
+            results.append(hit)
+        return results
+
+    def train_compression_dictionaries(
+        self, dict_size: int = 112_640, max_samples: int = 2000, min_samples: int = 50
+    ) -> dict[str, int]:
+        """
+        Train and store a new zstd dictionary for every content_type with at least
+        `min_samples` documents, sampled at random. Returns {content_type: dict id}.
+        """
+        with self._pool.reader() as conn:
+            content_types = [
+                row["content_type"]
+                for row in conn.execute(
+                    "SELECT content_type FROM submissions GROUP BY content_type "
+                    "HAVING COUNT(*) >= ?",
+                    (min_samples,),
+                )
+            ]
+        trained = {}
+        for content_type in content_types:
+            with self._pool.reader() as conn:
+                samples = [
+                    row[0].encode("utf-8")
+                    for row in conn.execute(
+                        f"""
+                        SELECT {_CONTENT_COLUMN} FROM submissions
+                        WHERE content_type = ? AND content_markdown IS NOT NULL
+                        ORDER BY random() LIMIT ?
+                        """,
+                        (content_type, max_samples),
+                    )
+                    if row[0]
+                ]
+            with self._pool.writer() as conn:
+                dict_id = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) + 1 FROM compression_dictionaries"
+                ).fetchone()[0]
+                try:
+                    dictionary = ContentCodec.train(samples, dict_id, dict_size)
+                except ValueError as exc:
+                    logger.warning("[compression] skipping %s | %s", content_type, exc)
+                    continue
+                conn.execute(
+                    "INSERT INTO compression_dictionaries (id, content_type, dictionary) "
+                    "VALUES (?, ?, ?)",
+                    (dict_id, content_type, dictionary),
+                )
+            if self._codec is not None:
+                self._codec.add_dictionary(content_type, dictionary)
+            trained[content_type] = dict_id
+        return trained
+
+    def compress_batch(self, after_id: int, limit: int) -> tuple[int, int, int, int] | None:
+        """
+        Compress up to `limit` uncompressed rows with id > after_id in one
+        transaction. Rows rewritten since they were read are left alone. Returns
+        (last id scanned, rows compressed, bytes before, bytes after), or None once
+        no rows remain. Requires a codec.
+        """
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, content_type, content_markdown, content_hash FROM submissions
+                WHERE id > ? AND content_encoding IS NULL AND content_markdown IS NOT NULL
+                ORDER BY id LIMIT ?
+                """,
+                (after_id, limit),
+            ).fetchall()
+        if not rows:
+            return None
+        updates, before, after = [], 0, 0
+        for row in rows:
+            stored, encoding = self._codec.encode(row["content_type"], row["content_markdown"])
+            if encoding is None:
+                continue
+            before += len(row["content_markdown"].encode("utf-8"))
+            after += len(stored)
+            updates.append((stored, encoding, row["id"], row["content_hash"]))
+        compressed = 0
+        if updates:
+            with self._pool.writer() as conn:
+                for params in updates:
+                    compressed += conn.execute(
+                        """
+                        UPDATE submissions SET content_markdown = ?, content_encoding = ?
+                        WHERE id = ? AND content_encoding IS NULL AND content_hash IS ?
+                        """,
+                        params,
+                    ).rowcount
+        return rows[-1]["id"], compressed, before, after
+
+    def merge_duplicate_urls(
+        self, after_id: int, limit: int, canonicalize: Callable[[str, str], str]
+    ) -> tuple[int, int, int] | None:
+        """
+        Move up to `limit` rows with id > after_id to their canonical URL,
+        `canonicalize(url, content_type)`, in one transaction. A row whose canonical
+        URL is already taken is merged with the row holding it: the more recently
+        updated of the two survives under the canonical URL, keeping the earliest
+        ingested_at and the latest last_seen_at, and its enrichment jobs follow it.
+        Returns (last id scanned, rows renamed, rows merged away), or None once no
+        rows remain.
+        """
+        with self._pool.reader() as conn:
+            rows = conn.execute(
+                "SELECT id, url, content_type FROM submissions WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        if not rows:
+            return None
+        moves = [
+            (row["id"], row["url"], canonical)
+            for row in rows
+            if (canonical := canonicalize(row["url"], row["content_type"])) != row["url"]
+        ]
+        renamed = merged = 0
+        if moves:
+            with self._pool.writer() as conn:
+                # Rows and their jobs are re-pointed one statement at a time; the
+                # foreign key only has to hold again at commit
+                conn.execute("PRAGMA defer_foreign_keys = ON")
+                for row_id, url, canonical in moves:
+                    merged_away = self._merge_url(conn, row_id, url, canonical)
+                    if merged_away is not None:
+                        merged += merged_away
+                        renamed += not merged_away
+        return rows[-1]["id"], renamed, merged
+
+    @staticmethod
+    def _merge_url(conn: sqlite3.Connection, row_id: int, url: str, canonical: str) -> bool | None:
+        """Rename (False) or merge (True) one row; None if it changed since it was read."""
+        columns = "SELECT id, ingested_at, updated_at, last_seen_at FROM submissions"
+        row = conn.execute(f"{columns} WHERE id = ? AND url = ?", (row_id, url)).fetchone()
+        if row is None:
+            return None
+        other = conn.execute(f"{columns} WHERE url = ?", (canonical,)).fetchone()
+        survivor = row
+        if other is not None:
+            # Newest content wins; on a tie, the row already at the canonical URL
+            newer = row["updated_at"] > other["updated_at"]
+            survivor, dropped = (row, other) if newer else (other, row)
+            conn.execute("DELETE FROM submissions WHERE id = ?", (dropped["id"],))
+        pair = [r for r in (row, other) if r is not None]
+        seen = [r["last_seen_at"] for r in pair if r["last_seen_at"] is not None]
+        conn.execute(
+            "UPDATE submissions SET url = ?, ingested_at = ?, last_seen_at = ? WHERE id = ?",
+            (
+                canonical,
+                min(r["ingested_at"] for r in pair),
+                max(seen) if seen else None,
+                survivor["id"],
+            ),
+        )
+        # At most one active job per URL: the canonical URL's own active job wins
+        conn.execute(
+            "UPDATE OR IGNORE enrichment_jobs SET submission_url = ? WHERE submission_url = ?",
+            (canonical, url),
+        )
+        conn.execute("DELETE FROM enrichment_jobs WHERE submission_url = ?", (url,))
+        return other is not None
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+
+class Change(BaseModel):
+    seq: int
+    op: str
+    submission_id: int
+    url: str
+    changed_at: str
+
+
+class ChangesResponse(BaseModel):
+    changes: list[Change]
+    # Pass as `after` on the next call; equals the request's `after` if nothing changed
+    next_after: int
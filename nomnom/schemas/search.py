@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    id: int
+    url: str
+    title: str | None
+    domain: str
+    content_type: str
+    ingested_at: str
+    score: float
+    snippet: str | None
+    # Start of the matching transcript segment, in seconds, for transcript hits
+    timestamp: float | None = None
+
+
+class SearchResponse(BaseModel):
+    results: list[SearchHit]
+    next_cursor: str | None = None
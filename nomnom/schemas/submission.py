@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class SubmissionPage(BaseModel):
+    # Rows carry only the requested fields (plus id and ingested_at)
+    results: list[dict]
+    next_cursor: str | None = None
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class TranscriptSegment(BaseModel):
+    id: int
+    start: float
+    duration: float
+    text: str
+
+
+class TranscriptPage(BaseModel):
+    segments: list[TranscriptSegment]
+    next_cursor: str | None = None
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+
+from nomnom.db.connection import ConnectionPool
+from nomnom.repositories.base import AbstractSubmissionRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeed:
+    """
+    Reads the submission change log and lets callers wait for new entries.
+
+    Waiters are woken by a commit listener on the connection pool instead of
+    polling the table; every commit wakes them, and they re-check the log.
+    """
+
+    def __init__(
+        self,
+        repository: AbstractSubmissionRepository,
+        pool: ConnectionPool,
+        heartbeat_seconds: float = 15,
+    ) -> None:
+        self._repository = repository
+        self._heartbeat = heartbeat_seconds
+        self._loop = asyncio.get_running_loop()
+        self._committed = asyncio.Event()
+        pool.add_commit_listener(self._on_commit)
+
+    def _on_commit(self) -> None:
+        # Runs on whichever thread committed
+        try:
+            self._loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:  # loop already closed during shutdown
+            pass
+
+    def _wake(self) -> None:
+        # Swap in a fresh event so waiters that re-check later block again
+        event, self._committed = self._committed, asyncio.Event()
+        event.set()
+
+    async def changes(self, after: int, limit: int, wait_seconds: float = 0) -> list[dict]:
+        """
+        Entries with seq > after. With `wait_seconds`, long-poll: if there are none
+        yet, wait up to that long for a commit that adds some.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait_seconds
+        while True:
+            committed = self._committed
+            rows = await asyncio.to_thread(self._repository.list_changes, after, limit)
+            remaining = deadline - loop.time()
+            if rows or remaining <= 0:
+                return rows
+            try:
+                await asyncio.wait_for(committed.wait(), remaining)
+            except TimeoutError:
+                pass
+
+    async def stream(self, after: int, batch_size: int = 500) -> AsyncIterator[bytes]:
+        """Server-sent events, one per change (`id:` is the seq), with heartbeats."""
+        while True:
+            rows = await self.changes(after, batch_size, self._heartbeat)
+            if not rows:
+                yield b": heartbeat\n\n"
+                continue
+            for row in rows:
+                yield f"id: {row['seq']}\nevent: {row['op']}\ndata: {json.dumps(row)}\n\n".encode()
+            after = rows[-1]["seq"]
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from pydantic import ValidationError
+
+from nomnom.db.compression import ContentCodec
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import UpsertParams, upsert_params
+from nomnom.schemas.ingest import IngestRequest
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidPayload(ValueError):
+    """An IngestRequest failed validation; `errors` as from ValidationError.errors()."""
+
+    def __init__(self, errors: list[dict]) -> None:
+        # Passed to Exception so it survives pickling back from a worker process
+        super().__init__(errors)
+        self.errors = errors
+
+    def __str__(self) -> str:
+        return f"{len(self.errors)} validation error(s)"
+
+
+# Set in each worker process by _init_worker
+_worker_codec: ContentCodec | None = None
+
+
+def _init_worker(codec: ContentCodec | None) -> None:
+    global _worker_codec
+    _worker_codec = codec
+
+
+def _validate(body: bytes | str) -> IngestRequest:
+    try:
+        return IngestRequest.model_validate_json(body)
+    except ValidationError as exc:
+        # ValidationError itself does not survive pickling; its error list does
+        raise InvalidPayload(exc.errors(include_url=False)) from None
+
+
+def _prepare(submission: Submission) -> UpsertParams:
+    return upsert_params(submission, _worker_codec)
+
+
+class CpuPool:
+    """
+    Worker processes for the CPU-bound steps of ingesting large payloads: JSON
+    parsing and validation, and the metadata serialization, content hashing and
+    compression that otherwise happen under the writer lock.
+
+    Payloads of at least `threshold_bytes` go to the pool, so a multi-megabyte
+    Reddit thread or transcript does not hold the GIL while other requests wait;
+    everything smaller stays inline, where it is cheaper than a round trip to
+    another process. `max_workers=0` disables the pool. Workers are started with
+    "spawn" (the parent runs threads, which fork does not mix with) and only when
+    the first large payload arrives.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        threshold_bytes: int = 1048576,
+        codec: ContentCodec | None = None,
+    ) -> None:
+        self._threshold = threshold_bytes
+        self._executor = None
+        if max_workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(codec,),
+            )
+
+    @classmethod
+    def from_settings(cls, settings, codec: ContentCodec | None = None) -> "CpuPool":
+        return cls(settings.CPU_POOL_WORKERS, settings.CPU_POOL_THRESHOLD_BYTES, codec=codec)
+
+    def offloads(self, size: int) -> bool:
+        return self._executor is not None and size >= self._threshold
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def validate(self, body: bytes | str) -> IngestRequest:
+        """Parse and validate an ingest payload. Raises InvalidPayload."""
+        if not self.offloads(len(body)):
+            return _validate(body)
+        return await self._run(_validate, body)
+
+    async def prepare(self, submissions: list[Submission]) -> None:
+        """Compute `prepared` upsert parameters for the large submissions, in parallel."""
+        large = [
+            s for s in submissions
+            if s.prepared is None and self.offloads(len(s.content_markdown or ""))
+        ]
+        if not large:
+            return
+        prepared = await asyncio.gather(*(self._run(_prepare, s) for s in large))
+        for submission, params in zip(large, prepared, strict=True):
+            submission.prepared = params
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
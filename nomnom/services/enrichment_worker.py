@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+
+from nomnom.metrics import ENRICHMENT_OUTCOMES
+from nomnom.repositories.base import AbstractSubmissionRepository
+
+logger = logging.getLogger(__name__)
+
+# A handler enriches one claimed job and persists the result itself. It raises
+# TransientEnrichmentError (or any unexpected exception) to have the job retried.
+JobHandler = Callable[[dict, AbstractSubmissionRepository], Awaitable[None]]
+
+_LATENCY_WINDOW = 1000
+
+
+class TransientEnrichmentError(Exception):
+    """A failure worth retrying later (network error, rate limit, ...)."""
+
+
+class EnrichmentWorkerPool:
+    """
+    Bounded pool of asyncio workers draining the durable `enrichment_jobs` table.
+
+    Jobs are claimed atomically with a lease, so a crash leaves them reclaimable
+    rather than orphaned. Handlers are registered per submission content_type.
+    """
+
+    def __init__(
+        self,
+        repository: AbstractSubmissionRepository,
+        workers: int = 2,
+        max_attempts: int = 5,
+        backoff_base_seconds: float = 30,
+        backoff_max_seconds: float = 3600,
+        lease_seconds: int = 600,
+        poll_interval_seconds: float = 5,
+    ) -> None:
+        self._repository = repository
+        self._workers = max(1, workers)
+        self._max_attempts = max_attempts
+        self._backoff_base = backoff_base_seconds
+        self._backoff_max = backoff_max_seconds
+        self._lease_seconds = lease_seconds
+        self._poll_interval = poll_interval_seconds
+        self._handlers: dict[str, JobHandler] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+        self.in_flight = 0
+        self.outcomes = {"complete": 0, "retried": 0, "failed": 0}
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    @classmethod
+    def from_settings(cls, repository: AbstractSubmissionRepository, settings):
+        return cls(
+            repository,
+            workers=settings.ENRICHMENT_WORKERS,
+            max_attempts=settings.ENRICHMENT_MAX_ATTEMPTS,
+            backoff_base_seconds=settings.ENRICHMENT_BACKOFF_BASE_SECONDS,
+            backoff_max_seconds=settings.ENRICHMENT_BACKOFF_MAX_SECONDS,
+            lease_seconds=settings.ENRICHMENT_LEASE_SECONDS,
+            poll_interval_seconds=settings.ENRICHMENT_POLL_INTERVAL_SECONDS,
+        )
+
+    def register(self, content_type: str, handler: JobHandler) -> None:
+        self._handlers[content_type] = handler
+
+    def notify(self) -> None:
+        """Wake idle workers; call after enqueuing a job."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        """Requeue jobs orphaned by a previous process, then start the workers."""
+        requeued = await asyncio.to_thread(self._repository.requeue_running_enrichment_jobs)
+        if requeued:
+            logger.info("[enrichment] requeued %d interrupted job(s)", requeued)
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"nomnom-enrichment-{i}")
+            for i in range(self._workers)
+        ]
+
+    async def stop(self, grace_seconds: float = 10) -> None:
+        """
+        Let in-flight jobs finish within the grace period, then cancel. A cancelled
+        job stays 'running' and is requeued on the next start.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=grace_seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        counts = self._repository.count_enrichment_jobs()
+        latencies = sorted(self._latencies)
+        return {
+            "queue_depth": counts.get("pending", 0),
+            "in_flight": self.in_flight,
+            "workers": self._workers,
+            "jobs_by_status": counts,
+            "outcomes": dict(self.outcomes),
+            "completion_latency_seconds": {
+                "samples": len(latencies),
+                "p50": _percentile(latencies, 0.50),
+                "p95": _percentile(latencies, 0.95),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self._backoff_max, self._backoff_base * 2 ** max(0, attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _worker(self, index: int) -> None:
+        while not self._stopping:
+            try:
+                job = await asyncio.to_thread(
+                    self._repository.claim_enrichment_job, self._lease_seconds
+                )
+            except Exception:
+                logger.exception("[enrichment] worker %d failed to claim a job", index)
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+                except TimeoutError:
+                    pass
+                continue
+            self.in_flight += 1
+            try:
+                await self._run(job)
+            except Exception:
+                # Recording the outcome failed (e.g. the database was locked); the
+                # job's lease expires and it is claimed again
+                logger.exception(
+                    "[enrichment] worker %d failed to record job %d | url=%s",
+                    index, job["id"], job["submission_url"],
+                )
+            finally:
+                self.in_flight -= 1
+
+    async def _run(self, job: dict) -> None:
+        url = job["submission_url"]
+        handler = self._handlers.get(job["content_type"])
+        if handler is None:
+            reason = f"no enrichment handler for content_type={job['content_type']!r}"
+            logger.warning("[enrichment] %s | url=%s", reason, url)
+            await asyncio.to_thread(
+                self._repository.finish_enrichment_job, job["id"], "failed", reason
+            )
+            self._record(job, "failed", "no_handler")
+            return
+
+        started = time.perf_counter()
+        try:
+            await handler(job, self._repository)
+        except Exception as exc:
+            await self._handle_failure(job, exc)
+            return
+        await asyncio.to_thread(self._repository.finish_enrichment_job, job["id"], "complete")
+        self._record(job, "complete", "ok")
+        self._latencies.append(_seconds_since(job["created_at"]))
+        logger.info(
+            "[enrichment] job complete | url=%s | attempt=%d | took=%.2fs",
+            url, job["attempts"], time.perf_counter() - started,
+        )
+
+    async def _handle_failure(self, job: dict, exc: Exception) -> None:
+        url = job["submission_url"]
+        error = str(exc) or type(exc).__name__
+        # Exception class names are a small, bounded set of label values
+        reason = "transient" if isinstance(exc, TransientEnrichmentError) else type(exc).__name__
+        if not isinstance(exc, TransientEnrichmentError):
+            logger.exception("[enrichment] handler crashed | url=%s", url)
+        if job["attempts"] >= self._max_attempts:
+            logger.error(
+                "[enrichment] giving up after %d attempts | url=%s | error=%s",
+                job["attempts"], url, error,
+            )
+            await asyncio.to_thread(
+                self._repository.finish_enrichment_job, job["id"], "failed", error
+            )
+            await asyncio.to_thread(self._repository.mark_enrichment_failed, url, error)
+            self._record(job, "failed", reason)
+            self._latencies.append(_seconds_since(job["created_at"]))
+            return
+        delay = self._backoff(job["attempts"])
+        logger.warning(
+            "[enrichment] retrying in %.0fs | url=%s | attempt=%d | error=%s",
+            delay, url, job["attempts"], error,
+        )
+        await asyncio.to_thread(self._repository.retry_enrichment_job, job["id"], delay, error)
+        self._record(job, "retried", reason)
+
+    def _record(self, job: dict, outcome: str, reason: str) -> None:
+        self.outcomes[outcome] += 1
+        ENRICHMENT_OUTCOMES.labels(str(job["content_type"]), outcome, reason).inc()
+
+
+def _seconds_since(sqlite_timestamp: str) -> float:
+    created = datetime.fromisoformat(sqlite_timestamp).replace(tzinfo=UTC)
+    return max(0.0, (datetime.now(UTC) - created).total_seconds())
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return round(sorted_values[index], 3)
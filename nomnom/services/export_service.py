@@ -0,0 +1,111 @@
+import importlib.util
+import json
+import zlib
+from collections.abc import Iterator
+
+from nomnom.repositories.base import AbstractSubmissionRepository
+
+EXPORT_FORMATS = ("jsonl", "parquet")
+
+EXPORT_MEDIA_TYPES = {
+    "jsonl": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_EXTENSIONS = {"jsonl": "jsonl.gz", "parquet": "parquet"}
+
+
+class ExportUnavailable(RuntimeError):
+    """The requested format needs an optional dependency that is not installed."""
+
+
+def _jsonl_gzip(chunks: Iterator[list[dict]]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for rows in chunks:
+        lines = []
+        for row in rows:
+            row["metadata"] = json.loads(row["metadata"] or "{}")
+            lines.append(json.dumps(row, ensure_ascii=False))
+        data = compressor.compress(("\n".join(lines) + "\n").encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _parquet(chunks: Iterator[list[dict]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    text = pa.string()
+    schema = pa.schema([
+        ("id", pa.int64()), ("url", text), ("domain", text), ("title", text),
+        ("content_type", text), ("metadata", text), ("enrichment_status", text),
+        ("enrichment_error", text), ("ingested_at", text), ("updated_at", text),
+        ("last_seen_at", text), ("content_markdown", text),
+    ])
+    sink = _ChunkSink()
+    # One row group per chunk: only the current chunk is ever held in memory
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def export_stream(
+    repository: AbstractSubmissionRepository,
+    fmt: str,
+    domain: str | None = None,
+    content_type: str | None = None,
+    enrichment_status: str | None = None,
+    updated_since: str | None = None,
+    chunk_size: int = 1000,
+) -> Iterator[bytes]:
+    """
+    Encoded export of matching submissions (gzip'd JSONL or Parquet), produced
+    chunk by chunk so memory stays flat regardless of table size.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format: {fmt!r}")
+    if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ExportUnavailable("parquet export requires the 'pyarrow' package")
+    chunks = repository.iter_submissions(
+        domain=domain,
+        content_type=content_type,
+        enrichment_status=enrichment_status,
+        updated_since=updated_since,
+        chunk_size=chunk_size,
+    )
+    return _parquet(chunks) if fmt == "parquet" else _jsonl_gzip(chunks)
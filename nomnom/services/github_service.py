@@ -1,8 +1,14 @@
+import asyncio
 import logging
+import time
 from urllib.parse import urlparse
 
 import httpx
 
+from nomnom.metrics import README_FETCH_SECONDS
+from nomnom.repositories.base import AbstractSubmissionRepository
+from nomnom.services.enrichment_worker import TransientEnrichmentError
+
 logger = logging.getLogger(__name__)
 
 BLOCKED_PREFIXES = {
@@ -12,6 +18,14 @@ BLOCKED_PREFIXES = {
 
 
 class GithubService:
+    def __init__(
+        self,
+        client: httpx.AsyncClient | None = None,
+        raw_base_url: str = "https://raw.githubusercontent.com",
+    ) -> None:
+        self._client = client
+        self._raw_base_url = raw_base_url.rstrip("/")
+
     def normalize_url(self, url: str) -> tuple[str, str, str] | None:
         """
         Parse a GitHub URL and return (canonical_url, owner, repo), or None if rejected.
@@ -29,15 +43,48 @@ class GithubService:
         canonical_url = f"https://github.com/{owner}/{repo}"
         return canonical_url, owner, repo
 
-    async def fetch_readme(self, owner: str, repo: str) -> str:
-        """Fetch README.md from raw.githubusercontent.com. Returns empty string on failure."""
-        url = f"https://raw.githubusercontent.com/{owner}/{repo}/HEAD/README.md"
+    def _readme_url(self, owner: str, repo: str) -> str:
+        return f"{self._raw_base_url}/{owner}/{repo}/HEAD/README.md"
+
+    async def enrich_job(self, job: dict, repository: AbstractSubmissionRepository) -> None:
+        """
+        Enrichment job handler for github_repo rows: fetch or revalidate the README.
+        Stored ETag/Last-Modified validators are sent as conditional headers, so an
+        unchanged README costs a 304 and a last_seen_at bump. A missing README
+        completes with empty content; network errors, 429s and 5xx are retried.
+        """
+        url = job["submission_url"]
+        metadata = job["metadata"]
+        owner, repo = metadata.get("owner"), metadata.get("repo")
+        if not owner or not repo:
+            await asyncio.to_thread(repository.mark_enrichment_failed, url, "missing owner/repo")
+            return
+        if self._client is None:
+            raise RuntimeError("GithubService.enrich_job requires a shared HTTP client")
+        headers = {}
+        if metadata.get("readme_etag"):
+            headers["If-None-Match"] = metadata["readme_etag"]
+        if metadata.get("readme_last_modified"):
+            headers["If-Modified-Since"] = metadata["readme_last_modified"]
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url)
-                if response.status_code == 200:
-                    return response.text
-                return ""
-        except Exception:
-            logger.debug("[github] README fetch failed for %s/%s", owner, repo)
-            return ""
+            response = await self._client.get(self._readme_url(owner, repo), headers=headers)
+        except httpx.HTTPError as exc:
+            raise TransientEnrichmentError(f"README fetch failed: {exc!r}") from exc
+        finally:
+            README_FETCH_SECONDS.observe(time.perf_counter() - started)
+
+        if response.status_code == 304:
+            await asyncio.to_thread(repository.touch_submission, url)
+            logger.info("[github] README not modified | repo=%s/%s", owner, repo)
+            return
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientEnrichmentError(f"README fetch returned HTTP {response.status_code}")
+        if response.status_code == 200:
+            readme = response.text
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        else:
+            readme, etag, last_modified = "", None, None
+        await asyncio.to_thread(repository.update_github_readme, url, readme, etag, last_modified)
+        logger.info("[github] README stored | repo=%s/%s | bytes=%d", owner, repo, len(readme))
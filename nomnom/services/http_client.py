@@ -0,0 +1,84 @@
+import asyncio
+import importlib.util
+import logging
+from collections import defaultdict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body wrapper that frees the host slot once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Caps concurrent requests per host on top of the pool-wide connection limits,
+    so one slow upstream cannot take every pooled connection.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, per_host: int) -> None:
+        self._transport = transport
+        self._semaphores: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(per_host)
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = self._semaphores[request.url.host]
+        await semaphore.acquire()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                semaphore.release()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_http_client(settings) -> httpx.AsyncClient:
+    """Build the app-scoped client shared by every outbound fetch."""
+    http2 = settings.HTTP2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+    return httpx.AsyncClient(
+        transport=HostLimitedTransport(transport, settings.HTTP_PER_HOST_CONCURRENCY),
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+        headers={"User-Agent": "nomnom-receiver"},
+    )
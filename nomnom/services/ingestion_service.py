@@ -1,82 +1,436 @@
+import asyncio
+import json
 import logging
+import time
+from collections.abc import AsyncIterator
 from urllib.parse import urlparse
 
-from nomnom.models.submission import Submission
+from nomnom.db.functions import content_hash
+from nomnom.metrics import CHECK_SUBMISSION_SECONDS, VALIDATION_SECONDS
+from nomnom.models.submission import Submission, UpsertOutcome
 from nomnom.repositories.base import AbstractSubmissionRepository
 from nomnom.schemas.ingest import IngestRequest, IngestResponse
+from nomnom.services.cpu_pool import CpuPool, InvalidPayload
+from nomnom.services.enrichment_worker import EnrichmentWorkerPool
 from nomnom.services.github_service import GithubService
+from nomnom.services.recent_submissions import RecentSubmissions
+from nomnom.services.url_canonicalizer import UrlCanonicalizer
+from nomnom.services.write_queue import WriteQueue
+from nomnom.services.youtube_service import (
+    DEFAULT_CACHE_TTL_SECONDS,
+    DEFAULT_NEGATIVE_CACHE_TTL_SECONDS,
+)
 
 logger = logging.getLogger(__name__)
 
 KNOWN_CONTENT_TYPES = {"reddit_thread", "github", "youtube_video", "generic_article", "placeholder"}
 
+_OUTCOME_RESPONSES = {
+    UpsertOutcome.INSERTED: ("saved", "Saved"),
+    UpsertOutcome.UPDATED: ("updated", "Updated"),
+    UpsertOutcome.UNCHANGED: ("unchanged", "Unchanged"),
+}
+
+
+class BodyReadError(Exception):
+    """The request body stream failed part way: over its size cap, or undecodable."""
+
 
 class SubmissionSkipped(Exception):
     pass
 
 
 class IngestionService:
-    def __init__(self, repository: AbstractSubmissionRepository) -> None:
+    def __init__(
+        self,
+        repository: AbstractSubmissionRepository,
+        write_queue: WriteQueue | None = None,
+        github: GithubService | None = None,
+        enrichment_workers: EnrichmentWorkerPool | None = None,
+        github_revalidate_seconds: int = 86400,
+        transcript_cache_ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+        transcript_negative_cache_ttl_seconds: int = DEFAULT_NEGATIVE_CACHE_TTL_SECONDS,
+        canonicalizer: UrlCanonicalizer | None = None,
+        recent: RecentSubmissions | None = None,
+        cpu_pool: CpuPool | None = None,
+    ) -> None:
         self._repository = repository
-        self._github = GithubService()
+        self._canonicalizer = canonicalizer or UrlCanonicalizer.default()
+        self._recent = recent
+        self._cpu_pool = cpu_pool or CpuPool(max_workers=0)
+        self._write_queue = write_queue
+        self._github = github or GithubService()
+        self._enrichment_workers = enrichment_workers
+        self._github_revalidate_seconds = github_revalidate_seconds
+        self._transcript_ttl = transcript_cache_ttl_seconds
+        self._transcript_negative_ttl = transcript_negative_cache_ttl_seconds
+
+    async def validate(self, body: bytes | str) -> IngestRequest:
+        """Parse and validate a payload, in a worker process if it is large."""
+        return await self._cpu_pool.validate(body)
 
     def check_submission(self, payload: IngestRequest) -> None:
         """Raises SubmissionSkipped if this submission should be silently ignored."""
-        content_type = payload.metadata.get("type", "placeholder")
-        if content_type == "reddit_thread":
-            path = urlparse(payload.url).path
-            if "/comments/" not in path:
-                raise SubmissionSkipped("Reddit non-post URL filtered")
+        started = time.perf_counter()
+        try:
+            content_type = payload.metadata.get("type", "placeholder")
+            if content_type == "reddit_thread":
+                path = urlparse(payload.url).path
+                if "/comments/" not in path:
+                    raise SubmissionSkipped("Reddit non-post URL filtered")
+        finally:
+            CHECK_SUBMISSION_SECONDS.observe(time.perf_counter() - started)
+
+    def _wake_enrichment_workers(self) -> None:
+        if self._enrichment_workers is not None:
+            self._enrichment_workers.notify()
 
     async def _ingest_github(self, payload: IngestRequest) -> IngestResponse:
-        """Handle GitHub repository ingestion. Returns saved or skipped response."""
-        result = self._github.normalize_url(payload.url)
+        """
+        Handle GitHub repository ingestion. Returns saved, queued or skipped response.
+        Only a placeholder row is written here; the README is fetched by an
+        enrichment job so the request never waits on the network. A stored repo
+        whose README was last confirmed longer ago than the revalidation interval
+        gets a conditional re-fetch queued.
+        """
+        result = self._github.normalize_url(self._canonicalizer.canonicalize(payload.url))
         if result is None:
             logger.info("[ingest] github url rejected | url=%s", payload.url)
             return IngestResponse(status="skipped", message="Not a valid GitHub repository URL")
         canonical_url, owner, repo = result
-        if self._repository.exists_by_url(canonical_url):
+        # Never answer from memory once a README revalidation would be due
+        if self._recent is not None and self._recent.seen(
+            canonical_url, max_age=self._github_revalidate_seconds
+        ):
+            logger.info("[ingest] github recent duplicate | url=%s", canonical_url)
+            return IngestResponse(status="skipped", message="Already saved")
+        due = None
+        if self._recent is None or self._recent.known(canonical_url) is not False:
+            due = await asyncio.to_thread(
+                self._repository.github_revalidation_due,
+                canonical_url,
+                self._github_revalidate_seconds,
+            )
+        if due is None:
+            # The same repository may be stored under a differently-cased URL
+            stored = await asyncio.to_thread(self._repository.find_by_github_repo, owner, repo)
+            if stored is not None:
+                logger.info(
+                    "[ingest] github repo stored under another url | url=%s | stored=%s",
+                    canonical_url, stored["url"],
+                )
+                canonical_url = stored["url"]
+                due = await asyncio.to_thread(
+                    self._repository.github_revalidation_due,
+                    canonical_url,
+                    self._github_revalidate_seconds,
+                )
+        if due is not None:
+            self._remember(canonical_url)
+            if due and await asyncio.to_thread(
+                self._repository.enqueue_revalidation, canonical_url
+            ):
+                self._wake_enrichment_workers()
+                logger.info("[ingest] github revalidation queued | url=%s", canonical_url)
+                return IngestResponse(status="queued", message="Revalidating README")
             logger.info("[ingest] github duplicate | url=%s", canonical_url)
             return IngestResponse(status="skipped", message="Already saved")
-        readme = await self._github.fetch_readme(owner, repo)
-        self._repository.insert_github_repo(canonical_url, owner, repo, readme)
-        logger.info("[ingest] github saved | url=%s", canonical_url)
+        inserted = await asyncio.to_thread(
+            self._repository.insert_github_placeholder, canonical_url, owner, repo
+        )
+        self._remember(canonical_url)
+        if not inserted:
+            # Lost a race with a concurrent post of the same repository
+            logger.info("[ingest] github duplicate | url=%s", canonical_url)
+            return IngestResponse(status="skipped", message="Already saved")
+        self._wake_enrichment_workers()
+        logger.info("[ingest] github saved, README queued | url=%s", canonical_url)
         return IngestResponse(status="saved", message="Saved")
 
-    async def ingest(self, payload: IngestRequest) -> IngestResponse:
+    def _match_stored_videos(self, submissions: list[Submission]) -> None:
         """
-        Persist a submission. Returns an IngestResponse with status saved/updated/skipped.
+        Point YouTube submissions at the row already holding their video, so a video
+        stored under another URL (or posted twice in one batch) is updated rather
+        than saved again.
         """
-        if payload.domain == "github.com":
-            return await self._ingest_github(payload)
+        urls: dict[str, str] = {}
+        for submission in submissions:
+            video_id = submission.metadata.get("video_id")
+            if submission.content_type != "youtube_video" or not video_id:
+                continue
+            if video_id not in urls:
+                stored = self._repository.find_by_video_id(video_id)
+                urls[video_id] = stored["url"] if stored is not None else submission.url
+            if urls[video_id] != submission.url:
+                logger.info(
+                    "[ingest] video stored under another url | url=%s | stored=%s",
+                    submission.url, urls[video_id],
+                )
+                submission.url = urls[video_id]
+                submission.prepared = None
+
+    def _apply_transcript_cache(self, submissions: list[Submission]) -> list[str]:
+        """
+        Fill YouTube submissions from the transcript cache, so a re-ingest keeps the
+        cached transcript (or cached failure) instead of the userscript's placeholder
+        content. Returns the URLs that still need an enrichment job.
+        """
+        videos = [
+            s for s in submissions
+            if s.content_type == "youtube_video" and s.metadata.get("video_id")
+        ]
+        if not videos:
+            return []
+        cached = self._repository.cached_transcripts(
+            [s.metadata["video_id"] for s in videos],
+            self._transcript_ttl,
+            self._transcript_negative_ttl,
+        )
+        needs_job = []
+        for submission in videos:
+            entry = cached.get(submission.metadata["video_id"])
+            if entry is None:
+                needs_job.append(submission.url)
+            else:
+                # The transcript itself lives in transcript_segments
+                submission.prepared = None
+                submission.content_markdown = None
+                submission.enrichment_status = "failed" if entry["error"] else "complete"
+                submission.enrichment_error = entry["error"]
+        return needs_job
 
+    def _remember(self, url: str, digest: str | None = None) -> None:
+        if self._recent is not None:
+            self._recent.add(url, digest)
+
+    def _build_submission(self, payload: IngestRequest) -> Submission:
         content_type = payload.metadata.get("type", "placeholder")
         if content_type not in KNOWN_CONTENT_TYPES:
             logger.info("[ingest] unknown content_type=%r, storing as placeholder", content_type)
             content_type = "placeholder"
-
-        is_youtube = content_type == "youtube_video"
-
-        submission = Submission(
-            url=payload.url,
+        return Submission(
+            # Canonical, so tracking parameters and host aliases don't create duplicates
+            url=self._canonicalizer.canonicalize(payload.url, content_type),
             domain=payload.domain,
             title=payload.title,
             content_markdown=payload.content_markdown,
             content_type=content_type,
             metadata=payload.metadata,
-            enrichment_status="pending" if is_youtube else "none",
+            enrichment_status="pending" if content_type == "youtube_video" else "none",
         )
 
-        is_insert = self._repository.upsert(submission)
+    async def ingest(self, payload: IngestRequest) -> IngestResponse:
+        """
+        Persist a submission. Returns an IngestResponse with status
+        saved/updated/unchanged/skipped.
+        """
+        if payload.domain == "github.com":
+            return await self._ingest_github(payload)
+
+        submission = self._build_submission(payload)
+        await self._cpu_pool.prepare([submission])
+        digest = None
+        if self._recent is not None:
+            digest = _digest(submission)
+            if self._recent.seen(submission.url, digest):
+                logger.info("[ingest] recent duplicate | url=%s", submission.url)
+                return IngestResponse(status="unchanged", message="Unchanged")
+        needs_job = []
+        if submission.content_type == "youtube_video":
+            await asyncio.to_thread(self._match_stored_videos, [submission])
+            needs_job = await asyncio.to_thread(self._apply_transcript_cache, [submission])
+
+        if self._write_queue is not None:
+            outcome = await self._write_queue.submit(submission)
+        else:
+            outcome = self._repository.upsert(submission)
+        self._remember(submission.url, digest)
 
         logger.info(
-            "[ingest] %s | url=%s | type=%s",
-            "new" if is_insert else "updated",
-            payload.url,
-            content_type,
+            "[ingest] %s | url=%s | type=%s", outcome, submission.url, submission.content_type
         )
 
-        return IngestResponse(
-            status="saved" if is_insert else "updated",
-            message="Saved" if is_insert else "Updated",
-        )
+        if needs_job:
+            try:
+                created = await asyncio.to_thread(
+                    self._repository.create_enrichment_job, submission.url
+                )
+            except Exception:
+                logger.exception(
+                    "[ingest] enrichment job creation failed | url=%s", submission.url
+                )
+            else:
+                if created:
+                    self._wake_enrichment_workers()
+
+        status, message = _OUTCOME_RESPONSES[outcome]
+        return IngestResponse(status=status, message=message)
+
+    async def ingest_ndjson(
+        self,
+        chunks: AsyncIterator[bytes],
+        batch_size: int = 1000,
+        max_line_bytes: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Bulk ingest an NDJSON stream of IngestRequest objects.
+
+        Lines are validated as they arrive and written `batch_size` at a time with
+        `upsert_many`, one transaction per batch. Yields one NDJSON result per input
+        line (`{"line", "status", "url"?, "message"?}`) once its batch is written.
+        A line longer than `max_line_bytes` is skipped with an error result. If
+        `chunks` raises BodyReadError, the lines before it are written and a final
+        error result ends the stream.
+        """
+        # Errors and skips wait in the batch too, so results come back in input order
+        batch: list[tuple[int, Submission | bytes]] = []
+        line_no = 0
+        lines = _iter_lines(chunks, max_line_bytes)
+        while True:
+            try:
+                line = await anext(lines)
+            except StopAsyncIteration:
+                break
+            except BodyReadError as exc:
+                batch.append((line_no + 1, _result_line(line_no + 1, "error", message=str(exc))))
+                break
+            line_no += 1
+            if line is None:
+                message = f"line exceeds {max_line_bytes} bytes"
+                batch.append((line_no, _result_line(line_no, "error", message=message)))
+                continue
+            if not line.strip():
+                continue
+            started = time.perf_counter()
+            try:
+                payload = await self._cpu_pool.validate(line)
+            except InvalidPayload as exc:
+                VALIDATION_SECONDS.observe(time.perf_counter() - started)
+                error = exc.errors[0]
+                message = f"{'.'.join(map(str, error['loc']))}: {error['msg']}".lstrip(": ")
+                batch.append((line_no, _result_line(line_no, "error", message=message)))
+                continue
+            VALIDATION_SECONDS.observe(time.perf_counter() - started)
+            try:
+                self.check_submission(payload)
+            except SubmissionSkipped as exc:
+                batch.append((line_no, _result_line(line_no, "skipped", payload.url, str(exc))))
+                continue
+            if payload.domain == "github.com":
+                async for result in self._write_batch(batch):
+                    yield result
+                batch = []
+                response = await self._ingest_github(payload)
+                yield _result_line(line_no, response.status, payload.url)
+                continue
+            batch.append((line_no, self._build_submission(payload)))
+            if len(batch) >= batch_size:
+                async for result in self._write_batch(batch):
+                    yield result
+                batch = []
+        async for result in self._write_batch(batch):
+            yield result
+
+    async def _write_batch(
+        self, batch: list[tuple[int, Submission | bytes]]
+    ) -> AsyncIterator[bytes]:
+        submissions = [item for _, item in batch if isinstance(item, Submission)]
+        outcomes: list[UpsertOutcome | Exception] | None = []
+        enrich_urls: list[str] = []
+        if submissions:
+            try:
+                await asyncio.to_thread(self._match_stored_videos, submissions)
+                # As posted, like ingest(): videos before the transcript cache fills them in
+                posted = [
+                    _digest(s) if self._recent is not None and s.content_type == "youtube_video"
+                    else None
+                    for s in submissions
+                ]
+                enrich_urls = await asyncio.to_thread(self._apply_transcript_cache, submissions)
+                await self._cpu_pool.prepare(submissions)
+                outcomes = await asyncio.to_thread(self._repository.upsert_many, submissions)
+            except Exception:
+                logger.exception("[bulk] batch write failed | size=%d", len(submissions))
+                outcomes = None
+            else:
+                failed = set()
+                for submission, digest, outcome in zip(submissions, posted, outcomes, strict=True):
+                    if isinstance(outcome, Exception):
+                        failed.add(submission.url)
+                    elif self._recent is not None:
+                        self._remember(submission.url, digest or _digest(submission))
+                enrich_urls = [url for url in enrich_urls if url not in failed]
+                logger.info("[bulk] batch written | size=%d", len(submissions))
+        if enrich_urls and outcomes is not None:
+            # The rows are committed; a failure here must not cut off their results
+            try:
+                await asyncio.to_thread(self._repository.create_enrichment_jobs, enrich_urls)
+            except Exception:
+                logger.exception(
+                    "[bulk] enrichment job creation failed | size=%d", len(enrich_urls)
+                )
+            else:
+                self._wake_enrichment_workers()
+        written = iter(outcomes or ())
+        for line_no, item in batch:
+            if not isinstance(item, Submission):
+                yield item
+            elif outcomes is None:
+                yield _result_line(line_no, "error", item.url, "write failed")
+            elif isinstance(outcome := next(written), Exception):
+                logger.error("[bulk] upsert failed | url=%s | error=%s", item.url, outcome)
+                yield _result_line(line_no, "error", item.url, "write failed")
+            else:
+                yield _result_line(line_no, _OUTCOME_RESPONSES[outcome][0], item.url)
+
+
+def _digest(submission: Submission) -> str:
+    """Hash of the submission as posted, before any transcript cache fill-in."""
+    if submission.prepared is not None:
+        return submission.prepared.content_hash
+    return content_hash(
+        submission.title, submission.content_markdown, json.dumps(submission.metadata)
+    )
+
+
+async def _iter_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int | None = None
+) -> AsyncIterator[bytes | None]:
+    """
+    Split a byte stream into lines without buffering more than one partial line,
+    of at most `max_line_bytes`. A longer line is discarded up to its newline and
+    yields None in its place.
+    """
+    buffer = bytearray()
+    overflow = False
+    async for chunk in chunks:
+        # Only the new bytes can contain the next newline
+        search_from = len(buffer)
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", search_from)) != -1:
+            if overflow or (max_line_bytes and end - start > max_line_bytes):
+                yield None
+                overflow = False
+            else:
+                yield bytes(buffer[start:end])
+            start = search_from = end + 1
+        del buffer[:start]
+        if max_line_bytes and len(buffer) > max_line_bytes:
+            overflow = True
+            buffer.clear()
+    if overflow:
+        yield None
+    elif buffer:
+        yield bytes(buffer)
+
+
+def _result_line(
+    line_no: int, status: str, url: str | None = None, message: str | None = None
+) -> bytes:
+    result: dict = {"line": line_no, "status": status}
+    if url is not None:
+        result["url"] = url
+    if message is not None:
+        result["message"] = message
+    return json.dumps(result).encode() + b"\n"
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime
+
+from nomnom.db import maintenance
+from nomnom.db.connection import ConnectionPool
+from nomnom.metrics import MAINTENANCE_RECLAIMED_BYTES, MAINTENANCE_SECONDS
+from nomnom.repositories.base import AbstractSubmissionRepository
+
+logger = logging.getLogger(__name__)
+
+TASKS = ("wal_checkpoint", "optimize", "prune_enrichment_jobs", "incremental_vacuum")
+
+
+class MaintenanceScheduler:
+    """
+    Periodic SQLite housekeeping on the pool's writer connection.
+
+    Every `interval_seconds` it truncates the WAL once it has grown past
+    `wal_checkpoint_bytes`, refreshes planner statistics every
+    `optimize_interval_seconds`, and, once no write has committed for
+    `idle_seconds`, returns free pages to the filesystem `vacuum_pages` at a time.
+    Given a repository and `job_retention_seconds`, it also deletes enrichment jobs
+    that finished longer ago than that, `prune_batch_size` rows per transaction.
+    Each step holds the writer lock only briefly, so ingestion interleaves with it.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        interval_seconds: float = 30,
+        wal_checkpoint_bytes: int = 64 * 1024 * 1024,
+        optimize_interval_seconds: float = 3600,
+        vacuum_pages: int = 256,
+        idle_seconds: float = 10,
+        repository: AbstractSubmissionRepository | None = None,
+        job_retention_seconds: int | None = None,
+        prune_batch_size: int = 1000,
+    ) -> None:
+        self._pool = pool
+        self._repository = repository
+        self._job_retention = job_retention_seconds
+        self._prune_batch_size = max(1, prune_batch_size)
+        self._interval = interval_seconds
+        self._wal_checkpoint_bytes = wal_checkpoint_bytes
+        self._optimize_interval = optimize_interval_seconds
+        self._vacuum_pages = max(1, vacuum_pages)
+        self._idle_seconds = idle_seconds
+        self._task: asyncio.Task | None = None
+        now = time.monotonic()
+        self._last_write = now
+        self._last_optimize = now
+
+        self.last_runs: dict[str, dict] = {}
+        self.totals = {task: {"runs": 0, "seconds": 0.0, "reclaimed_bytes": 0} for task in TASKS}
+        pool.add_commit_listener(self._on_commit)
+
+    @classmethod
+    def from_settings(
+        cls,
+        pool: ConnectionPool,
+        settings,
+        repository: AbstractSubmissionRepository | None = None,
+    ) -> "MaintenanceScheduler":
+        return cls(
+            pool,
+            repository=repository,
+            job_retention_seconds=settings.ENRICHMENT_JOB_RETENTION_SECONDS,
+            prune_batch_size=settings.ENRICHMENT_JOB_PRUNE_BATCH_SIZE,
+            interval_seconds=settings.MAINTENANCE_INTERVAL_SECONDS,
+            wal_checkpoint_bytes=settings.WAL_CHECKPOINT_THRESHOLD_BYTES,
+            optimize_interval_seconds=settings.OPTIMIZE_INTERVAL_SECONDS,
+            vacuum_pages=settings.INCREMENTAL_VACUUM_PAGES,
+            idle_seconds=settings.MAINTENANCE_IDLE_SECONDS,
+        )
+
+    def _on_commit(self) -> None:
+        self._last_write = time.monotonic()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop(), name="nomnom-maintenance")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        freelist, page_size, incremental = maintenance.free_pages(self._pool)
+        return {
+            "wal_bytes": maintenance.wal_bytes(self._pool),
+            "free_bytes": freelist * page_size,
+            "incremental_vacuum": incremental,
+            "last_runs": dict(self.last_runs),
+            "totals": {task: dict(totals) for task, totals in self.totals.items()},
+        }
+
+    def _record(self, task: str, seconds: float, reclaimed_bytes: int = 0, **extra) -> None:
+        MAINTENANCE_SECONDS.labels(task).observe(seconds)
+        MAINTENANCE_RECLAIMED_BYTES.labels(task).inc(reclaimed_bytes)
+        totals = self.totals[task]
+        totals["runs"] += 1
+        totals["seconds"] += seconds
+        totals["reclaimed_bytes"] += reclaimed_bytes
+        self.last_runs[task] = {
+            "finished_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "seconds": round(seconds, 4),
+            "reclaimed_bytes": reclaimed_bytes,
+            **extra,
+        }
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("[maintenance] run failed")
+
+    async def run_once(self, force: bool = False) -> None:
+        """One maintenance pass; `force` ignores the WAL threshold, schedule and idleness."""
+        if force or maintenance.wal_bytes(self._pool) > self._wal_checkpoint_bytes:
+            await self._checkpoint()
+        if force or time.monotonic() - self._last_optimize >= self._optimize_interval:
+            await self._optimize()
+        if self._repository is not None and self._job_retention is not None:
+            await self._prune_jobs()
+        await self._vacuum(force)
+
+    async def _checkpoint(self) -> None:
+        started = time.perf_counter()
+        busy, reclaimed = await asyncio.to_thread(maintenance.wal_checkpoint, self._pool)
+        seconds = time.perf_counter() - started
+        self._record("wal_checkpoint", seconds, reclaimed, busy=busy)
+        logger.info(
+            "[maintenance] wal checkpoint | busy=%s | reclaimed=%d | %.3fs",
+            busy, reclaimed, seconds,
+        )
+
+    async def _optimize(self) -> None:
+        started = time.perf_counter()
+        await asyncio.to_thread(maintenance.optimize, self._pool)
+        seconds = time.perf_counter() - started
+        self._last_optimize = time.monotonic()
+        self._record("optimize", seconds)
+        logger.info("[maintenance] optimize | %.3fs", seconds)
+
+    async def _prune_jobs(self) -> None:
+        started = time.perf_counter()
+        deleted = 0
+        while True:
+            batch = await asyncio.to_thread(
+                self._repository.prune_enrichment_jobs, self._job_retention, self._prune_batch_size
+            )
+            deleted += batch
+            if batch < self._prune_batch_size:
+                break
+        if deleted:
+            seconds = time.perf_counter() - started
+            self._record("prune_enrichment_jobs", seconds, rows=deleted)
+            logger.info("[maintenance] pruned enrichment jobs | rows=%d | %.3fs", deleted, seconds)
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self._last_write >= self._idle_seconds
+
+    async def _vacuum(self, force: bool) -> None:
+        if not (force or self._idle()):
+            return
+        freelist, page_size, incremental = await asyncio.to_thread(
+            maintenance.free_pages, self._pool
+        )
+        if not incremental or not freelist:
+            return
+        started = time.perf_counter()
+        freed = 0
+        # Small batches, re-checking idleness between them, so a burst of
+        # ingestion never waits behind a long vacuum
+        while freed < freelist and (force or self._idle()):
+            batch = await asyncio.to_thread(
+                maintenance.incremental_vacuum, self._pool, self._vacuum_pages
+            )
+            if not batch:
+                break
+            freed += batch
+        seconds = time.perf_counter() - started
+        self._record("incremental_vacuum", seconds, freed * page_size, pages=freed)
+        logger.info("[maintenance] incremental vacuum | pages=%d | %.3fs", freed, seconds)
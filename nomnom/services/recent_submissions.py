@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+
+from nomnom.metrics import BLOOM_ABSENT, BLOOM_MAYBE, RECENT_HITS, RECENT_MISSES
+from nomnom.repositories.base import AbstractSubmissionRepository
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Set of strings with no false negatives and about `error_rate` false positives
+    once `capacity` items are in it. Memory is fixed at construction.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._bits = bytearray((bits + 7) // 8)
+        self._size = len(self._bits) * 8
+        self._hashes = max(1, round(self._size / max(1, capacity) * math.log(2)))
+        # Setting a bit is a read-modify-write of its byte; the loader thread and
+        # the event loop both add
+        self._lock = threading.Lock()
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self._size for i in range(self._hashes))
+
+    def add(self, item: str) -> None:
+        positions = list(self._positions(item))
+        added = False
+        with self._lock:
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not self._bits[position >> 3] & mask:
+                    self._bits[position >> 3] |= mask
+                    added = True
+            # Re-adding a member sets no new bit, so count approximates distinct items
+            self.count += added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+class RecentSubmissions:
+    """
+    In-memory duplicate checks in front of the database.
+
+    `seen()` answers "was this URL ingested with this content in the last
+    `ttl_seconds`?" from an LRU of at most `max_entries` URLs, so the userscript
+    re-posting a page on every SPA navigation costs no database round trip. An
+    entry expires `ttl_seconds` after it was written, not after its last hit, so
+    a page re-posted continuously still refreshes last_seen_at once per window.
+
+    `known()` consults a Bloom filter of every stored URL, loaded in the
+    background by `start()`: False means the URL was never stored, so the
+    existence lookup can be skipped. Until loading finishes it answers None.
+    Both structures are touched from the event loop only, apart from the loader.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 300,
+        bloom_capacity: int = 1_000_000,
+        bloom_error_rate: float = 0.01,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[str, tuple[str | None, float]] = OrderedDict()
+        self._bloom = (
+            BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity > 0 else None
+        )
+        self._bloom_capacity = bloom_capacity
+        self._bloom_ready = False
+        self._task: asyncio.Task | None = None
+        self.counts = {"hits": 0, "misses": 0, "bloom_absent": 0, "bloom_maybe": 0}
+
+    @classmethod
+    def from_settings(cls, settings) -> "RecentSubmissions":
+        return cls(
+            max_entries=settings.RECENT_URL_CACHE_SIZE,
+            ttl_seconds=settings.RECENT_URL_TTL_SECONDS,
+            bloom_capacity=settings.URL_BLOOM_CAPACITY,
+            bloom_error_rate=settings.URL_BLOOM_ERROR_RATE,
+        )
+
+    def start(self, repository: AbstractSubmissionRepository) -> None:
+        if self._bloom is not None and self._task is None:
+            self._task = asyncio.create_task(self._load(repository), name="nomnom-url-bloom")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _load(self, repository: AbstractSubmissionRepository) -> None:
+        started = time.perf_counter()
+        chunks = repository.iter_urls()
+        try:
+            while await asyncio.to_thread(self._load_chunk, chunks):
+                pass
+        except Exception:
+            logger.exception("[dedupe] bloom filter load failed; falling back to the database")
+            return
+        self._bloom_ready = True
+        logger.info(
+            "[dedupe] bloom filter loaded | urls=%d | bytes=%d | %.1fs",
+            self._bloom.count, self._bloom.nbytes, time.perf_counter() - started,
+        )
+        if self._bloom.count > self._bloom_capacity:
+            logger.warning(
+                "[dedupe] %d URLs exceed URL_BLOOM_CAPACITY=%d; false positives will rise",
+                self._bloom.count, self._bloom_capacity,
+            )
+
+    def _load_chunk(self, chunks: Iterator[list[str]]) -> bool:
+        urls = next(chunks, None)
+        if urls is None:
+            return False
+        for url in urls:
+            self._bloom.add(url)
+        return True
+
+    def seen(self, url: str, digest: str | None = None, max_age: float | None = None) -> bool:
+        """
+        True if `url` was added with the same digest less than ttl_seconds (or
+        `max_age`, if shorter) ago.
+        """
+        entry = self._entries.get(url)
+        if entry is not None:
+            age = time.monotonic() - entry[1]
+            if age >= self._ttl:
+                del self._entries[url]
+            elif entry[0] == digest and (max_age is None or age < max_age):
+                self._entries.move_to_end(url)
+                self.counts["hits"] += 1
+                RECENT_HITS.inc()
+                return True
+        self.counts["misses"] += 1
+        RECENT_MISSES.inc()
+        return False
+
+    def known(self, url: str) -> bool | None:
+        """False if `url` was never stored; None if the filter is disabled or loading."""
+        if self._bloom is None or not self._bloom_ready:
+            return None
+        if url in self._bloom:
+            self.counts["bloom_maybe"] += 1
+            BLOOM_MAYBE.inc()
+            return True
+        self.counts["bloom_absent"] += 1
+        BLOOM_ABSENT.inc()
+        return False
+
+    def add(self, url: str, digest: str | None = None) -> None:
+        """Record that `url` is stored with content `digest`."""
+        if self._bloom is not None:
+            self._bloom.add(url)
+        if self._max_entries <= 0:
+            return
+        self._entries[url] = (digest, time.monotonic())
+        self._entries.move_to_end(url)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            **self.counts,
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "bloom_ready": self._bloom_ready,
+            "bloom_urls": self._bloom.count if self._bloom is not None else 0,
+            "bloom_bytes": self._bloom.nbytes if self._bloom is not None else 0,
+        }
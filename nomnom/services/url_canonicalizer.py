@@ -0,0 +1,154 @@
+import re
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+from urllib.parse import SplitResult, urlsplit, urlunsplit
+
+# A rule maps a split URL to its canonical form. Rules must be idempotent: the
+# merge command re-canonicalizes URLs that earlier rules already rewrote.
+Rule = Callable[[SplitResult], SplitResult]
+
+TRACKING_PARAM = re.compile(
+    r"utm_\w+|fbclid|gclid|dclid|msclkid|yclid|mc_cid|mc_eid|igshid|_hsenc|_hsmi",
+    re.IGNORECASE,
+)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+REDDIT_HOSTS = (
+    "reddit.com", "www.reddit.com", "old.reddit.com", "new.reddit.com",
+    "np.reddit.com", "m.reddit.com", "i.reddit.com",
+)
+# /r/<subreddit>/comments/<post id>, then an optional slug and comment id
+_REDDIT_THREAD = re.compile(r"/r/([^/]+)/comments/([a-z0-9]+)", re.IGNORECASE)
+
+YOUTUBE_HOSTS = ("youtube.com", "www.youtube.com", "m.youtube.com", "youtu.be")
+_YOUTUBE_ID = re.compile(r"[A-Za-z0-9_-]{11}")
+_YOUTUBE_PATH = re.compile(r"/(?:shorts|live|embed)/([A-Za-z0-9_-]{11})")
+
+GITHUB_HOSTS = ("github.com", "www.github.com")
+
+
+def normalize(url: SplitResult) -> SplitResult:
+    """
+    Lowercase scheme and host, drop default ports, credentials and fragments, and
+    strip tracking parameters. Hash-bang (#!, #/) fragments are routes and are kept.
+    """
+    scheme = url.scheme.lower()
+    host = url.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = url.port
+    except ValueError:
+        port = None
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    fragment = url.fragment if url.fragment[:1] in ("!", "/") else ""
+    return SplitResult(scheme, host, url.path or "/", strip_tracking(url.query), fragment)
+
+
+def strip_tracking(query: str) -> str:
+    """Drop tracking parameters, leaving the rest of the query byte-for-byte intact."""
+    if not query:
+        return query
+    pairs = query.split("&")
+    kept = [p for p in pairs if p and not TRACKING_PARAM.fullmatch(p.split("=", 1)[0])]
+    return query if len(kept) == len(pairs) else "&".join(kept)
+
+
+def reddit_thread(url: SplitResult) -> SplitResult:
+    """
+    One URL per thread: https://www.reddit.com/r/<subreddit>/comments/<id>/. The
+    old/np/mobile hosts, title slugs, comment permalinks and query strings
+    (share ids, ?context=, ?sort=) all collapse into it.
+    """
+    match = _REDDIT_THREAD.match(url.path)
+    if match is None:
+        if url.hostname not in REDDIT_HOSTS:
+            return url
+        return url._replace(scheme="https", netloc="www.reddit.com")
+    subreddit, post_id = match.groups()
+    path = f"/r/{subreddit.lower()}/comments/{post_id.lower()}/"
+    return SplitResult("https", "www.reddit.com", path, "", "")
+
+
+def youtube_video(url: SplitResult) -> SplitResult:
+    """youtu.be, /shorts/, /live/, /embed/ and ?v= links become /watch?v=<id> alone."""
+    video_id = None
+    if url.hostname == "youtu.be":
+        video_id = url.path.lstrip("/").split("/", 1)[0]
+    elif url.path == "/watch":
+        for pair in url.query.split("&"):
+            key, _, value = pair.partition("=")
+            if key == "v":
+                video_id = value
+                break
+    elif match := _YOUTUBE_PATH.match(url.path):
+        video_id = match.group(1)
+    if video_id is None or not _YOUTUBE_ID.fullmatch(video_id):
+        return url
+    return SplitResult("https", "www.youtube.com", "/watch", f"v={video_id}", "")
+
+
+def github_repo(url: SplitResult) -> SplitResult:
+    """Bare github.com host without a query; GithubService trims the path."""
+    return SplitResult("https", "github.com", url.path, "", "")
+
+
+class UrlCanonicalizer:
+    """
+    Pipeline of canonicalization rules applied to a URL before it is stored.
+
+    Generic rules run on every http(s) URL; rules registered for a host or a
+    content_type run after them, host rules first. Each distinct (url,
+    content_type) is canonicalized once and then served from an LRU cache of
+    `cache_size` entries, since the same pages are posted over and over.
+    """
+
+    def __init__(self, cache_size: int = 4096) -> None:
+        self._generic: list[Rule] = []
+        self._by_host: dict[str, list[Rule]] = {}
+        self._by_type: dict[str, list[Rule]] = {}
+        self.canonicalize = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    @classmethod
+    def default(cls, cache_size: int = 4096) -> "UrlCanonicalizer":
+        canonicalizer = cls(cache_size)
+        canonicalizer.register(normalize)
+        canonicalizer.register(reddit_thread, hosts=REDDIT_HOSTS, content_types=("reddit_thread",))
+        canonicalizer.register(youtube_video, hosts=YOUTUBE_HOSTS, content_types=("youtube_video",))
+        canonicalizer.register(github_repo, hosts=GITHUB_HOSTS)
+        return canonicalizer
+
+    @classmethod
+    def from_settings(cls, settings) -> "UrlCanonicalizer":
+        return cls.default(settings.URL_CANONICAL_CACHE_SIZE)
+
+    def register(
+        self, rule: Rule, hosts: Iterable[str] = (), content_types: Iterable[str] = ()
+    ) -> None:
+        """Add a rule for the given hosts and/or content types, or for every URL."""
+        hosts, content_types = tuple(hosts), tuple(content_types)
+        if not hosts and not content_types:
+            self._generic.append(rule)
+        for host in hosts:
+            self._by_host.setdefault(host.lower(), []).append(rule)
+        for content_type in content_types:
+            self._by_type.setdefault(content_type, []).append(rule)
+        self.canonicalize.cache_clear()
+
+    def _canonicalize(self, url: str, content_type: str | None = None) -> str:
+        try:
+            parts = urlsplit(url.strip())
+        except ValueError:
+            return url
+        if parts.scheme.lower() not in _DEFAULT_PORTS or not parts.hostname:
+            return url
+        for rule in self._generic:
+            parts = rule(parts)
+        # A rule registered for both the host and the content_type runs once
+        specific = dict.fromkeys(
+            (*self._by_host.get(parts.hostname or "", ()), *self._by_type.get(content_type, ()))
+        )
+        for rule in specific:
+            parts = rule(parts)
+        return urlunsplit(parts)
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+
+from nomnom.models.submission import Submission, UpsertOutcome
+from nomnom.repositories.base import AbstractSubmissionRepository
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteQueueClosed(RuntimeError):
+    pass
+
+
+class WriteQueue:
+    """
+    Single-writer group commit for submission upserts.
+
+    Callers await `submit()`; one drain task collects pending submissions for up to
+    `max_delay_ms` or `max_batch` items and applies them with `upsert_many` in one
+    transaction, so a burst of ingests costs one commit instead of one per request.
+    A submission that fails to write fails only its own caller.
+    """
+
+    def __init__(
+        self,
+        repository: AbstractSubmissionRepository,
+        max_batch: int = 100,
+        max_delay_ms: float = 20,
+    ) -> None:
+        self._repository = repository
+        self._max_batch = max(1, max_batch)
+        self._max_delay = max_delay_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="nomnom-write-queue")
+
+    async def stop(self) -> None:
+        """Stop accepting submissions and wait until everything queued is written."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, submission: Submission) -> UpsertOutcome:
+        """Queue a submission and wait for its batch to commit."""
+        if self._closed:
+            raise WriteQueueClosed("write queue is shut down")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((submission, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self._max_delay
+            while len(batch) < self._max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[Submission, asyncio.Future]]) -> None:
+        submissions = [submission for submission, _ in batch]
+        try:
+            results = await asyncio.to_thread(self._repository.upsert_many, submissions)
+        except Exception as exc:
+            logger.exception("[write-queue] batch failed | size=%d", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        logger.debug("[write-queue] batch committed | size=%d", len(batch))
+        for (submission, future), outcome in zip(batch, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                logger.error(
+                    "[write-queue] upsert failed | url=%s | error=%s", submission.url, outcome
+                )
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
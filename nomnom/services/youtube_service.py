@@ -1,83 +1,159 @@
 import asyncio
 import logging
+import time
+from collections.abc import Iterable
+from typing import NamedTuple
 
 from youtube_transcript_api import YouTubeTranscriptApi
 
+from nomnom.metrics import TRANSCRIPT_FETCH_SECONDS
 from nomnom.repositories.base import AbstractSubmissionRepository
+from nomnom.services.enrichment_worker import TransientEnrichmentError
 
 logger = logging.getLogger(__name__)
 
 # Error class names vary across youtube-transcript-api versions; catch by name to be safe.
 _NO_TRANSCRIPT_ERRORS = ("NoTranscriptFound", "TranscriptsDisabled", "NoTranscriptAvailable")
+# Failures that will not go away on retry; anything else is treated as transient.
+_PERMANENT_ERRORS = (
+    "VideoUnavailable", "VideoUnplayable", "InvalidVideoId", "AgeRestricted",
+)
 
 
 def _is_no_transcript_error(exc: Exception) -> bool:
     return type(exc).__name__ in _NO_TRANSCRIPT_ERRORS
 
 
-class YouTubeService:
-    def fetch_transcript(self, video_id: str) -> str:
-        """
-        Fetch transcript text for a YouTube video.
-        Tries English first, then falls back to any available language.
-        Returns joined plain text. Raises if no transcript can be fetched.
-        """
-        api = YouTubeTranscriptApi()
-        try:
-            transcript = api.fetch(video_id, languages=["en"])
-            return " ".join(seg.text for seg in transcript)
-        except Exception as first_exc:
-            if not _is_no_transcript_error(first_exc):
-                raise
-            logger.debug("[youtube] no English transcript | video_id=%s | trying any language", video_id)
-
-        # Fallback: any available language
-        transcript_list = api.list(video_id)
-        available = list(transcript_list)
-        if not available:
-            raise RuntimeError(f"No transcripts available for video_id={video_id}")
-        transcript = available[0].fetch()
-        return " ".join(seg.text for seg in transcript)
-
-    def enrich(self, video_id: str) -> tuple[str | None, str | None]:
-        """
-        Returns (transcript_markdown, error_string). Never raises.
-        """
-        try:
-            transcript = self.fetch_transcript(video_id)
-            word_count = len(transcript.split())
-            logger.info("[youtube] transcript fetched | video_id=%s | words=%d", video_id, word_count)
-            return f"## Transcript\n\n{transcript}", None
-        except Exception as exc:
-            if _is_no_transcript_error(exc):
-                logger.info("[youtube] no transcript available | video_id=%s | reason=%s", video_id, exc)
-                return None, f"no transcript available: {exc}"
-            logger.error("[youtube] enrichment failed | video_id=%s | error=%s", video_id, exc)
-            return None, str(exc)
-
-
-async def enrich_youtube_submission(
-    url: str, video_id: str, repository: AbstractSubmissionRepository
-) -> None:
-    """Background task: enrich a YouTube submission and update the repository."""
+def _is_permanent_error(exc: Exception) -> bool:
+    return type(exc).__name__ in _PERMANENT_ERRORS
+
+
+# Defaults for the transcript cache; the app passes TRANSCRIPT_CACHE_* settings
+DEFAULT_CACHE_TTL_SECONDS = 30 * 86400
+DEFAULT_NEGATIVE_CACHE_TTL_SECONDS = 86400
+
+
+# Captions are a few seconds each; they are stored merged into segments of about
+# this length, which keeps a multi-word search within one segment's text
+SEGMENT_SECONDS = 30.0
+
+
+class TranscriptSegment(NamedTuple):
+    start: float
+    duration: float
+    text: str
+
+
+def merge_segments(
+    captions: Iterable[TranscriptSegment], seconds: float = SEGMENT_SECONDS
+) -> list[TranscriptSegment]:
+    """
+    Merge consecutive captions into segments spanning up to `seconds` each. A
+    segment's text is its captions joined by spaces, as in the rendered transcript.
+    """
+    segments, texts, start, end = [], [], 0.0, 0.0
+    for caption in captions:
+        if texts and caption.start + caption.duration - start > seconds:
+            segments.append(TranscriptSegment(start, end - start, " ".join(texts)))
+            texts = []
+        if not texts:
+            start = end = caption.start
+        texts.append(caption.text)
+        end = max(end, caption.start + caption.duration)
+    if texts:
+        segments.append(TranscriptSegment(start, end - start, " ".join(texts)))
+    return segments
+
+
+def _captions(transcript) -> list[TranscriptSegment]:
+    return [TranscriptSegment(seg.start, seg.duration, seg.text) for seg in transcript]
+
+
+def fetch_transcript(video_id: str) -> tuple[list[TranscriptSegment], str]:
+    """
+    Fetch the timed captions of a YouTube video.
+    Tries English first, then falls back to any available language.
+    Returns (captions, language code). Raises if no transcript can be fetched.
+    """
+    api = YouTubeTranscriptApi()
     try:
-        content_markdown, error = await asyncio.to_thread(
-            YouTubeService().enrich, video_id
+        transcript = api.fetch(video_id, languages=["en"])
+        return _captions(transcript), transcript.language_code
+    except Exception as first_exc:
+        if not _is_no_transcript_error(first_exc):
+            raise
+        logger.debug(
+            "[youtube] no English transcript | video_id=%s | trying any language", video_id
         )
-    except Exception as exc:
-        logger.exception("[youtube] background task crashed | video_id=%s | url=%s", video_id, url)
-        error = str(exc)
-        content_markdown = None
 
-    try:
-        repository.update_submission_content(
-            url=url,
-            content_markdown=content_markdown,
-            enrichment_status="failed" if error else "complete",
-            enrichment_error=error,
+    # Fallback: any available language
+    transcript_list = api.list(video_id)
+    available = list(transcript_list)
+    if not available:
+        raise RuntimeError(f"No transcripts available for video_id={video_id}")
+    transcript = available[0].fetch()
+    return _captions(transcript), transcript.language_code
+
+
+async def enrich_youtube_job(
+    job: dict,
+    repository: AbstractSubmissionRepository,
+    cache_ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+    negative_cache_ttl_seconds: int = DEFAULT_NEGATIVE_CACHE_TTL_SECONDS,
+) -> None:
+    """
+    Enrichment job handler for youtube_video submissions.
+    Stores the transcript as timed segments, or records a permanent failure;
+    raises TransientEnrichmentError for anything worth retrying. The submission's
+    content_markdown is left NULL and rendered from the segments on read. A fresh
+    transcript_cache entry (a stored transcript, or a cached "no transcript" failure
+    with its shorter TTL) is used without calling the transcript API.
+    """
+    url = job["submission_url"]
+    video_id = job["metadata"].get("video_id")
+    if not video_id:
+        await asyncio.to_thread(
+            repository.update_submission_content, url, None, "failed", "missing video_id"
+        )
+        return
+
+    cached = (await asyncio.to_thread(
+        repository.cached_transcripts, [video_id], cache_ttl_seconds, negative_cache_ttl_seconds
+    )).get(video_id)
+    if cached is not None:
+        logger.info(
+            "[youtube] transcript cache hit | video_id=%s | negative=%s",
+            video_id, cached["error"] is not None,
+        )
+        status = "failed" if cached["error"] is not None else "complete"
+        await asyncio.to_thread(
+            repository.update_submission_content, url, None, status, cached["error"]
         )
-        repository.update_enrichment_job_status(
-            url, "failed" if error else "complete", failure_reason=error
+        return
+
+    started = time.perf_counter()
+    try:
+        captions, language = await asyncio.to_thread(fetch_transcript, video_id)
+    except Exception as exc:
+        TRANSCRIPT_FETCH_SECONDS.observe(time.perf_counter() - started)
+        if _is_no_transcript_error(exc):
+            error = f"no transcript available: {exc}"
+        elif _is_permanent_error(exc):
+            error = str(exc)
+        else:
+            raise TransientEnrichmentError(str(exc)) from exc
+        logger.info(
+            "[youtube] enrichment failed permanently | video_id=%s | reason=%s", video_id, error
         )
-    except Exception:
-        logger.exception("[youtube] failed to persist enrichment result | url=%s", url)
+        await asyncio.to_thread(repository.store_transcript, video_id, None, error=error)
+        await asyncio.to_thread(repository.update_submission_content, url, None, "failed", error)
+        return
+
+    TRANSCRIPT_FETCH_SECONDS.observe(time.perf_counter() - started)
+    segments = merge_segments(captions)
+    logger.info(
+        "[youtube] transcript fetched | video_id=%s | captions=%d | segments=%d",
+        video_id, len(captions), len(segments),
+    )
+    await asyncio.to_thread(repository.store_transcript, video_id, segments, language)
+    await asyncio.to_thread(repository.update_submission_content, url, None, "complete")
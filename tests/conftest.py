@@ -0,0 +1,21 @@
+import pytest
+
+from nomnom.db.connection import run_migrations
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import SubmissionRepository
+
+
+def make_submission(url: str = "https://example.com/a", **fields) -> Submission:
+    """A generic_article on example.com titled "t"; keyword arguments override any field."""
+    values = {"domain": "example.com", "content_type": "generic_article", "title": "t"}
+    return Submission(url=url, **{**values, **fields})
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """A SubmissionRepository over a freshly migrated database."""
+    db_path = str(tmp_path / "repository.db")
+    run_migrations(db_path)
+    repo = SubmissionRepository(db_path)
+    yield repo
+    repo.close()
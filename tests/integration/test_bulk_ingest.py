@@ -0,0 +1,103 @@
+"""Integration tests for NDJSON bulk ingestion."""
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from nomnom.db.connection import run_migrations
+from nomnom.main import create_app
+from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.services.ingestion_service import IngestionService
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "bulk.db")
+    run_migrations(path)
+    return path
+
+
+@pytest.fixture
+def client(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", str(tmp_path / "nomnom.db"))
+    app = create_app()
+    with TestClient(app) as c:
+        app.state.repository = SubmissionRepository(db_path)
+        app.state.ingestion_service = IngestionService(app.state.repository)
+        yield c
+
+
+def _ndjson(*items) -> bytes:
+    return "\n".join(i if isinstance(i, str) else json.dumps(i) for i in items).encode()
+
+
+def _post(client, body: bytes) -> list[dict]:
+    response = client.post("/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def _article(i: int, title: str = "t") -> dict:
+    return {
+        "url": f"https://example.com/{i}", "domain": "example.com", "title": title,
+        "content_markdown": "body", "metadata": {"type": "generic_article"},
+    }
+
+
+def test_bulk_reports_per_line_results(client, db_path):
+    body = _ndjson(
+        _article(1),
+        "",
+        "{not json",
+        {"url": "https://www.reddit.com/r/python/", "domain": "www.reddit.com",
+         "metadata": {"type": "reddit_thread"}},
+        _article(1),
+        _article(1, title="changed"),
+        {"url": "", "domain": "example.com"},
+    )
+    results = _post(client, body)
+
+    assert [(r["line"], r["status"]) for r in results] == [
+        (1, "saved"), (3, "error"), (4, "skipped"), (5, "unchanged"), (6, "updated"), (7, "error"),
+    ]
+    assert "url" in results[-1]["message"]
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT title FROM submissions").fetchall() == [("changed",)]
+    conn.close()
+
+
+def test_bulk_writes_in_batches(client, db_path, monkeypatch):
+    monkeypatch.setattr("nomnom.api.routes.settings.BULK_BATCH_SIZE", 10)
+    repository = client.app.state.repository
+    calls = []
+    upsert_many = repository.upsert_many
+    monkeypatch.setattr(repository, "upsert_many", lambda s: calls.append(len(s)) or upsert_many(s))
+
+    results = _post(client, _ndjson(*(_article(i) for i in range(25))))
+
+    assert calls == [10, 10, 5]
+    assert [r["status"] for r in results] == ["saved"] * 25
+
+
+def test_bulk_queues_youtube_enrichment(client, db_path):
+    item = {"url": "https://www.youtube.com/watch?v=abc&t=1", "domain": "www.youtube.com",
+            "metadata": {"type": "youtube_video", "video_id": "abc"}}
+    results = _post(client, _ndjson(item))
+    assert results[0]["url"] == "https://www.youtube.com/watch?v=abc"
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT submission_url FROM enrichment_jobs").fetchall() == [
+        ("https://www.youtube.com/watch?v=abc",)
+    ]
+    conn.close()
+
+
+def test_bulk_results_survive_failed_job_creation(client, monkeypatch):
+    def fail(urls):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(client.app.state.repository, "create_enrichment_jobs", fail)
+    item = {"url": "https://www.youtube.com/watch?v=abc", "domain": "www.youtube.com",
+            "metadata": {"type": "youtube_video", "video_id": "abc"}}
+    results = _post(client, _ndjson(item, _article(1)))
+    assert [r["status"] for r in results] == ["saved", "saved"]
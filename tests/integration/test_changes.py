@@ -0,0 +1,81 @@
+"""Integration tests for the change feed."""
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from nomnom.db.connection import run_migrations
+from nomnom.main import create_app
+from nomnom.repositories.submission_repository import SubmissionRepository
+from tests.conftest import make_submission
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "nomnom.db")
+    # Rows written before the change log existed are backfilled as inserts
+    run_migrations(db_path)
+    repository = SubmissionRepository(db_path)
+    with repository._pool.writer() as conn:
+        conn.execute("DELETE FROM _schema_migrations WHERE filename = '008_change_log.sql'")
+        for trigger in ("ai", "ad", "au"):
+            conn.execute(f"DROP TRIGGER submission_changes_{trigger}")
+        conn.execute("DROP TABLE submission_changes")
+        conn.execute(
+            "INSERT INTO submissions (url, domain, content_type) "
+            "VALUES ('https://example.com/old', 'example.com', 'generic_article')"
+        )
+    repository.close()
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", db_path)
+    with TestClient(create_app()) as c:
+        yield c
+
+
+def _changes(client, **params) -> dict:
+    response = client.get("/changes", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_change_log_records_writes_in_order(client):
+    repository = client.app.state.repository
+    repository.upsert(make_submission("https://example.com/1"))
+    repository.upsert(make_submission("https://example.com/1"))  # unchanged: not a change
+    repository.upsert(make_submission("https://example.com/1", title="edited"))
+    repository.touch_submission("https://example.com/1")
+    repository.mark_enrichment_failed("https://example.com/1", "boom")
+    with client.app.state.db_pool.writer() as conn:
+        conn.execute("DELETE FROM submissions WHERE url = 'https://example.com/old'")
+
+    body = _changes(client, limit=3)
+    assert [(c["op"], c["url"]) for c in body["changes"]] == [
+        ("insert", "https://example.com/old"),
+        ("insert", "https://example.com/1"),
+        ("update", "https://example.com/1"),
+    ]
+    rest = _changes(client, after=body["next_after"])
+    assert [c["op"] for c in rest["changes"]] == ["update", "delete"]
+    assert rest["changes"][-1]["submission_id"] == 1
+    assert _changes(client, after=rest["next_after"]) == {
+        "changes": [], "next_after": rest["next_after"]
+    }
+
+
+def test_long_poll_returns_when_a_change_commits(client):
+    after = _changes(client)["next_after"]
+    timer = threading.Timer(0.2, client.app.state.repository.upsert, (make_submission("https://example.com/2"),))
+    timer.start()
+    started = time.monotonic()
+    body = _changes(client, after=after, wait=10)
+    assert time.monotonic() - started < 5
+    assert [c["url"] for c in body["changes"]] == ["https://example.com/2"]
+    timer.join()
+
+
+def test_long_poll_times_out_empty(client):
+    after = _changes(client)["next_after"]
+    started = time.monotonic()
+    assert _changes(client, after=after, wait=0.3)["changes"] == []
+    assert time.monotonic() - started >= 0.3
+
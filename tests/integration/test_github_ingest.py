@@ -2,7 +2,6 @@
 import sqlite3
 import tempfile
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -50,7 +49,8 @@ def db_path():
 
 
 @pytest.fixture
-def client(db_path):
+def client(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", str(tmp_path / "nomnom.db"))
     app = create_app()
     # Override lifespan state directly
     with TestClient(app, raise_server_exceptions=True) as c:
@@ -60,17 +60,10 @@ def client(db_path):
         yield c
 
 
-def _mock_readme(content: str = "# README"):
-    """Patch GithubService.fetch_readme to return a fixed string."""
-    mock = AsyncMock(return_value=content)
-    return patch("nomnom.services.github_service.GithubService.fetch_readme", mock)
-
-
 # T009: POST bare repo URL → saved, record has correct fields
 def test_save_github_repo(client):
     db = client.app_state_db_path
-    with _mock_readme("# My Readme"):
-        response = client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
+    response = client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "saved"
@@ -88,9 +81,8 @@ def test_save_github_repo(client):
 # T009: POST same URL twice → second is skipped, count unchanged
 def test_duplicate_github_repo(client):
     db = client.app_state_db_path
-    with _mock_readme():
-        client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
-        response = client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
+    client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
+    response = client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
     assert response.json()["status"] == "skipped"
     assert _count_records(db, "https://github.com/owner/repo") == 1
 
@@ -114,11 +106,10 @@ def test_orgs_url_skipped(client):
 # T011: deep link URL → saved, stored url is canonical (sub-path stripped)
 def test_deep_link_blob_normalized(client):
     db = client.app_state_db_path
-    with _mock_readme():
-        response = client.post("/", json={
-            "url": "https://github.com/owner/repo/blob/main/somefile.py",
-            "domain": "github.com",
-        })
+    response = client.post("/", json={
+        "url": "https://github.com/owner/repo/blob/main/somefile.py",
+        "domain": "github.com",
+    })
     assert response.json()["status"] == "saved"
     assert _get_record(db, "https://github.com/owner/repo") is not None
     assert _count_records(db, "https://github.com/owner/repo/blob/main/somefile.py") == 0
@@ -127,11 +118,10 @@ def test_deep_link_blob_normalized(client):
 # T011: issue URL → saved, stored url is canonical
 def test_deep_link_issue_normalized(client):
     db = client.app_state_db_path
-    with _mock_readme():
-        response = client.post("/", json={
-            "url": "https://github.com/owner2/repo2/issues/42",
-            "domain": "github.com",
-        })
+    response = client.post("/", json={
+        "url": "https://github.com/owner2/repo2/issues/42",
+        "domain": "github.com",
+    })
     assert response.json()["status"] == "saved"
     assert _get_record(db, "https://github.com/owner2/repo2") is not None
 
@@ -139,9 +129,8 @@ def test_deep_link_issue_normalized(client):
 # T013: fragment URL after base → skipped, still only 1 record
 def test_fragment_dedup(client):
     db = client.app_state_db_path
-    with _mock_readme():
-        client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
-        response = client.post("/", json={"url": "https://github.com/owner/repo#readme", "domain": "github.com"})
+    client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
+    response = client.post("/", json={"url": "https://github.com/owner/repo#readme", "domain": "github.com"})
     assert response.json()["status"] == "skipped"
     assert _count_records(db, "https://github.com/owner/repo") == 1
 
@@ -149,21 +138,19 @@ def test_fragment_dedup(client):
 # T013: fragment URL fresh → saved, stored url has no fragment
 def test_fragment_url_saved_without_fragment(client):
     db = client.app_state_db_path
-    with _mock_readme():
-        response = client.post("/", json={
-            "url": "https://github.com/owner3/repo3#installation",
-            "domain": "github.com",
-        })
+    response = client.post("/", json={
+        "url": "https://github.com/owner3/repo3#installation",
+        "domain": "github.com",
+    })
     assert response.json()["status"] == "saved"
     assert _get_record(db, "https://github.com/owner3/repo3") is not None
     assert _count_records(db, "https://github.com/owner3/repo3#installation") == 0
 
 
-# T016: README fetch returns 404 → saved with empty content_markdown
-def test_readme_fetch_failure_still_saves(client):
+# T016: README is fetched later by an enrichment job → saved with empty content_markdown
+def test_saved_before_readme_fetch(client):
     db = client.app_state_db_path
-    with patch("nomnom.services.github_service.GithubService.fetch_readme", AsyncMock(return_value="")):
-        response = client.post("/", json={"url": "https://github.com/owner4/repo4", "domain": "github.com"})
+    response = client.post("/", json={"url": "https://github.com/owner4/repo4", "domain": "github.com"})
     assert response.json()["status"] == "saved"
     record = _get_record(db, "https://github.com/owner4/repo4")
     assert record is not None
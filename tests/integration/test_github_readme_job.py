@@ -0,0 +1,155 @@
+"""Integration tests for asynchronous GitHub README enrichment."""
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from nomnom.main import create_app
+
+READMES = {"/owner/repo/HEAD/README.md": (200, "# Hello"), "/owner/flaky/HEAD/README.md": (503, "")}
+ETAGGED = "/owner/etagged/HEAD/README.md"
+REQUESTS = []
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        REQUESTS.append((self.path, self.headers.get("If-None-Match")))
+        headers = {}
+        if self.path == ETAGGED:
+            headers["ETag"] = '"v1"'
+            if self.headers.get("If-None-Match") == '"v1"':
+                status, body = 304, ""
+            else:
+                status, body = 200, "# Etagged"
+        else:
+            status, body = READMES.get(self.path, (404, "Not Found"))
+        encoded = body.encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def client(request, tmp_path, monkeypatch):
+    REQUESTS.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    db_path = str(tmp_path / "nomnom.db")
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", db_path)
+    monkeypatch.setattr(
+        "nomnom.main.settings.GITHUB_RAW_BASE_URL", f"http://127.0.0.1:{server.server_port}"
+    )
+    monkeypatch.setattr("nomnom.main.settings.ENRICHMENT_POLL_INTERVAL_SECONDS", 0.05)
+    monkeypatch.setattr("nomnom.main.settings.ENRICHMENT_BACKOFF_BASE_SECONDS", 3600)
+    monkeypatch.setattr(
+        "nomnom.main.settings.GITHUB_REVALIDATE_INTERVAL_SECONDS", getattr(request, "param", 86400)
+    )
+    with TestClient(create_app()) as c:
+        c.db_path = db_path
+        yield c
+    server.shutdown()
+    server.server_close()
+
+
+def _record(db_path, url):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT * FROM submissions WHERE url = ?", (url,)).fetchone()
+    job = conn.execute(
+        "SELECT * FROM enrichment_jobs WHERE submission_url = ? ORDER BY id DESC", (url,)
+    ).fetchone()
+    conn.close()
+    return (dict(row) if row else None), (dict(job) if job else None)
+
+
+def _wait_for_job(db_path, url, predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        record, job = _record(db_path, url)
+        if job and predicate(job):
+            return record, job
+        time.sleep(0.05)
+    raise AssertionError(f"job for {url} did not settle: {job}")
+
+
+def test_github_ingest_returns_before_readme_fetch(client):
+    response = client.post(
+        "/", json={"url": "https://github.com/owner/repo", "domain": "github.com"}
+    )
+    assert response.json()["status"] == "saved"
+
+    record, _ = _record(client.db_path, "https://github.com/owner/repo")
+    assert record["enrichment_status"] in ("pending", "complete")
+
+    record, job = _wait_for_job(
+        client.db_path, "https://github.com/owner/repo", lambda j: j["status"] == "complete"
+    )
+    assert record["content_markdown"] == "# Hello"
+    assert record["enrichment_status"] == "complete"
+
+
+def test_missing_readme_completes_empty(client):
+    client.post("/", json={"url": "https://github.com/owner/none", "domain": "github.com"})
+    record, _ = _wait_for_job(
+        client.db_path, "https://github.com/owner/none", lambda j: j["status"] == "complete"
+    )
+    assert record["content_markdown"] == ""
+
+
+def test_upstream_error_is_retried_later(client):
+    client.post("/", json={"url": "https://github.com/owner/flaky", "domain": "github.com"})
+    record, job = _wait_for_job(
+        client.db_path, "https://github.com/owner/flaky", lambda j: j["failure_reason"]
+    )
+    assert job["status"] == "pending"
+    assert "503" in job["failure_reason"]
+    assert record["enrichment_status"] == "pending"
+
+
+def test_duplicate_and_blocked_urls_still_skipped(client):
+    client.post("/", json={"url": "https://github.com/owner/repo", "domain": "github.com"})
+    dup = client.post(
+        "/", json={"url": "https://github.com/owner/repo#readme", "domain": "github.com"}
+    )
+    blocked = client.post("/", json={"url": "https://github.com/orgs/x", "domain": "github.com"})
+    assert dup.json()["status"] == "skipped"
+    assert blocked.json()["status"] == "skipped"
+
+
+@pytest.mark.parametrize("client", [0], indirect=True)
+def test_revisit_revalidates_with_etag(client):
+    url = "https://github.com/owner/etagged"
+    client.post("/", json={"url": url, "domain": "github.com"})
+    first, _ = _wait_for_job(client.db_path, url, lambda j: j["status"] == "complete")
+    assert first["content_markdown"] == "# Etagged"
+
+    response = client.post("/", json={"url": url, "domain": "github.com"})
+    assert response.json()["status"] == "queued"
+    _wait_for_job(client.db_path, url, lambda j: j["status"] == "complete")
+    time.sleep(0.1)
+
+    second, _ = _record(client.db_path, url)
+    assert REQUESTS[-1] == (ETAGGED, '"v1"')
+    assert second["revision"] == first["revision"]  # 304: content not rewritten
+    assert second["content_markdown"] == "# Etagged"
+
+
+def test_revisit_within_interval_is_not_revalidated(client):
+    url = "https://github.com/owner/etagged"
+    client.post("/", json={"url": url, "domain": "github.com"})
+    _wait_for_job(client.db_path, url, lambda j: j["status"] == "complete")
+    response = client.post("/", json={"url": url, "domain": "github.com"})
+    assert response.json()["status"] == "skipped"
+    assert len(REQUESTS) == 1
@@ -0,0 +1,41 @@
+"""Integration tests for GET /metrics."""
+import pytest
+from fastapi.testclient import TestClient
+
+from nomnom.main import create_app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", str(tmp_path / "nomnom.db"))
+    with TestClient(create_app()) as c:
+        yield c
+
+
+def test_metrics_reports_routes_stages_and_gauges(client):
+    payload = {
+        "url": "https://example.com/post",
+        "domain": "example.com",
+        "content_type": "generic_article",
+        "title": "Post",
+    }
+    assert client.post("/", json=payload).status_code == 200
+    assert client.post("/", json={"url": "missing fields"}).status_code == 422
+    client.get("/submissions/999999")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    requests = "nomnom_http_request_duration_seconds_count"
+    assert f'{requests}{{method="POST",route="/",status="200"}}' in body
+    assert f'{requests}{{method="POST",route="/",status="422"}}' in body
+    # Route templates, not raw paths, keep label cardinality bounded
+    assert 'route="/submissions/{submission_id}",status="404"' in body
+    assert "/submissions/999999" not in body
+    for stage in ("validation", "check_submission", "upsert", "sqlite_lock_wait"):
+        assert f'nomnom_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert 'nomnom_queue_depth{queue="write"} 0' in body
+    assert 'nomnom_db_file_bytes{file="db"}' in body
+    assert "nomnom_db_free_bytes " in body
@@ -0,0 +1,115 @@
+"""Integration tests for request body caps and Content-Encoding handling."""
+import gzip
+import json
+
+import pytest
+import zstandard
+from fastapi.testclient import TestClient
+
+from nomnom.main import create_app
+
+LIMIT = 64 * 1024
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", str(tmp_path / "nomnom.db"))
+    monkeypatch.setattr("nomnom.main.settings.MAX_REQUEST_BODY_BYTES", LIMIT)
+    with TestClient(create_app()) as c:
+        yield c
+
+
+def _payload(content: str) -> bytes:
+    return json.dumps({
+        "url": "https://example.com/big", "domain": "example.com", "title": "Big",
+        "content_markdown": content, "metadata": {"type": "generic_article"},
+    }).encode()
+
+
+@pytest.mark.parametrize("encoding, compress", [
+    ("gzip", gzip.compress),
+    ("zstd", zstandard.ZstdCompressor().compress),
+])
+def test_compressed_bodies_are_decoded(client, encoding, compress):
+    body = _payload("x" * (LIMIT // 2))
+    response = client.post("/", content=compress(body), headers={
+        "Content-Type": "application/json", "Content-Encoding": encoding,
+    })
+    assert response.status_code == 200
+    stored = client.app.state.repository.get_submission("https://example.com/big")
+    assert stored["content_markdown"] == "x" * (LIMIT // 2)
+
+
+def test_declared_length_over_limit_is_rejected_up_front(client):
+    response = client.post("/", content=_payload("x" * LIMIT))
+    assert response.status_code == 413
+
+
+def test_streamed_body_over_limit_is_rejected(client):
+    def chunks():
+        body = _payload("x" * LIMIT)
+        for start in range(0, len(body), 4096):
+            yield body[start:start + 4096]
+
+    # A generator body is sent chunked, without Content-Length
+    assert client.post("/", content=chunks()).status_code == 413
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, zstandard.ZstdCompressor().compress])
+def test_decompression_bomb_stops_at_the_limit(client, compress):
+    bomb = compress(_payload("x" * 100 * LIMIT))
+    assert len(bomb) < LIMIT
+    encoding = "gzip" if compress is gzip.compress else "zstd"
+    response = client.post("/", content=bomb, headers={"Content-Encoding": encoding})
+    assert response.status_code == 413
+
+
+def test_bad_encodings(client):
+    assert client.post("/", content=b"{}", headers={"Content-Encoding": "br"}).status_code == 415
+    corrupt = client.post("/", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert corrupt.status_code == 400
+    truncated = gzip.compress(_payload("x"))[:-10]
+    response = client.post("/", content=truncated, headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 400
+
+
+def _bulk_results(response) -> list[dict]:
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_bulk_line_over_the_request_cap_is_reported(client):
+    # One compressed line, no newline, far past the per-line cap
+    bomb = gzip.compress(b'{"url": "' + b"x" * 100 * LIMIT)
+    small = _payload("y").decode()
+    response = client.post(
+        "/bulk",
+        content=gzip.compress(small.encode() + b"\n") + bomb,
+        headers={"Content-Encoding": "gzip"},
+    )
+    results = _bulk_results(response)
+    assert [(r["line"], r["status"]) for r in results] == [(1, "saved"), (2, "error")]
+    assert "exceeds" in results[1]["message"]
+
+
+def test_bulk_cap_hit_mid_stream_ends_with_an_error_line(tmp_path, monkeypatch):
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", str(tmp_path / "nomnom.db"))
+    monkeypatch.setattr("nomnom.main.settings.MAX_BULK_BODY_BYTES", LIMIT)
+    lines = [
+        json.dumps({
+            "url": f"https://example.com/{i}", "domain": "example.com", "title": "t",
+            "content_markdown": "z" * 1000, "metadata": {"type": "generic_article"},
+        }).encode()
+        for i in range(200)
+    ]
+
+    def chunks():
+        for line in lines:
+            yield line + b"\n"
+
+    with TestClient(create_app()) as c:
+        results = _bulk_results(c.post("/bulk", content=chunks()))
+    assert results[-1]["status"] == "error"
+    assert results[-1]["message"] == "Request body too large"
+    # Lines read before the cap was crossed are still written
+    assert all(r["status"] == "saved" for r in results[:-1])
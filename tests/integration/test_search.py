@@ -0,0 +1,96 @@
+"""Integration tests for the full-text search endpoint."""
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from nomnom.db.connection import run_migrations
+from nomnom.main import create_app
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.services.ingestion_service import IngestionService
+
+
+@pytest.fixture
+def repository():
+    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+        path = f.name
+    run_migrations(path)
+    repo = SubmissionRepository(path)
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def client(repository, tmp_path, monkeypatch):
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", str(tmp_path / "nomnom.db"))
+    app = create_app()
+    with TestClient(app) as c:
+        app.state.repository = repository
+        app.state.ingestion_service = IngestionService(repository)
+        yield c
+
+
+def _save(repository, url, title, body, content_type="generic_article", domain="example.com"):
+    repository.upsert(Submission(
+        url=url, domain=domain, content_type=content_type, title=title, content_markdown=body,
+    ))
+
+
+def test_search_ranks_title_matches_first(client, repository):
+    _save(repository, "https://example.com/1", "Unrelated", "a note about sqlite internals")
+    _save(repository, "https://example.com/2", "SQLite tuning guide", "pragmas and indexes")
+
+    response = client.get("/search", params={"q": "sqlite"})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["url"] for r in results] == ["https://example.com/2", "https://example.com/1"]
+    assert "**sqlite**" in results[1]["snippet"].lower()
+
+
+def test_search_filters_by_type_and_domain(client, repository):
+    _save(repository, "https://example.com/a", "python", "body")
+    _save(repository, "https://www.reddit.com/r/x/comments/1/", "python", "body",
+          content_type="reddit_thread", domain="www.reddit.com")
+
+    results = client.get("/search", params={"q": "python", "type": "reddit_thread"}).json()
+    assert [r["domain"] for r in results["results"]] == ["www.reddit.com"]
+    results = client.get("/search", params={"q": "python", "domain": "example.com"}).json()
+    assert [r["url"] for r in results["results"]] == ["https://example.com/a"]
+
+
+def test_search_keyset_pagination_covers_all_rows_once(client, repository):
+    for i in range(7):
+        _save(repository, f"https://example.com/{i}", f"paging {i}", "paging " * (i + 1))
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "paging", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/search", params=params).json()
+        seen.extend(r["url"] for r in page["results"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(f"https://example.com/{i}" for i in range(7))
+    assert len(seen) == 7
+
+
+def test_search_index_follows_updates(client, repository):
+    _save(repository, "https://example.com/u", "before", "original words")
+    _save(repository, "https://example.com/u", "after", "replacement text")
+
+    assert client.get("/search", params={"q": "original"}).json()["results"] == []
+    assert len(client.get("/search", params={"q": "replacement"}).json()["results"]) == 1
+
+
+def test_search_query_syntax_is_not_interpreted(client, repository):
+    _save(repository, "https://example.com/q", "quotes", "what's up")
+    response = client.get("/search", params={"q": 'what\'s "up AND ('})
+    assert response.status_code == 200
+
+
+def test_search_rejects_bad_cursor(client):
+    response = client.get("/search", params={"q": "x", "cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,161 @@
+"""Integration tests for the GET /submissions read API and exports."""
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from nomnom.api.cursors import encode_cursor
+from nomnom.db.connection import ConnectionPool
+from nomnom.main import create_app
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import SubmissionRepository
+
+
+@pytest.fixture
+def repository(repository):
+    repository.upsert_many([
+        Submission(
+            url=f"https://{domain}/{i}", domain=domain, title=f"Post {i}",
+            content_type="reddit_thread" if domain == "www.reddit.com" else "generic_article",
+            content_markdown=f"body {i}",
+            metadata={"n": i, **({"subreddit": ("r/Python", "r/sqlite")[i % 4 // 2]}
+                                 if domain == "www.reddit.com" else {})},
+        )
+        for i, domain in enumerate(["www.reddit.com", "example.com"] * 5)
+    ])
+    with repository._pool.writer() as conn:
+        # One submission per minute so ordering and ranges are deterministic
+        conn.execute(
+            "UPDATE submissions SET ingested_at = datetime('2024-01-01', id || ' minutes')"
+        )
+    return repository
+
+
+@pytest.fixture
+def client(repository, tmp_path, monkeypatch):
+    monkeypatch.setattr("nomnom.main.settings.DB_PATH", str(tmp_path / "nomnom.db"))
+    app = create_app()
+    with TestClient(app) as c:
+        app.state.repository = repository
+        yield c
+
+
+def _ids(response) -> list[int]:
+    assert response.status_code == 200, response.text
+    return [row["id"] for row in response.json()["results"]]
+
+
+def test_list_defaults_to_newest_first_without_content(client):
+    body = client.get("/submissions").json()
+    assert [row["id"] for row in body["results"]] == list(range(10, 0, -1))
+    assert "content_markdown" not in body["results"][0]
+    assert body["results"][0]["metadata"] == {"n": 9}
+    assert body["next_cursor"] is None
+
+
+def test_keyset_pagination_with_filters(client):
+    seen, cursor = [], None
+    while True:
+        params = {"domain": "example.com", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/submissions", params=params)
+        seen += _ids(response)
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [10, 8, 6, 4, 2]
+    assert _ids(client.get("/submissions", params={"type": "reddit_thread", "order": "asc"})) == [
+        1, 3, 5, 7, 9
+    ]
+
+
+def test_filter_by_subreddit_generated_column(client):
+    assert _ids(client.get("/submissions", params={"subreddit": "python"})) == [9, 5, 1]
+    assert _ids(client.get("/submissions", params={"subreddit": "r/SQLite"})) == [7, 3]
+
+
+def test_since_until_range(client):
+    params = {"since": "2024-01-01T00:03:00", "until": "2024-01-01T00:06:00Z"}
+    assert _ids(client.get("/submissions", params=params)) == [5, 4, 3]
+
+
+def test_fields_projection(client):
+    rows = client.get("/submissions", params={"fields": "url,content_markdown", "limit": 1})
+    assert rows.json()["results"] == [{
+        "id": 10, "ingested_at": "2024-01-01 00:10:00",
+        "url": "https://example.com/9", "content_markdown": "body 9",
+    }]
+    assert client.get("/submissions", params={"fields": "url,password"}).status_code == 400
+    assert client.get("/submissions", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_cursor_values_must_have_the_keyset_types(client):
+    for values in (["2024-01-01", "5"], [None, 5], ["2024-01-01", True], [1, 5]):
+        response = client.get("/submissions", params={"cursor": encode_cursor(*values)})
+        assert response.status_code == 400, values
+    bad = encode_cursor("30", 1)
+    assert client.get("/submissions/1/transcript", params={"cursor": bad}).status_code == 400
+    assert client.get("/search", params={"q": "body", "cursor": bad}).status_code == 400
+    assert client.get(
+        "/search", params={"q": "body", "cursor": encode_cursor(-1, 1)}
+    ).status_code == 200
+
+
+def test_get_submission_streams_content(client, repository):
+    content = "línea \"quoted\"\n" * 20000
+    repository.update_submission_content("https://www.reddit.com/0", content, "complete")
+
+    response = client.get("/submissions/1")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["content_markdown"] == content
+    assert body["url"] == "https://www.reddit.com/0"
+    assert body["metadata"] == {"n": 0, "subreddit": "r/Python"}
+
+    repository.update_submission_content("https://www.reddit.com/0", None, "complete")
+    assert client.get("/submissions/1").json()["content_markdown"] is None
+    assert client.get("/submissions/999").status_code == 404
+
+
+def test_transcript_segments_page_and_lazy_markdown(client, repository):
+    url = "https://www.youtube.com/watch?v=abc"
+    repository.upsert(Submission(
+        url=url, domain="www.youtube.com", content_type="youtube_video",
+        metadata={"video_id": "abc"},
+    ))
+    repository.store_transcript("abc", [(i * 30.0, 30.0, f"part {i}") for i in range(5)], "en")
+    repository.update_submission_content(url, None, "complete")
+
+    page = client.get("/submissions/11/transcript", params={"start": 40, "limit": 2}).json()
+    assert [s["start"] for s in page["segments"]] == [30.0, 60.0]
+    rest = client.get(
+        "/submissions/11/transcript", params={"start": 40, "cursor": page["next_cursor"]}
+    ).json()
+    assert [s["text"] for s in rest["segments"]] == ["part 3", "part 4"]
+    assert rest["next_cursor"] is None
+
+    body = client.get("/submissions/11").json()
+    assert body["content_markdown"] == "## Transcript\n\npart 0 part 1 part 2 part 3 part 4"
+    assert client.get("/submissions/999/transcript").status_code == 404
+
+
+def test_busy_read_pool_answers_503(client, repository):
+    pool = ConnectionPool(repository._pool.db_path, size=1, acquire_timeout_ms=10)
+    client.app.state.repository = SubmissionRepository(pool.db_path, pool=pool)
+
+    with pool.reader():
+        response = client.get("/submissions")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert client.get("/submissions").status_code == 200
+    pool.close()
+
+
+def test_export_streams_gzipped_jsonl(client):
+    response = client.get("/export", params={"type": "reddit_thread"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert "nomnom-export.jsonl.gz" in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+    assert [row["id"] for row in rows] == [1, 3, 5, 7, 9]
+    assert rows[0]["content_markdown"] == "body 0"
@@ -0,0 +1,25 @@
+import asyncio
+
+from nomnom.services.change_feed import ChangeFeed
+from tests.conftest import make_submission
+
+
+async def test_stream_emits_events_then_waits_for_commits(repository):
+    feed = ChangeFeed(repository, repository._pool, heartbeat_seconds=0.05)
+    repository.upsert(make_submission("https://example.com/1"))
+    stream = feed.stream(after=0)
+
+    first = await anext(stream)
+    assert first.startswith(b"id: 1\nevent: insert\ndata: {")
+    assert await anext(stream) == b": heartbeat\n\n"
+
+    waiting = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0.01)
+    await asyncio.to_thread(repository.upsert, make_submission("https://example.com/2"))
+    event = await asyncio.wait_for(waiting, 1)
+    # A heartbeat may win the race with the commit; the event follows it
+    if event.startswith(b":"):
+        event = await asyncio.wait_for(anext(stream), 1)
+    assert event.startswith(b"id: 2\n")
+    await stream.aclose()
+
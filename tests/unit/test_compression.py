@@ -0,0 +1,147 @@
+import sqlite3
+
+import pytest
+
+from nomnom.db.compression import DECOMPRESS_FUNCTION, ContentCodec
+from nomnom.db.connection import run_migrations
+from nomnom.models.submission import Submission, UpsertOutcome
+from nomnom.repositories.submission_repository import SubmissionRepository
+from tests.conftest import make_submission
+
+zstandard = pytest.importorskip("zstandard")
+
+
+def _markdown(i: int) -> str:
+    comments = "\n".join(f"- **user{j}**: reply {j} to thread {i} about sqlite" for j in range(40))
+    return f"# Thread {i}\n\n{comments}\n"
+
+
+def _thread(i: int, content: str | None = None) -> Submission:
+    return make_submission(
+        f"https://www.reddit.com/r/x/comments/{i}", domain="www.reddit.com",
+        content_type="reddit_thread", title=f"Thread {i}",
+        content_markdown=_markdown(i) if content is None else content,
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "compress.db")
+    run_migrations(path)
+    return path
+
+
+@pytest.fixture
+def repository(db_path):
+    repo = SubmissionRepository(db_path, codec=ContentCodec(min_bytes=64))
+    yield repo
+    repo.close()
+
+
+def _stored(repository, url):
+    with repository._pool.reader() as conn:
+        return conn.execute(
+            "SELECT content_markdown, content_encoding FROM submissions WHERE url = ?", (url,)
+        ).fetchone()
+
+
+def test_upsert_compresses_and_reads_back_plain_text(repository):
+    submission = _thread(1)
+    assert repository.upsert(submission) == UpsertOutcome.INSERTED
+
+    stored = _stored(repository, submission.url)
+    assert stored["content_encoding"] == "zstd"
+    assert isinstance(stored["content_markdown"], bytes)
+    assert len(stored["content_markdown"]) < len(submission.content_markdown)
+    assert repository.get_submission(submission.url)["content_markdown"] == _markdown(1)
+    # The hash covers the plain text, so a re-ingest is still recognised as unchanged
+    assert repository.upsert(_thread(1)) == UpsertOutcome.UNCHANGED
+
+
+def test_short_content_stays_plain(repository):
+    repository.upsert(_thread(1, content="tiny"))
+    assert tuple(_stored(repository, _thread(1).url)) == ("tiny", None)
+
+
+def test_search_indexes_decompressed_text(repository):
+    repository.upsert(_thread(1))
+    repository.update_submission_content(_thread(1).url, _markdown(1) + "zebra", "complete")
+
+    hits = repository.search("zebra")
+    assert [hit["url"] for hit in hits] == [_thread(1).url]
+    assert "**zebra**" in hits[0]["snippet"]
+    assert repository.search("thread") != []
+
+
+def test_train_then_compress_existing_rows(db_path):
+    plain = SubmissionRepository(db_path)
+    plain.upsert_many([_thread(i) for i in range(200)])
+    plain.close()
+
+    repository = SubmissionRepository(db_path, codec=ContentCodec(min_bytes=64))
+    trained = repository.train_compression_dictionaries(dict_size=4096, min_samples=100)
+    assert trained == {"reddit_thread": 1}
+
+    after_id, total = 0, 0
+    while (result := repository.compress_batch(after_id, 64)) is not None:
+        after_id, compressed, before, after = result
+        assert after < before
+        total += compressed
+    assert total == 200
+
+    frame = _stored(repository, _thread(7).url)["content_markdown"]
+    assert zstandard.get_frame_parameters(frame).dict_id == 1
+    assert repository.get_submission(_thread(7).url)["content_markdown"] == _markdown(7)
+    assert len(repository.search("sqlite", limit=100)) == 100
+    repository.close()
+
+    # A fresh connection pool resolves the dictionary from the database
+    reopened = SubmissionRepository(db_path)
+    assert reopened.get_submission(_thread(8).url)["content_markdown"] == _markdown(8)
+    reopened.close()
+
+
+def test_iter_submission_decompresses_in_chunks(repository):
+    content = "ünïcode " + _markdown(3)
+    repository.upsert(_thread(3, content=content))
+    chunks = repository.iter_submission(1, chunk_size=7)
+    assert next(chunks)["content_markdown"] == ""
+    assert "".join(chunks) == content
+
+
+def _decompressing_triggers(db_path) -> bool:
+    conn = sqlite3.connect(db_path)
+    try:
+        sql = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'submissions_fts_ai'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+    return DECOMPRESS_FUNCTION in sql
+
+
+def test_fts_triggers_need_app_functions_only_with_compression(db_path):
+    # Without compression any SQLite client can write rows and read the FTS view
+    SubmissionRepository(db_path).close()
+    assert not _decompressing_triggers(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO submissions (url, domain, content_type, content_markdown) "
+        "VALUES ('https://example.com/', 'example.com', 'generic_article', 'plain words')"
+    )
+    conn.commit()
+    assert conn.execute("SELECT content_markdown FROM submissions_fts_source").fetchone() == (
+        "plain words",
+    )
+    conn.close()
+
+    repository = SubmissionRepository(db_path, codec=ContentCodec(min_bytes=64))
+    repository.upsert(_thread(1))
+    repository.close()
+    assert _decompressing_triggers(db_path)
+
+    # Compressed rows keep the decompressing triggers after compression is turned off
+    repository = SubmissionRepository(db_path)
+    assert _decompressing_triggers(db_path)
+    assert [hit["id"] for hit in repository.search("thread")] == [2]
+    repository.close()
@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from nomnom.db.connection import ConnectionPool, PoolTimeout, run_migrations
+
+
+@pytest.fixture
+def pool(tmp_path):
+    db_path = str(tmp_path / "pool.db")
+    run_migrations(db_path)
+    p = ConnectionPool(db_path, size=2)
+    yield p
+    p.close()
+
+
+def test_pragmas_applied(pool):
+    with pool.reader() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 10000
+
+
+def test_reader_connections_are_reused(pool):
+    with pool.reader() as first:
+        pass
+    with pool.reader() as second:
+        pass
+    assert first is second
+
+
+def test_readers_are_read_only(pool):
+    with pool.reader() as conn, pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM submissions")
+
+
+def test_writer_rolls_back_on_error(pool):
+    with pytest.raises(RuntimeError), pool.writer() as conn:
+        conn.execute(
+            "INSERT INTO submissions (url, domain, content_type) VALUES ('u', 'd', 't')"
+        )
+        raise RuntimeError("boom")
+    with pool.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0] == 0
+
+
+def test_writer_rolls_back_when_commit_fails(pool):
+    # A deferred foreign key violation is only reported by COMMIT
+    with pytest.raises(sqlite3.IntegrityError), pool.writer() as conn:
+        conn.execute("PRAGMA defer_foreign_keys=ON")
+        conn.execute("INSERT INTO enrichment_jobs (submission_url) VALUES ('missing')")
+    with pool.writer() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM enrichment_jobs").fetchone()[0] == 0
+
+
+def test_invalid_synchronous_mode_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ConnectionPool(str(tmp_path / "x.db"), synchronous="FAST; DROP TABLE x")
+
+
+def test_closed_pool_rejects_use(pool):
+    pool.close()
+    with pytest.raises(RuntimeError), pool.writer():
+        pass
+
+
+def test_reader_acquire_times_out_when_pool_is_busy(tmp_path):
+    db_path = str(tmp_path / "busy.db")
+    run_migrations(db_path)
+    pool = ConnectionPool(db_path, size=1, acquire_timeout_ms=50)
+    with pool.reader(), pytest.raises(PoolTimeout):
+        with pool.reader():
+            pass
+    # The held reader went back to the pool
+    with pool.reader():
+        pass
+    pool.close()
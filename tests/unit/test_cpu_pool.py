@@ -0,0 +1,71 @@
+import json
+import pickle
+
+import pytest
+
+from nomnom.db.compression import ContentCodec
+from nomnom.db.connection import run_migrations
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import SubmissionRepository, upsert_params
+from nomnom.services.cpu_pool import CpuPool, InvalidPayload
+from nomnom.services.ingestion_service import IngestionService
+
+LARGE = "word " * 2000
+
+
+@pytest.fixture(scope="module")
+def codec():
+    codec = ContentCodec(level=3, min_bytes=512)
+    samples = [f"# Thread {i}\n\n{LARGE} {i}".encode() for i in range(200)]
+    codec.add_dictionary("reddit_thread", ContentCodec.train(samples, dict_id=1, dict_size=4096))
+    return codec
+
+
+@pytest.fixture(scope="module")
+def cpu_pool(codec):
+    pool = CpuPool(max_workers=1, threshold_bytes=1024, codec=codec)
+    yield pool
+    pool.shutdown()
+
+
+def test_codec_pickles_with_its_dictionaries(codec):
+    restored = pickle.loads(pickle.dumps(codec))
+    assert restored.encode("reddit_thread", LARGE) == codec.encode("reddit_thread", LARGE)
+
+
+async def test_large_submissions_are_prepared_in_a_worker(cpu_pool, codec):
+    small = Submission(url="https://e.com/s", domain="e.com", content_type="reddit_thread",
+                       content_markdown="short")
+    large = Submission(url="https://e.com/l", domain="e.com", content_type="reddit_thread",
+                       content_markdown=LARGE, metadata={"subreddit": "x"})
+    await cpu_pool.prepare([small, large])
+    assert small.prepared is None
+    assert large.prepared == upsert_params(large, codec)
+    assert large.prepared.content_encoding == "zstd"
+
+
+async def test_validation_errors_come_back_from_the_worker(cpu_pool):
+    body = json.dumps({"url": " ", "domain": "e.com", "content_markdown": LARGE})
+    with pytest.raises(InvalidPayload) as pooled:
+        await cpu_pool.validate(body)
+    with pytest.raises(InvalidPayload) as inline:
+        await CpuPool(max_workers=0).validate(body)
+    assert [(e["loc"], e["msg"]) for e in pooled.value.errors] == [
+        (e["loc"], e["msg"]) for e in inline.value.errors
+    ]
+    assert pooled.value.errors[0]["loc"] == ("url",)
+
+
+async def test_ingest_offloads_large_payloads(tmp_path, cpu_pool):
+    db_path = str(tmp_path / "pool.db")
+    run_migrations(db_path)
+    repository = SubmissionRepository(db_path)
+    service = IngestionService(repository, cpu_pool=cpu_pool)
+    body = json.dumps({"url": "https://e.com/big", "domain": "e.com", "content_markdown": LARGE})
+    try:
+        payload = await service.validate(body)
+        assert (await service.ingest(payload)).status == "saved"
+        assert repository.get_submission("https://e.com/big")["content_markdown"] == LARGE
+        assert (await service.ingest(payload)).status == "unchanged"
+    finally:
+        repository.close()
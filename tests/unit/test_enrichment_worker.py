@@ -0,0 +1,172 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from nomnom.models.submission import Submission
+from nomnom.services.enrichment_worker import EnrichmentWorkerPool, TransientEnrichmentError
+
+URL = "https://www.youtube.com/watch?v=abc"
+
+
+@pytest.fixture
+def repository(repository):
+    repository.upsert(Submission(
+        url=URL, domain="www.youtube.com", content_type="youtube_video",
+        metadata={"type": "youtube_video", "video_id": "abc"}, enrichment_status="pending",
+    ))
+    return repository
+
+
+def _jobs(repository):
+    with repository._pool.reader() as conn:
+        return [dict(r) for r in conn.execute("SELECT * FROM enrichment_jobs ORDER BY id")]
+
+
+def _pool(repository, **kwargs):
+    return EnrichmentWorkerPool(
+        repository, workers=2, backoff_base_seconds=0, poll_interval_seconds=0.05, **kwargs
+    )
+
+
+async def _wait_for(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_retried_then_completes(repository):
+    calls = []
+
+    async def handler(job, repo):
+        calls.append(job["attempts"])
+        if len(calls) == 1:
+            raise TransientEnrichmentError("rate limited")
+        assert job["metadata"]["video_id"] == "abc"
+
+    pool = _pool(repository)
+    pool.register("youtube_video", handler)
+    repository.create_enrichment_job(URL)
+    await pool.start()
+    await _wait_for(lambda: _jobs(repository)[0]["status"] == "complete")
+    await pool.stop()
+
+    assert calls == [1, 2]
+    assert pool.outcomes == {"complete": 1, "retried": 1, "failed": 0}
+    assert pool.stats()["completion_latency_seconds"]["samples"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts(repository):
+    async def handler(job, repo):
+        raise TransientEnrichmentError("still down")
+
+    pool = _pool(repository, max_attempts=3)
+    pool.register("youtube_video", handler)
+    repository.create_enrichment_job(URL)
+    await pool.start()
+    await _wait_for(lambda: _jobs(repository)[0]["status"] == "failed")
+    await pool.stop()
+
+    job = _jobs(repository)[0]
+    assert job["attempts"] == 3
+    assert job["failure_reason"] == "still down"
+    with repository._pool.reader() as conn:
+        row = conn.execute("SELECT enrichment_status FROM submissions").fetchone()
+    assert row["enrichment_status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_start_resumes_jobs_orphaned_by_previous_process(repository):
+    repository.create_enrichment_job(URL)
+    # Simulate a crash mid-job: claimed but never finished
+    assert repository.claim_enrichment_job(lease_seconds=600) is not None
+    assert repository.claim_enrichment_job(lease_seconds=600) is None
+
+    done = asyncio.Event()
+
+    async def handler(job, repo):
+        done.set()
+
+    pool = _pool(repository)
+    pool.register("youtube_video", handler)
+    await pool.start()
+    await asyncio.wait_for(done.wait(), 3)
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_a_failed_database_write(repository, monkeypatch):
+    finish = repository.finish_enrichment_job
+    failures = []
+
+    def flaky_finish(*args, **kwargs):
+        if not failures:
+            failures.append(args)
+            raise sqlite3.OperationalError("database is locked")
+        return finish(*args, **kwargs)
+
+    monkeypatch.setattr(repository, "finish_enrichment_job", flaky_finish)
+    handled = []
+
+    async def handler(job, repo):
+        handled.append(job["submission_url"])
+
+    other = "https://www.youtube.com/watch?v=def"
+    repository.upsert(Submission(
+        url=other, domain="www.youtube.com", content_type="youtube_video",
+        metadata={"type": "youtube_video", "video_id": "def"},
+    ))
+    pool = EnrichmentWorkerPool(repository, workers=1, poll_interval_seconds=0.05)
+    pool.register("youtube_video", handler)
+    repository.create_enrichment_job(URL)
+    await pool.start()
+    await _wait_for(lambda: failures)
+    repository.create_enrichment_job(other)
+    await _wait_for(lambda: any(j["status"] == "complete" for j in _jobs(repository)))
+    await pool.stop()
+
+    assert handled == [URL, other]
+    assert [j["status"] for j in _jobs(repository)] == ["running", "complete"]
+    assert pool.in_flight == 0
+
+
+def test_claim_reclaims_expired_lease(repository):
+    repository.create_enrichment_job(URL)
+    first = repository.claim_enrichment_job(lease_seconds=600)
+    assert repository.claim_enrichment_job(lease_seconds=600) is None
+    again = repository.claim_enrichment_job(lease_seconds=0)
+    assert again["id"] == first["id"]
+    assert again["attempts"] == 2
+
+
+def test_enqueue_coalesces_onto_the_active_job(repository):
+    assert repository.create_enrichment_job(URL) is True
+    assert repository.create_enrichment_job(URL) is False
+    repository.create_enrichment_jobs([URL, URL])
+    assert len(_jobs(repository)) == 1
+
+    job = repository.claim_enrichment_job(lease_seconds=600)
+    assert repository.enqueue_revalidation(URL) is False  # still running
+    repository.finish_enrichment_job(job["id"], "complete")
+    # Finished jobs no longer count as active
+    assert repository.enqueue_revalidation(URL) is True
+    assert [j["status"] for j in _jobs(repository)] == ["complete", "pending"]
+
+
+def test_prune_deletes_old_finished_jobs_in_batches(repository):
+    with repository._pool.writer() as conn:
+        conn.executemany(
+            "INSERT INTO enrichment_jobs (submission_url, status, completed_at) "
+            "VALUES (?, ?, datetime('now', ?))",
+            [(URL, "complete", "-10 days")] * 3
+            + [(URL, "failed", "-10 days"), (URL, "complete", "-1 hours")],
+        )
+    repository.create_enrichment_job(URL)
+
+    assert repository.prune_enrichment_jobs(86400, batch_size=3) == 3
+    assert repository.prune_enrichment_jobs(86400, batch_size=3) == 1
+    assert repository.prune_enrichment_jobs(86400, batch_size=3) == 0
+    assert sorted(j["status"] for j in _jobs(repository)) == ["complete", "pending"]
@@ -0,0 +1,82 @@
+import gzip
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from nomnom.db.connection import run_migrations
+from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.services.export_service import export_stream
+
+
+def _seed(repository, rows: int) -> None:
+    with repository._pool.writer() as conn:
+        conn.execute(
+            """
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO submissions (url, domain, title, content_markdown, content_type,
+                                     metadata, updated_at)
+            SELECT 'https://example.com/' || i, CASE i % 2 WHEN 0 THEN 'a.com' ELSE 'b.com' END,
+                   'Title ' || i, printf('%.500c', 'x'), 'generic_article', '{"i": ' || i || '}',
+                   datetime('2024-01-01', i || ' seconds')
+            FROM n
+            """,
+            (rows,),
+        )
+
+
+def _jsonl(repository, **filters) -> list[dict]:
+    data = b"".join(export_stream(repository, "jsonl", chunk_size=3, **filters))
+    return [json.loads(line) for line in gzip.decompress(data).splitlines()]
+
+
+def test_jsonl_export_filters_and_since(repository):
+    _seed(repository, 10)
+    rows = _jsonl(repository)
+    assert [row["id"] for row in rows] == list(range(1, 11))
+    assert rows[0]["metadata"] == {"i": 1}
+    assert rows[0]["content_markdown"] == "x" * 500
+
+    assert [row["id"] for row in _jsonl(repository, domain="a.com")] == [2, 4, 6, 8, 10]
+    since = _jsonl(repository, updated_since="2024-01-01 00:00:08")
+    assert [row["id"] for row in since] == [8, 9, 10]
+
+
+def test_parquet_export_writes_one_row_group_per_chunk(repository):
+    pq = pytest.importorskip("pyarrow.parquet")
+    _seed(repository, 10)
+    data = b"".join(export_stream(repository, "parquet", chunk_size=4))
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column("id").to_pylist() == list(range(1, 11))
+    assert json.loads(table.column("metadata")[0].as_py()) == {"i": 1}
+
+
+def test_unknown_format_is_rejected(repository):
+    with pytest.raises(ValueError):
+        export_stream(repository, "csv")
+
+
+def _peak_export_memory(repository, rows: int) -> int:
+    _seed(repository, rows)
+    tracemalloc.start()
+    try:
+        for _ in export_stream(repository, "jsonl", chunk_size=500):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_export_memory_does_not_grow_with_row_count(tmp_path):
+    peaks = []
+    for rows in (2_000, 20_000):
+        db_path = str(tmp_path / f"mem-{rows}.db")
+        run_migrations(db_path)
+        repository = SubmissionRepository(db_path)
+        peaks.append(_peak_export_memory(repository, rows))
+        repository.close()
+    # 10x the rows: peak allocations stay within noise of the small export
+    assert peaks[1] < peaks[0] * 1.5
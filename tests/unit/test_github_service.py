@@ -1,7 +1,9 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock
 
+import httpx
 import pytest
 
+from nomnom.services.enrichment_worker import TransientEnrichmentError
 from nomnom.services.github_service import GithubService
 
 
@@ -26,50 +28,50 @@ def test_normalize_url_strips_fragment(svc):
     assert result == ("https://github.com/owner/repo", "owner", "repo")
 
 
-# T008: fetch_readme mocked
-@pytest.mark.asyncio
-async def test_fetch_readme_200(svc):
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.text = "# Hello"
+# T008: enrich_job against a mocked README host
+JOB = {
+    "submission_url": "https://github.com/owner/repo",
+    "metadata": {"owner": "owner", "repo": "repo"},
+}
 
-    with patch("nomnom.services.github_service.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.get = AsyncMock(return_value=mock_response)
-        mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
 
-        result = await svc.fetch_readme("owner", "repo")
-    assert result == "# Hello"
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
 
 
 @pytest.mark.asyncio
-async def test_fetch_readme_404(svc):
-    mock_response = MagicMock()
-    mock_response.status_code = 404
+async def test_enrich_job_stores_readme():
+    repository = MagicMock()
 
-    with patch("nomnom.services.github_service.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.get = AsyncMock(return_value=mock_response)
-        mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+    def handler(request):
+        assert request.url.path == "/owner/repo/HEAD/README.md"
+        return httpx.Response(200, text="# Hello", headers={"ETag": '"v1"'})
 
-        result = await svc.fetch_readme("owner", "repo")
-    assert result == ""
+    async with _client(handler) as client:
+        await GithubService(client).enrich_job(JOB, repository)
+    repository.update_github_readme.assert_called_once_with(
+        "https://github.com/owner/repo", "# Hello", '"v1"', None
+    )
 
 
 @pytest.mark.asyncio
-async def test_fetch_readme_timeout(svc):
-    import httpx
+async def test_enrich_job_missing_readme_stores_empty():
+    repository = MagicMock()
+    async with _client(lambda request: httpx.Response(404)) as client:
+        await GithubService(client).enrich_job(JOB, repository)
+    repository.update_github_readme.assert_called_once_with(
+        "https://github.com/owner/repo", "", None, None
+    )
+
 
-    with patch("nomnom.services.github_service.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.get = AsyncMock(side_effect=httpx.TimeoutException("timeout"))
-        mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+@pytest.mark.asyncio
+async def test_enrich_job_timeout_is_transient():
+    def handler(request):
+        raise httpx.TimeoutException("timeout")
 
-        result = await svc.fetch_readme("owner", "repo")
-    assert result == ""
+    async with _client(handler) as client:
+        with pytest.raises(TransientEnrichmentError):
+            await GithubService(client).enrich_job(JOB, MagicMock())
 
 
 # T014: normalize_url rejection cases
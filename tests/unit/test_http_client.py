@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from nomnom.services.github_service import GithubService
+from nomnom.services.http_client import HostLimitedTransport, create_http_client
+
+
+class _ReadmeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        body = f"# README for {self.path}".encode()
+        self.send_response(200 if self.path.endswith("README.md") else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def readme_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ReadmeHandler)
+    server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _settings(**overrides):
+    values = dict(
+        HTTP2=False, HTTP_MAX_CONNECTIONS=10, HTTP_MAX_KEEPALIVE_CONNECTIONS=5,
+        HTTP_KEEPALIVE_EXPIRY_SECONDS=30, HTTP_PER_HOST_CONCURRENCY=4, HTTP_TIMEOUT_SECONDS=5,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.asyncio
+async def test_shared_client_reuses_one_connection(readme_server):
+    base = f"http://127.0.0.1:{readme_server.server_port}"
+    repository = MagicMock()
+    async with create_http_client(_settings()) as client:
+        svc = GithubService(client, raw_base_url=base)
+        for i in range(5):
+            job = {
+                "submission_url": f"https://github.com/owner/repo{i}",
+                "metadata": {"owner": "owner", "repo": f"repo{i}"},
+            }
+            await svc.enrich_job(job, repository)
+
+    readme = repository.update_github_readme.call_args_list[3].args[1]
+    assert readme == "# README for /owner/repo3/HEAD/README.md"
+    assert readme_server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_per_host_concurrency_cap():
+    active = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.02)
+        active["now"] -= 1
+        return httpx.Response(200, text="ok")
+
+    transport = HostLimitedTransport(httpx.MockTransport(handler), per_host=2)
+    async with httpx.AsyncClient(transport=transport) as client:
+        await asyncio.gather(*(client.get("http://a.test/") for _ in range(6)))
+        await asyncio.gather(
+            *(client.get(f"http://{host}.test/") for host in ("b", "c", "d"))
+        )
+    assert active["peak"] == 3  # 2 for a.test, then b/c/d each have their own slot
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr("nomnom.services.http_client.importlib.util.find_spec", lambda name: None)
+    client = create_http_client(_settings(HTTP2=True))
+    assert isinstance(client, httpx.AsyncClient)
@@ -0,0 +1,85 @@
+import pytest
+
+from nomnom.db import maintenance
+from nomnom.db.connection import ConnectionPool, run_migrations
+from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.services.maintenance import MaintenanceScheduler
+
+
+@pytest.fixture
+def pool(tmp_path):
+    db_path = str(tmp_path / "maintenance.db")
+    run_migrations(db_path)
+    pool = ConnectionPool(db_path)
+    yield pool
+    pool.close()
+
+
+def _churn(pool: ConnectionPool, rows: int = 200) -> None:
+    """Write then delete enough content to leave free pages behind."""
+    with pool.writer() as conn:
+        conn.executemany(
+            "INSERT INTO submissions (url, domain, content_type, content_markdown) "
+            "VALUES (?, 'example.com', 'generic_article', ?)",
+            [(f"https://example.com/{i}", "x" * 8000) for i in range(rows)],
+        )
+    with pool.writer() as conn:
+        conn.execute("DELETE FROM submissions")
+
+
+def test_migrations_enable_incremental_vacuum(pool):
+    freelist, page_size, incremental = maintenance.free_pages(pool)
+    assert incremental
+    assert page_size > 0
+
+
+async def test_forced_run_checkpoints_optimizes_and_vacuums(pool):
+    _churn(pool)
+    assert maintenance.wal_bytes(pool) > 0
+    assert maintenance.free_pages(pool)[0] > 0
+    scheduler = MaintenanceScheduler(pool, vacuum_pages=16)
+
+    await scheduler.run_once(force=True)
+
+    assert maintenance.free_pages(pool)[0] == 0
+    assert scheduler.totals["wal_checkpoint"]["runs"] == 1
+    assert scheduler.totals["optimize"]["runs"] == 1
+    assert scheduler.last_runs["incremental_vacuum"]["pages"] > 16  # several batches
+    assert scheduler.totals["incremental_vacuum"]["reclaimed_bytes"] > 0
+    with pool.reader() as conn:
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    stats = scheduler.stats()
+    assert stats["free_bytes"] == 0
+    assert stats["last_runs"]["wal_checkpoint"]["busy"] is False
+
+
+async def test_vacuum_waits_for_idle_and_checkpoint_for_threshold(pool):
+    scheduler = MaintenanceScheduler(pool, wal_checkpoint_bytes=1 << 40, idle_seconds=60)
+    _churn(pool)  # commits reset the idle clock
+
+    await scheduler.run_once()
+
+    assert scheduler.last_runs == {}
+    assert maintenance.free_pages(pool)[0] > 0
+
+
+async def test_prunes_finished_enrichment_jobs(pool):
+    repository = SubmissionRepository(pool.db_path, pool=pool)
+    with pool.writer() as conn:
+        conn.execute(
+            "INSERT INTO submissions (url, domain, content_type) "
+            "VALUES ('https://example.com/v', 'example.com', 'youtube_video')"
+        )
+        conn.executemany(
+            "INSERT INTO enrichment_jobs (submission_url, status, completed_at) "
+            "VALUES ('https://example.com/v', 'complete', datetime('now', '-2 days'))",
+            [()] * 5,
+        )
+    scheduler = MaintenanceScheduler(
+        pool, repository=repository, job_retention_seconds=86400, prune_batch_size=2
+    )
+
+    await scheduler.run_once()
+
+    assert scheduler.last_runs["prune_enrichment_jobs"]["rows"] == 5
+    assert repository.count_enrichment_jobs() == {}
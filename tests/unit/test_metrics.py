@@ -0,0 +1,85 @@
+"""Unit tests for the in-process metrics registry."""
+import re
+
+import pytest
+
+from nomnom.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("t_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    child = histogram.labels("upsert")
+    for value in (0.05, 0.5, 0.5, 5.0):
+        child.observe(value)
+
+    lines = histogram.render().splitlines()
+
+    assert lines[:2] == ["# HELP t_seconds Test.", "# TYPE t_seconds histogram"]
+    assert 't_seconds_bucket{stage="upsert",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="upsert",le="1"} 3' in lines
+    assert 't_seconds_bucket{stage="upsert",le="+Inf"} 4' in lines
+    assert 't_seconds_sum{stage="upsert"} 6.05' in lines
+    assert 't_seconds_count{stage="upsert"} 4' in lines
+
+
+def test_labels_are_cached_and_validated():
+    counter = Counter("t_total", "Test.", ("outcome",))
+    assert counter.labels("ok") is counter.labels("ok")
+    with pytest.raises(ValueError):
+        counter.labels("ok", "extra")
+
+
+def test_label_values_are_escaped():
+    counter = Counter("t_total", "Test.", ("reason",))
+    counter.labels('bad "quote"\\').inc(2)
+    assert 't_total{reason="bad \\"quote\\"\\\\"} 2' in counter.render()
+
+
+def test_gauge_drops_failing_sources():
+    gauge = Gauge("t_depth", "Test.", ("queue",))
+    gauge.set_function(lambda: 3, "write")
+    gauge.set_function(lambda: 1 / 0, "broken")
+
+    registry = Registry()
+    registry.register(gauge)
+    rendered = registry.render()
+
+    assert 't_depth{queue="write"} 3' in rendered
+    assert "broken" not in rendered
+    assert rendered.endswith("\n")
+
+
+# One sample line of the text exposition format: name, optional labels, value
+_SAMPLE = re.compile(
+    r'[a-zA-Z_:][a-zA-Z0-9_:]*'
+    r'(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*"'
+    r'(,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*")*\})?'
+    r' (?:[+-]Inf|NaN|-?[0-9]+(?:\.[0-9]+)?(?:e[+-]?[0-9]+)?)'
+)
+
+
+def test_exposition_follows_the_text_format():
+    registry = Registry()
+    counter = registry.register(Counter("t_total", "Line one\nback\\slash.", ("reason",)))
+    counter.labels('multi\nline "x"\\').inc()
+    histogram = registry.register(Histogram("t_seconds", "Test.", ("stage",), buckets=(0.5,)))
+    histogram.labels("a").observe(0.25)
+    histogram.labels("a").observe(2)
+    registry.register(Gauge("t_free", "Test.")).set_function(lambda: 1.5)
+
+    assert registry.render() == "\n".join([
+        "# HELP t_total Line one\\nback\\\\slash.",
+        "# TYPE t_total counter",
+        't_total{reason="multi\\nline \\"x\\"\\\\"} 1',
+        "# HELP t_seconds Test.",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{stage="a",le="0.5"} 1',
+        't_seconds_bucket{stage="a",le="+Inf"} 2',
+        't_seconds_sum{stage="a"} 2.25',
+        't_seconds_count{stage="a"} 2',
+        "# HELP t_free Test.",
+        "# TYPE t_free gauge",
+        "t_free 1.5",
+    ]) + "\n"
+    for line in registry.render().splitlines():
+        assert line.startswith("# ") or _SAMPLE.fullmatch(line), line
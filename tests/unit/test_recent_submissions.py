@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from nomnom.models.submission import Submission
+from nomnom.schemas.ingest import IngestRequest
+from nomnom.services.ingestion_service import IngestionService
+from nomnom.services.recent_submissions import BloomFilter, RecentSubmissions
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    urls = [f"https://example.com/{i}" for i in range(1000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+    false_positives = sum(f"https://example.org/{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    assert 950 <= bloom.count <= 1000
+
+
+def test_recent_entries_are_bounded_and_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("nomnom.services.recent_submissions.time.monotonic", lambda: now[0])
+    recent = RecentSubmissions(max_entries=2, ttl_seconds=60, bloom_capacity=0)
+    recent.add("a", "h1")
+    recent.add("b", "h1")
+    assert recent.seen("a", "h1")
+    assert not recent.seen("a", "h2")  # changed content goes to the database
+    recent.add("c", "h1")  # evicts b, the least recently used
+    assert not recent.seen("b", "h1")
+    assert not recent.seen("a", "h1", max_age=0)
+    now[0] += 60
+    assert not recent.seen("a", "h1")
+    assert recent.stats()["hits"] == 1
+    assert recent.stats()["misses"] == 4
+
+
+async def test_repost_is_answered_from_memory(repository, monkeypatch):
+    service = IngestionService(repository, recent=RecentSubmissions(bloom_capacity=0))
+    payload = IngestRequest(
+        url="https://example.com/a?utm_source=x", domain="example.com", title="t",
+        content_markdown="body", metadata={"type": "generic_article"},
+    )
+    assert (await service.ingest(payload)).status == "saved"
+
+    def fail(*args):
+        raise AssertionError("database touched")
+
+    monkeypatch.setattr(repository, "upsert", fail)
+    assert (await service.ingest(payload)).status == "unchanged"
+
+    payload.content_markdown = "edited"
+    with pytest.raises(AssertionError):
+        await service.ingest(payload)
+
+
+async def test_bulk_ingest_is_remembered(repository, monkeypatch):
+    service = IngestionService(repository, recent=RecentSubmissions(bloom_capacity=0))
+    payload = IngestRequest(
+        url="https://example.com/b", domain="example.com", title="t",
+        content_markdown="body", metadata={"type": "generic_article"},
+    )
+
+    async def body():
+        yield payload.model_dump_json().encode() + b"\n"
+
+    results = [json.loads(line) async for line in service.ingest_ndjson(body())]
+    assert [r["status"] for r in results] == ["saved"]
+
+    def fail(*args):
+        raise AssertionError("database touched")
+
+    monkeypatch.setattr(repository, "upsert", fail)
+    assert (await service.ingest(payload)).status == "unchanged"
+
+
+def _github(url: str) -> IngestRequest:
+    return IngestRequest(url=url, domain="github.com")
+
+
+async def test_bloom_filter_skips_lookup_for_new_github_repos(repository, monkeypatch):
+    repository.upsert(Submission(
+        url="https://github.com/owner/old", domain="github.com", content_type="github"
+    ))
+    recent = RecentSubmissions()
+    recent.start(repository)
+    await recent._task
+    assert recent.stats()["bloom_ready"]
+    lookups = []
+    real_lookup = repository.github_revalidation_due
+
+    def github_revalidation_due(url, min_age_seconds):
+        lookups.append(url)
+        return real_lookup(url, min_age_seconds)
+
+    monkeypatch.setattr(repository, "github_revalidation_due", github_revalidation_due)
+    service = IngestionService(repository, recent=recent)
+
+    new = await service.ingest(_github("https://github.com/owner/new"))
+    old = await service.ingest(_github("https://github.com/owner/old"))
+    assert (new.status, old.status) == ("saved", "skipped")
+    assert lookups == ["https://github.com/owner/old"]
+    assert recent.known("https://github.com/owner/new")
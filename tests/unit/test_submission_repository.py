@@ -0,0 +1,170 @@
+import sqlite3
+
+import pytest
+
+from nomnom.db.connection import _MIGRATIONS_DIR, ConnectionPool, run_migrations
+from nomnom.db.functions import content_hash
+from nomnom.models.submission import Submission, UpsertOutcome
+from nomnom.repositories.submission_repository import ContentChanged, SubmissionRepository
+from tests.conftest import make_submission
+
+
+def _row(repository, url: str = "https://example.com/a"):
+    with repository._pool.reader() as conn:
+        return conn.execute("SELECT * FROM submissions WHERE url = ?", (url,)).fetchone()
+
+
+def test_upsert_reports_insert_then_update(repository):
+    assert repository.upsert(make_submission()) == UpsertOutcome.INSERTED
+    # Same-second update must still be reported as an update
+    assert repository.upsert(make_submission(title="changed")) == UpsertOutcome.UPDATED
+    assert repository.upsert(make_submission(title="again")) == UpsertOutcome.UPDATED
+
+
+def test_upsert_unchanged_content_only_touches(repository):
+    repository.upsert(make_submission())
+    before = _row(repository)
+    assert repository.upsert(make_submission()) == UpsertOutcome.UNCHANGED
+    after = _row(repository)
+    assert after["revision"] == before["revision"]
+    assert after["content_hash"] == before["content_hash"]
+    assert after["last_seen_at"] is not None
+
+
+def test_enrichment_update_refreshes_hash(repository):
+    repository.upsert(make_submission())
+    before = _row(repository)["content_hash"]
+    repository.update_submission_content("https://example.com/a", "## Transcript", "complete")
+    assert _row(repository)["content_hash"] != before
+    # Re-posting the original capture is now a real change again
+    assert repository.upsert(make_submission()) == UpsertOutcome.UPDATED
+
+
+def test_upsert_many_maps_results_per_item(repository):
+    repository.upsert(make_submission("https://example.com/existing"))
+    results = repository.upsert_many([
+        make_submission("https://example.com/new"),
+        make_submission("https://example.com/existing"),
+        make_submission("https://example.com/new", title="dup in batch"),
+        make_submission("https://example.com/new", title="dup in batch"),
+    ])
+    assert results == [
+        UpsertOutcome.INSERTED,
+        UpsertOutcome.UNCHANGED,
+        UpsertOutcome.UPDATED,
+        UpsertOutcome.UNCHANGED,
+    ]
+
+
+def test_migration_backfills_existing_hashes(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript((_MIGRATIONS_DIR / "001_init.sql").read_text())
+    conn.execute("INSERT INTO _schema_migrations (filename) VALUES ('001_init.sql')")
+    conn.execute(
+        "INSERT INTO submissions (url, domain, title, content_markdown, content_type, metadata)"
+        " VALUES ('https://old', 'd', 'T', 'body', 'generic_article', '{}')"
+    )
+    conn.commit()
+    conn.close()
+
+    run_migrations(db_path)
+    repo = SubmissionRepository(db_path)
+    assert _row(repo, "https://old")["content_hash"] == content_hash("T", "body", "{}")
+    repo.close()
+
+
+def test_lookup_by_metadata_generated_columns(repository):
+    repository.upsert(Submission(
+        url="https://www.youtube.com/watch?v=abc123", domain="www.youtube.com",
+        content_type="youtube_video", metadata={"video_id": "abc123", "channel": "Chan"},
+    ))
+    repository.insert_github_placeholder("https://github.com/Owner/Repo", "Owner", "Repo")
+    # A generic article carrying the same key is not a YouTube video
+    repository.upsert(Submission(
+        url="https://example.com/v", domain="example.com", content_type="generic_article",
+        metadata={"video_id": "abc123"},
+    ))
+
+    video = repository.find_by_video_id("abc123")
+    assert video["url"] == "https://www.youtube.com/watch?v=abc123"
+    assert repository.find_by_video_id("missing") is None
+    assert repository.find_by_github_repo("owner", "REPO")["url"] == "https://github.com/Owner/Repo"
+    assert [row["id"] for row in repository.list_submissions(channel="Chan")] == [video["id"]]
+    with repository._pool.reader() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM submissions WHERE video_id = ?", ("abc123",)
+        ).fetchall()
+    assert "idx_submissions_video_id" in plan[0]["detail"]
+
+
+def test_migration_collapses_duplicate_active_jobs(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript((_MIGRATIONS_DIR / "001_init.sql").read_text())
+    conn.execute("INSERT INTO _schema_migrations (filename) VALUES ('001_init.sql')")
+    conn.execute(
+        "INSERT INTO submissions (url, domain, content_type) VALUES ('https://v', 'd', 'video')"
+    )
+    conn.executemany(
+        "INSERT INTO enrichment_jobs (submission_url, status) VALUES ('https://v', ?)",
+        [("complete",), ("pending",), ("pending",), ("pending",)],
+    )
+    conn.commit()
+    conn.close()
+
+    run_migrations(db_path)
+    repo = SubmissionRepository(db_path)
+    with repo._pool.reader() as conn:
+        jobs = conn.execute("SELECT id, status FROM enrichment_jobs ORDER BY id").fetchall()
+    assert [tuple(job) for job in jobs] == [(1, "complete"), (2, "pending")]
+    repo.close()
+
+
+def test_merge_duplicate_urls_keeps_newest_row_and_moves_jobs(repository):
+    canonical = "https://example.com/a"
+    repository.upsert(make_submission(canonical, title="old"))
+    repository.upsert(make_submission(f"{canonical}?utm_source=x", title="new"))
+    repository.upsert(make_submission("https://example.com/b?fbclid=1"))
+    repository.create_enrichment_jobs([canonical, f"{canonical}?utm_source=x"])
+    with repository._pool.writer() as conn:
+        conn.execute(
+            "UPDATE submissions SET ingested_at = '2020-01-01 00:00:00',"
+            " updated_at = '2020-01-01 00:00:00' WHERE url = ?",
+            (canonical,),
+        )
+
+    def strip_query(url, content_type):
+        return url.split("?")[0]
+
+    assert repository.merge_duplicate_urls(0, 2, strip_query) == (2, 0, 1)
+    assert repository.merge_duplicate_urls(2, 2, strip_query) == (3, 1, 0)
+    assert repository.merge_duplicate_urls(3, 2, strip_query) is None
+
+    with repository._pool.reader() as conn:
+        rows = conn.execute("SELECT url, title FROM submissions ORDER BY url")
+        assert [tuple(r) for r in rows] == [(canonical, "new"), ("https://example.com/b", "t")]
+        jobs = conn.execute("SELECT submission_url FROM enrichment_jobs").fetchall()
+        assert [j[0] for j in jobs] == [canonical]
+        assert not conn.execute("PRAGMA foreign_key_check").fetchall()
+    assert _row(repository, canonical)["ingested_at"] == "2020-01-01 00:00:00"
+
+
+def test_iter_submission_reads_between_chunks_without_a_reader(tmp_path):
+    db_path = str(tmp_path / "stream.db")
+    run_migrations(db_path)
+    repository = SubmissionRepository(db_path, pool=ConnectionPool(db_path, size=1))
+    content = "x" * 100
+    repository.upsert(Submission(
+        url="https://example.com/a", domain="example.com", content_type="generic_article",
+        content_markdown=content,
+    ))
+    chunks = repository.iter_submission(1, chunk_size=10)
+    next(chunks)
+    assert next(chunks) == "x" * 10
+    # The pool's only reader is back in the pool mid-stream
+    assert repository._pool._idle.qsize() == 1
+    repository.update_submission_content("https://example.com/a", "y" * 100, "complete")
+    with pytest.raises(ContentChanged):
+        list(chunks)
+    repository.close()
@@ -0,0 +1,96 @@
+import pytest
+
+from nomnom.models.submission import Submission
+from nomnom.schemas.ingest import IngestRequest
+from nomnom.services.ingestion_service import IngestionService
+from nomnom.services.youtube_service import TranscriptSegment, enrich_youtube_job
+from tests.conftest import make_submission
+
+URL = "https://www.youtube.com/watch?v=abc"
+
+
+class NoTranscriptFound(Exception):
+    """Stands in for the youtube-transcript-api exception of the same name."""
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    calls = []
+
+    def fetch_transcript(video_id):
+        calls.append(video_id)
+        if video_id == "none":
+            raise NoTranscriptFound("disabled")
+        return [TranscriptSegment(0.0, 1.5, "hello"), TranscriptSegment(1.5, 1.0, "world")], "en"
+
+    monkeypatch.setattr("nomnom.services.youtube_service.fetch_transcript", fetch_transcript)
+    return calls
+
+
+def _video() -> Submission:
+    return make_submission(
+        URL, domain="www.youtube.com", content_type="youtube_video", title=None,
+        metadata={"video_id": "abc"},
+    )
+
+
+def _job(video_id: str = "abc") -> dict:
+    return {"submission_url": URL, "metadata": {"video_id": video_id}}
+
+
+def _payload() -> IngestRequest:
+    return IngestRequest(
+        url=URL, domain="www.youtube.com", title="Video",
+        content_markdown="Processing on server...",
+        metadata={"type": "youtube_video", "video_id": "abc"},
+    )
+
+
+def _jobs(repository) -> list[str]:
+    with repository._pool.reader() as conn:
+        return [r["status"] for r in conn.execute("SELECT status FROM enrichment_jobs")]
+
+
+async def test_transcript_is_fetched_once_then_served_from_cache(repository, fetches):
+    repository.upsert(_video())
+
+    await enrich_youtube_job(_job(), repository)
+    repository.update_submission_content(URL, "stale", "pending")
+    await enrich_youtube_job(_job(), repository)
+
+    assert fetches == ["abc"]
+    stored = repository.get_submission(URL)
+    assert stored["content_markdown"] == "## Transcript\n\nhello world"
+    assert stored["enrichment_status"] == "complete"
+    assert repository.cached_transcripts(["abc"], 60, 60)["abc"]["language"] == "en"
+
+    # Past its TTL the entry is ignored and the transcript fetched again
+    await enrich_youtube_job(_job(), repository, cache_ttl_seconds=-1)
+    assert fetches == ["abc", "abc"]
+
+
+async def test_no_transcript_is_cached_with_its_own_ttl(repository, fetches):
+    repository.upsert(_video())
+
+    await enrich_youtube_job(_job("none"), repository)
+    await enrich_youtube_job(_job("none"), repository)
+    assert fetches == ["none"]
+    assert repository.get_submission(URL)["enrichment_error"].startswith("no transcript")
+
+    await enrich_youtube_job(_job("none"), repository, negative_cache_ttl_seconds=-1)
+    assert fetches == ["none", "none"]
+
+
+async def test_reingest_keeps_cached_transcript_and_skips_enrichment(repository, fetches):
+    service = IngestionService(repository)
+    assert (await service.ingest(_payload())).status == "saved"
+    assert _jobs(repository) == ["pending"]
+    job = repository.claim_enrichment_job(lease_seconds=600)
+    await enrich_youtube_job(job, repository)
+    repository.finish_enrichment_job(job["id"], "complete")
+
+    assert (await service.ingest(_payload())).status == "unchanged"
+
+    assert repository.get_submission(URL)["content_markdown"] == "## Transcript\n\nhello world"
+    assert _jobs(repository) == ["complete"]
+    assert fetches == ["abc"]
@@ -0,0 +1,79 @@
+
+from nomnom.models.submission import Submission
+from nomnom.services.youtube_service import TranscriptSegment, merge_segments
+
+URL = "https://www.youtube.com/watch?v=abc"
+
+
+def _video(repository) -> int:
+    repository.upsert(Submission(
+        url=URL, domain="www.youtube.com", content_type="youtube_video", title="Talk",
+        metadata={"video_id": "abc"},
+    ))
+    return repository.get_submission(URL)["id"]
+
+
+SEGMENTS = [
+    TranscriptSegment(0.0, 30.0, "welcome to the talk"),
+    TranscriptSegment(30.0, 30.0, "write ahead logging in sqlite"),
+    TranscriptSegment(60.0, 25.0, "questions from the audience"),
+]
+
+
+def test_merge_segments_groups_captions_by_duration():
+    captions = [TranscriptSegment(i * 4.0, 4.5, f"c{i}") for i in range(10)]
+
+    segments = merge_segments(captions, seconds=12)
+
+    assert [s.text for s in segments] == ["c0 c1", "c2 c3", "c4 c5", "c6 c7", "c8 c9"]
+    assert segments[1] == TranscriptSegment(8.0, 8.5, "c2 c3")
+    assert merge_segments([]) == []
+
+
+def test_segments_page_and_time_range(repository):
+    submission_id = _video(repository)
+    repository.store_transcript("abc", SEGMENTS, "en")
+
+    first = repository.transcript_segments(submission_id, limit=2)
+    assert [s["start"] for s in first] == [0.0, 30.0]
+    rest = repository.transcript_segments(
+        submission_id, after=(first[-1]["start"], first[-1]["id"])
+    )
+    assert [s["text"] for s in rest] == ["questions from the audience"]
+
+    # Segments overlapping 45s..70s
+    ranged = repository.transcript_segments(submission_id, start=45, end=70)
+    assert [s["start"] for s in ranged] == [30.0, 60.0]
+    assert repository.transcript_segments(999) is None
+
+
+def test_markdown_is_rendered_from_segments_on_read(repository):
+    submission_id = _video(repository)
+    repository.store_transcript("abc", SEGMENTS, "en")
+    repository.update_submission_content(URL, None, "complete")
+    expected = "## Transcript\n\n" + " ".join(s.text for s in SEGMENTS)
+
+    assert repository.get_submission(URL)["content_markdown"] == expected
+    chunks = repository.iter_submission(submission_id, chunk_size=10)
+    assert next(chunks)["content_markdown"] == ""
+    assert "".join(chunks) == expected
+
+    # A refetch replaces the segments rather than appending to them
+    repository.store_transcript("abc", SEGMENTS[:1], "en")
+    stored = repository.get_submission(URL)["content_markdown"]
+    assert stored == "## Transcript\n\nwelcome to the talk"
+
+
+def test_search_hits_in_transcripts_carry_a_timestamp(repository):
+    _video(repository)
+    repository.store_transcript("abc", SEGMENTS, "en")
+    repository.upsert(Submission(
+        url="https://example.com/wal", domain="example.com", content_type="generic_article",
+        title="Notes", content_markdown="sqlite pragmas",
+    ))
+
+    hits = {hit["url"]: hit for hit in repository.search("sqlite")}
+
+    assert hits[URL]["timestamp"] == 30.0
+    assert hits[URL]["snippet"] == "write ahead logging in **sqlite**"
+    assert hits["https://example.com/wal"]["timestamp"] is None
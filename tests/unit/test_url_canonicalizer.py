@@ -0,0 +1,101 @@
+import pytest
+
+from nomnom.db.connection import run_migrations
+from nomnom.models.submission import Submission
+from nomnom.repositories.submission_repository import SubmissionRepository
+from nomnom.schemas.ingest import IngestRequest
+from nomnom.services.ingestion_service import IngestionService
+from nomnom.services.url_canonicalizer import UrlCanonicalizer
+
+THREAD = "https://www.reddit.com/r/python/comments/abc123/"
+
+
+@pytest.fixture
+def canonicalizer():
+    return UrlCanonicalizer.default()
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.reddit.com/r/Python/comments/abc123/some_title/",
+    "https://old.reddit.com/r/python/comments/abc123/some_title/?utm_source=share",
+    "http://np.reddit.com/r/python/comments/abc123/",
+    "https://www.reddit.com/r/python/comments/abc123/some_title/kx9z1/?context=3",
+])
+def test_reddit_thread_variants_collapse(canonicalizer, url):
+    assert canonicalizer.canonicalize(url, "reddit_thread") == THREAD
+
+
+@pytest.mark.parametrize(("url", "expected"), [
+    ("HTTPS://Example.COM:443/a?utm_source=x&id=5&fbclid=1#intro", "https://example.com/a?id=5"),
+    ("https://example.com/a?b=%20x&utm_medium=y", "https://example.com/a?b=%20x"),
+    ("http://example.com:8080", "http://example.com:8080/"),
+    ("https://example.com/app#/inbox", "https://example.com/app#/inbox"),
+    ("https://youtu.be/dQw4w9WgXcQ?si=abc", "https://www.youtube.com/watch?v=dQw4w9WgXcQ"),
+    ("https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=30",
+     "https://www.youtube.com/watch?v=dQw4w9WgXcQ"),
+    ("https://www.github.com/owner/repo?tab=readme", "https://github.com/owner/repo"),
+    ("https://example.com/r/x/comments/1/", "https://example.com/r/x/comments/1/"),
+    ("mailto:someone@example.com", "mailto:someone@example.com"),
+])
+def test_generic_and_host_rules(canonicalizer, url, expected):
+    assert canonicalizer.canonicalize(url) == expected
+    # Idempotent, so stored canonical URLs are left alone by the dedupe command
+    assert canonicalizer.canonicalize(expected) == expected
+
+
+def test_custom_rules_and_cache(canonicalizer):
+    canonicalizer.canonicalize("https://example.com/a")
+    canonicalizer.canonicalize("https://example.com/a")
+    assert canonicalizer.canonicalize.cache_info().hits == 1
+
+    canonicalizer.register(lambda url: url._replace(path=url.path.rstrip("/") or "/"),
+                           hosts=["example.com"])
+    assert canonicalizer.canonicalize.cache_info().currsize == 0
+    assert canonicalizer.canonicalize("https://EXAMPLE.com/a/") == "https://example.com/a"
+
+
+async def test_ingest_stores_canonical_url(tmp_path):
+    db_path = str(tmp_path / "canonical.db")
+    run_migrations(db_path)
+    repository = SubmissionRepository(db_path)
+    service = IngestionService(repository)
+    payload = {"domain": "old.reddit.com", "title": "t", "content_markdown": "body",
+               "metadata": {"type": "reddit_thread"}}
+    try:
+        first = await service.ingest(IngestRequest(
+            url="https://old.reddit.com/r/python/comments/abc123/t/?utm_source=share", **payload
+        ))
+        again = await service.ingest(IngestRequest(
+            url="https://www.reddit.com/r/Python/comments/abc123/t/kx9z1/", **payload
+        ))
+        assert (first.status, again.status) == ("saved", "unchanged")
+        assert repository.get_submission(THREAD) is not None
+    finally:
+        repository.close()
+
+
+async def test_ingest_matches_stored_video_and_repo_by_id(tmp_path):
+    db_path = str(tmp_path / "ids.db")
+    run_migrations(db_path)
+    repository = SubmissionRepository(db_path)
+    service = IngestionService(repository)
+    # Stored before URLs were canonicalized
+    repository.upsert(Submission(
+        url="https://youtu.be/dQw4w9WgXcQ", domain="youtu.be", content_type="youtube_video",
+        title="v", metadata={"type": "youtube_video", "video_id": "dQw4w9WgXcQ"},
+    ))
+    repository.insert_github_placeholder("https://github.com/Owner/Repo", "Owner", "Repo")
+    try:
+        video = await service.ingest(IngestRequest(
+            url="https://www.youtube.com/watch?v=dQw4w9WgXcQ", domain="www.youtube.com",
+            title="v", metadata={"type": "youtube_video", "video_id": "dQw4w9WgXcQ"},
+        ))
+        repo = await service.ingest(IngestRequest(
+            url="https://github.com/owner/repo", domain="github.com"
+        ))
+        assert (video.status, repo.status) == ("unchanged", "skipped")
+        with repository._pool.reader() as conn:
+            urls = [row[0] for row in conn.execute("SELECT url FROM submissions ORDER BY id")]
+        assert urls == ["https://youtu.be/dQw4w9WgXcQ", "https://github.com/Owner/Repo"]
+    finally:
+        repository.close()
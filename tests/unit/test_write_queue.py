@@ -0,0 +1,78 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from nomnom.models.submission import UpsertOutcome
+from nomnom.services.write_queue import WriteQueue, WriteQueueClosed
+from tests.conftest import make_submission
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_commit_in_one_batch(repository):
+    calls = []
+    upsert_many = repository.upsert_many
+
+    def spy(submissions):
+        calls.append(len(submissions))
+        return upsert_many(submissions)
+
+    repository.upsert_many = spy
+    queue = WriteQueue(repository, max_batch=50, max_delay_ms=50)
+    queue.start()
+    results = await asyncio.gather(
+        queue.submit(make_submission("https://a")),
+        queue.submit(make_submission("https://b")),
+        queue.submit(make_submission("https://a", title="again")),
+    )
+    await queue.stop()
+
+    assert calls == [3]
+    assert results == [UpsertOutcome.INSERTED, UpsertOutcome.INSERTED, UpsertOutcome.UPDATED]
+
+
+@pytest.mark.asyncio
+async def test_batch_respects_max_items(repository):
+    queue = WriteQueue(repository, max_batch=2, max_delay_ms=100)
+    queue.start()
+    results = await asyncio.gather(*(queue.submit(make_submission(f"https://{i}")) for i in range(5)))
+    await queue.stop()
+    assert results == [UpsertOutcome.INSERTED] * 5
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_and_rejects_new(repository):
+    queue = WriteQueue(repository, max_batch=10, max_delay_ms=10_000)
+    queue.start()
+    pending = asyncio.create_task(queue.submit(make_submission("https://late")))
+    await asyncio.sleep(0)
+    await queue.stop()
+
+    assert await pending == UpsertOutcome.INSERTED
+    assert repository.get_submission("https://late") is not None
+    with pytest.raises(WriteQueueClosed):
+        await queue.submit(make_submission("https://after"))
+
+
+@pytest.mark.asyncio
+async def test_failed_item_fails_only_its_own_caller(repository):
+    with repository._pool.maintenance() as conn:
+        conn.execute(
+            "CREATE TEMP TRIGGER reject_bad BEFORE INSERT ON main.submissions "
+            "WHEN new.url = 'https://bad' BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        )
+    queue = WriteQueue(repository, max_batch=50, max_delay_ms=50)
+    queue.start()
+    results = await asyncio.gather(
+        queue.submit(make_submission("https://a")),
+        queue.submit(make_submission("https://bad")),
+        queue.submit(make_submission("https://b")),
+        return_exceptions=True,
+    )
+    await queue.stop()
+
+    assert results[0] == results[2] == UpsertOutcome.INSERTED
+    assert isinstance(results[1], sqlite3.IntegrityError)
+    assert repository.get_submission("https://a") is not None
+    assert repository.get_submission("https://b") is not None
+    assert repository.get_submission("https://bad") is None